@@ -0,0 +1,60 @@
+"""
+Measure the cost of creating devices with the DeviceFactory.
+
+The first call has to discover the plugins (cold), the following ones
+use the cached registry (warm). It is not meant to be used as an example of the library.
+"""
+
+import sys
+import time
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.enums import DeviceType
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.enums import DeviceType
+
+    print("Using local library")
+
+
+WARM_ITERATIONS = 1000
+
+
+def create_device():
+    """Create a fake device using the factory"""
+    return DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, port="COM10", fake=True)
+
+
+def main():
+    """Run the benchmark and print the results"""
+    start = time.perf_counter()
+    create_device()
+    cold = time.perf_counter() - start
+    drivers = sorted(name.rsplit(".", 1)[-1] for name in sys.modules if ".devices." in name)
+
+    start = time.perf_counter()
+    for _ in range(WARM_ITERATIONS):
+        create_device()
+    warm = (time.perf_counter() - start) / WARM_ITERATIONS
+
+    start = time.perf_counter()
+    DeviceFactory.refresh()
+    refresh = time.perf_counter() - start
+
+    print(f"- Cold factory call: {cold * 1e3:.3f} ms")
+    print(f"- Drivers imported by the cold call: {', '.join(drivers)}")
+    print(f"- Warm factory call: {warm * 1e6:.1f} us (average of {WARM_ITERATIONS} calls)")
+    print(f"- Explicit refresh: {refresh * 1e3:.3f} ms")
+    print(f"- Speedup: {cold / warm:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare the parsing of a stream of CI-V frames using the FrameReader receive buffer
+against splitting and slicing the received bytes on every frame.
+
+It is not meant to be used as an example of the library.
+"""
+
+import sys
+import timeit
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.frame import FrameReader
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.frame import FrameReader
+
+    print("Using local library")
+
+
+ITERATIONS = 200
+
+# Reply to the frequency reading (14.074 MHz)
+FREQUENCY_REPLY = b"\xfe\xfe\xe0\x94\x03\x00\x40\x07\x14\x00\xfd"
+# Scope waveform data, like the ones sent continuously by the IC-7300 (50 points per frame)
+SCOPE_FRAME = b"\xfe\xfe\xe0\x94\x27\x00\x00\x05\x11" + bytes(range(50)) + b"\xfd"
+# Data received from the serial port in a single read
+STREAM = (FREQUENCY_REPLY + SCOPE_FRAME * 10) * 20
+
+
+def slice_frames(stream: bytes) -> int:
+    """Split and check the frames as `send_command` used to do"""
+    parsed = 0
+    buffer = bytearray(stream)
+    while True:
+        end = buffer.find(b"\xfd")
+        if end < 0:
+            break
+        reply = bytes(buffer[: end + 1])
+        del buffer[: end + 1]
+        if reply[2].to_bytes(1, "big") == b"\xe0" and reply[3].to_bytes(1, "big") == b"\x94":
+            if reply[len(reply) - 2].to_bytes(1, "big") != bytes.fromhex("FA"):
+                parsed += len(reply[5:-1])
+    return parsed
+
+
+def read_frames(reader: FrameReader, stream: bytes) -> int:
+    """Split and check the frames using the FrameReader"""
+    parsed = 0
+    reader.feed(stream)
+    while True:
+        frame = reader.next_frame()
+        if frame is None:
+            break
+        if frame.target == 0xE0 and frame.source == 0x94 and not frame.is_ng:
+            parsed += len(frame.data())
+    return parsed
+
+
+def main():
+    """Run the benchmark and print the results"""
+    reader = FrameReader(None)
+    assert slice_frames(STREAM) == read_frames(reader, STREAM)
+    frames = STREAM.count(b"\xfd")
+
+    results = {
+        "Slicing the received bytes": timeit.timeit(lambda: slice_frames(STREAM), number=ITERATIONS),
+        "FrameReader views": timeit.timeit(lambda: read_frames(reader, STREAM), number=ITERATIONS),
+    }
+    for name, elapsed in results.items():
+        print(f"- {name}: {elapsed / (ITERATIONS * frames) * 1e9:.0f} ns per frame")
+
+
+if __name__ == "__main__":
+    main()
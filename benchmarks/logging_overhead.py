@@ -0,0 +1,67 @@
+"""
+Measure the CPU cost of a command round trip with the debug logging enabled and disabled.
+
+The transceiver is replaced by an in-memory serial port replying immediately, so
+the result is the time spent by the library itself. It is not meant to be used as
+an example of the library.
+"""
+
+import logging
+import sys
+import timeit
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.utils import Utils
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.utils import Utils
+
+    print("Using local library")
+
+
+ITERATIONS = 20_000
+
+# Reply to the frequency reading (14.074 MHz)
+FREQUENCY_REPLY = b"\xfe\xfe\xe0\x94\x03\x00\x40\x07\x14\x00\xfd"
+
+
+class MemorySerial:
+    """Serial port replying to every command with the same frame"""
+
+    def write(self, data: bytes) -> None:
+        pass
+
+    def read_until(self, expected: bytes = b"\xfd") -> bytes:
+        return FREQUENCY_REPLY
+
+
+class DiscardHandler(logging.Handler):
+    """Format the log records (as a real handler would do) and discard them"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.format(record)
+
+
+def main():
+    """Run the benchmark and print the results"""
+    logger = logging.getLogger("iu2frl-civ")
+    logger.addHandler(DiscardHandler())
+    logger.propagate = False
+    utils = Utils(MemorySerial(), b"\x94", b"\xe0", 3)
+
+    results = {}
+    for name, level in (("Logging disabled", logging.WARNING), ("Logging enabled (DEBUG)", logging.DEBUG)):
+        logger.setLevel(level)
+        results[name] = timeit.timeit(lambda: utils.send_command(b"\x03"), number=ITERATIONS)
+    for name, elapsed in results.items():
+        print(f"- {name}: {elapsed / ITERATIONS * 1e6:.2f} us per command")
+
+
+if __name__ == "__main__":
+    main()
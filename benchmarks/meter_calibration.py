@@ -0,0 +1,57 @@
+"""
+Compare the meters decoding using the precomputed calibration tables against
+the interpolation of the calibration points on every call.
+
+It is not meant to be used as an example of the library.
+"""
+
+import sys
+import timeit
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.meters import DEFAULT_METER_CALIBRATION, SWR_METER_POINTS, decode_meter_reply, linear_interpolate
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.meters import DEFAULT_METER_CALIBRATION, SWR_METER_POINTS, decode_meter_reply, linear_interpolate
+
+    print("Using local library")
+
+
+ITERATIONS = 200_000
+
+# Reply to the SWR meter reading (raw value: 0100)
+SWR_REPLY = b"\xfe\xfe\xe0\x94\x15\x12\x01\x00\xfd"
+
+
+def interpolate_reply(reply: bytes) -> float:
+    """Decode the reply as the drivers used to do, building the points list on every call"""
+    if len(reply) == 9:
+        raw_value = (int(reply[6]) * 100) + int(f"{reply[7]:02X}")
+        points = [(0, 1), (48, 1.5), (80, 2.0), (120, 3.0), (255, 99)]
+        return linear_interpolate(raw_value, points)
+    return -1
+
+
+def main():
+    """Run the benchmark and print the results"""
+    calibration = DEFAULT_METER_CALIBRATION["swr"]
+    assert interpolate_reply(SWR_REPLY) == decode_meter_reply(SWR_REPLY, calibration)
+
+    results = {
+        "Interpolation of the raw value": timeit.timeit(lambda: linear_interpolate(100, SWR_METER_POINTS), number=ITERATIONS),
+        "Lookup of the raw value": timeit.timeit(lambda: calibration.convert(100), number=ITERATIONS),
+        "Reply decoding (interpolation)": timeit.timeit(lambda: interpolate_reply(SWR_REPLY), number=ITERATIONS),
+        "Reply decoding (lookup)": timeit.timeit(lambda: decode_meter_reply(SWR_REPLY, calibration), number=ITERATIONS),
+    }
+    for name, elapsed in results.items():
+        print(f"- {name}: {elapsed / ITERATIONS * 1e9:.0f} ns per call")
+
+
+if __name__ == "__main__":
+    main()
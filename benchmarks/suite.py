@@ -0,0 +1,189 @@
+"""
+Measure the hot path of the library (encoders, decoders and the command round trip) and compare
+the results against a stored baseline, to catch the performance regressions.
+
+    python benchmarks/suite.py                    # Run and compare against benchmarks/baseline.json
+    python benchmarks/suite.py --save-baseline    # Store the results as the new baseline
+
+The results are written to a JSON file. Since the baseline is usually recorded on another machine,
+the times are normalized by a pure Python calibration loop before being compared.
+It is not meant to be used as an example of the library.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.bcd import decode_bcd_batch, encode_bcd_batch
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.enums import DeviceType
+    from iu2frl_civ.frame import FrameReader
+    from iu2frl_civ.meters import SWR_METER_POINTS
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.bcd import decode_bcd_batch, encode_bcd_batch
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.enums import DeviceType
+    from src.iu2frl_civ.frame import FrameReader
+    from src.iu2frl_civ.meters import SWR_METER_POINTS
+
+    print("Using local library")
+
+
+BENCHMARKS_FOLDER = Path(__file__).parent
+DEFAULT_BASELINE = BENCHMARKS_FOLDER / "baseline.json"
+DEFAULT_OUTPUT = BENCHMARKS_FOLDER / "results.json"
+CALIBRATION = "calibration"  # Name of the calibration loop among the measurements
+
+# Reply to the frequency reading (14.074 MHz)
+FREQUENCY_REPLY = b"\xfe\xfe\xe0\x94\x03\x00\x40\x07\x14\x00\xfd"
+
+
+def calibration_loop():
+    """Pure Python work used to compare the speed of the machines"""
+    total = 0
+    for value in range(1000):
+        total += value * value
+    return total
+
+
+def create_device():
+    """Create a fake device using the factory"""
+    return DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, port="COM10", fake=True)
+
+
+def build_benchmarks() -> Dict[str, Tuple[Callable[[], object], int]]:
+    """Create the benchmarks, returns the function to be timed and the calls in each measurement by name"""
+    radio = create_device()
+    utils = radio.utils
+    reader = FrameReader(None)
+    frequencies = list(range(14_000_000, 14_350_000, 1000))
+    encoded = encode_bcd_batch(frequencies, use_numpy=False)
+    batch = [(b"\x03", b""), (b"\x04", b""), (b"\x15", b"\x02"), (b"\x14", b"\x01")] * 2
+
+    def parse_frame():
+        reader.feed(FREQUENCY_REPLY)
+        return reader.next_frame()
+
+    def refresh_factory():
+        DeviceFactory.refresh()
+        return create_device()
+
+    return {
+        "utils.encode_frequency": (lambda: utils.encode_frequency(14_074_000), 20_000),
+        "utils.decode_frequency": (lambda: utils.decode_frequency(b"\x00\x40\x07\x14\x00"), 20_000),
+        "utils.encode_int_to_icom_bytes": (lambda: utils.encode_int_to_icom_bytes(1234), 20_000),
+        "utils.bytes_to_int": (lambda: utils.bytes_to_int(0x01, 0x28), 20_000),
+        "utils.linear_interpolate": (lambda: utils.linear_interpolate(100, SWR_METER_POINTS), 20_000),
+        "bcd.encode_batch_350": (lambda: encode_bcd_batch(frequencies, use_numpy=False), 100),
+        "bcd.decode_batch_350": (lambda: decode_bcd_batch(encoded, use_numpy=False), 100),
+        "frame.parse": (parse_frame, 20_000),
+        "frame.build_read": (lambda: utils.build_command(b"\x15\x02"), 20_000),
+        "frame.build_with_data": (lambda: utils.build_command(b"\x05", b"\x00\x40\x07\x14\x00"), 20_000),
+        "transport.send_command": (lambda: utils.send_command(b"\x03"), 500),
+        "transport.read_operating_frequency": (radio.read_operating_frequency, 500),
+        "transport.read_af_volume": (radio.read_af_volume, 500),
+        "transport.set_vox_delay": (lambda: radio.set_vox_delay(5), 500),
+        "transport.send_commands_8": (lambda: utils.send_commands(batch), 100),
+        "factory.get_repository": (create_device, 500),
+        "factory.refresh_and_create": (refresh_factory, 20),
+    }
+
+
+def measure(benchmarks: Dict[str, Tuple[Callable[[], object], int]], repeat: int) -> Dict[str, float]:
+    """
+    Time the benchmarks after a warm up run, returns the best time of a call in nanoseconds by name
+
+    The measurements are interleaved (one of each benchmark per round), so a slow period of the
+    machine does not spoil all the measurements of the same benchmark.
+    """
+    best = {}
+    for name, (function, number) in benchmarks.items():
+        timeit.timeit(function, number=number)
+        best[name] = float("inf")
+    for _ in range(repeat):
+        for name, (function, number) in benchmarks.items():
+            best[name] = min(best[name], timeit.timeit(function, number=number) / number * 1e9)
+    return best
+
+
+def run(repeat: int, name_filter: str = "") -> dict:
+    """Run the benchmarks, returns the results ready to be saved as JSON"""
+    benchmarks = {name: benchmark for name, benchmark in build_benchmarks().items() if name_filter in name}
+    benchmarks[CALIBRATION] = (calibration_loop, 1000)
+    times = measure(benchmarks, repeat)
+    calibration = times.pop(CALIBRATION)
+    results = {}
+    for name, elapsed in times.items():
+        results[name] = {"ns_per_call": elapsed, "calls_per_second": 1e9 / elapsed, "calls": benchmarks[name][1]}
+        print(f"- {name}: {elapsed:.0f} ns per call ({1e9 / elapsed:,.0f} per second)")
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "calibration_ns": calibration,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Compare the results against the baseline, normalized by the calibration loop
+
+    Returns: the description of the benchmarks slower than the baseline by more than the tolerance
+    """
+    scale = current["calibration_ns"] / baseline["calibration_ns"]
+    regressions = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            print(f"- {name}: not in the baseline")
+            continue
+        ratio = result["ns_per_call"] / (reference["ns_per_call"] * scale)
+        print(f"- {name}: {ratio:.2f}x the baseline")
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name} is {ratio:.2f}x slower than the baseline")
+    return regressions
+
+
+def main(args: List[str] = None) -> int:
+    """Run the benchmarks, save the results and compare them against the baseline"""
+    parser = argparse.ArgumentParser(description="Benchmark suite of the CI-V library")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="JSON file receiving the results")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="JSON file with the reference results")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="slowdown allowed before failing (0.5 = 50%%)")
+    parser.add_argument("--repeat", type=int, default=10, help="measurements of each benchmark, the best one is kept")
+    parser.add_argument("--filter", default="", help="only run the benchmarks containing this text")
+    options = parser.parse_args(args)
+
+    print("Running the benchmarks")
+    current = run(options.repeat, options.filter)
+    options.output.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {options.output}")
+
+    if options.save_baseline:
+        options.baseline.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {options.baseline}")
+        return 0
+    if not options.baseline.exists():
+        print(f"No baseline found in {options.baseline}, use --save-baseline to create it")
+        return 0
+
+    print("Comparing against the baseline")
+    regressions = compare(current, json.loads(options.baseline.read_text(encoding="utf-8")), options.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
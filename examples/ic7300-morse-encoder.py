@@ -7,13 +7,13 @@ try:
     # Import the library installed using pip
     from iu2frl_civ.device_factory import DeviceFactory
     from iu2frl_civ.enums import DeviceType, OperatingMode
-    from iu2frl_civ.exceptions import CivTimeoutException
+    from iu2frl_civ.exceptions import CivTimeoutException, CivUnavailableException
     print("Imported iu2frl_civ from pip-installed package.")
 except ImportError:
     sys.path.append(str(Path(__file__).parent.parent))
     from src.iu2frl_civ.device_factory import DeviceFactory
     from src.iu2frl_civ.enums import DeviceType, OperatingMode
-    from src.iu2frl_civ.exceptions import CivTimeoutException
+    from src.iu2frl_civ.exceptions import CivTimeoutException, CivUnavailableException
     print("Imported iu2frl_civ from local source code.")
 
 
@@ -71,6 +71,9 @@ if __name__ == "__main__":
         except KeyboardInterrupt:
             print("Interrupted by user.")
             break
+        except CivUnavailableException as e:
+            print(f"{e}, waiting for the radio...")
+            time.sleep(5)
         except CivTimeoutException as e:
             print(f"CIV Timeout Exception: {e}, retrying...")
         except Exception as e:
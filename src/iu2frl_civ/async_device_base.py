@@ -0,0 +1,166 @@
+"""
+Custom class to communicate with ICOM devices using CI-V protocol and asyncio
+"""
+
+import logging
+from typing import Optional, Tuple
+import serial
+
+from .enums import OperatingMode, SelectedFilter
+from .emulator import RadioEmulator
+from .fakeserial import FakeSerial
+from .async_utils import AsyncUtils
+from .scope import AsyncScopeStream
+
+
+logger = logging.getLogger("iu2frl-civ")
+
+
+class AsyncDeviceBase:
+    """
+    Create a CI-V object to interact with the radio transceiver from an asyncio event loop
+
+    Only the commands shared by most of the ICOM transceivers are implemented, all of them
+    are coroutines and never block the event loop.
+
+    Example:
+        >>> async with AsyncDeviceBase(radio_address="0x94", port="/dev/ttyUSB0") as radio:
+        ...     frequency = await radio.read_operating_frequency()
+    """
+
+    _ser: serial.Serial  # Serial port object
+    _read_attempts: int  # How many attempts before giving up the read process
+    transceiver_address: bytes  # Hexadecimal address of the radio transceiver
+    controller_address: bytes  # Hexadecimal address of the controller (this code)
+    fake: bool  # If the device is fake or not (used for testing)
+    utils: AsyncUtils  # Asyncio transport
+
+    def __init__(self, radio_address: str, port="/dev/ttyUSB0", baudrate: int = 19200, controller_address="0xE0", timeout=1, attempts=3, fake=False, emulator: Optional[RadioEmulator] = None):
+
+        self._read_attempts = attempts
+        # Validate the transceiver address
+        if isinstance(radio_address, str) and str(radio_address).startswith("0x"):
+            self.transceiver_address = bytes.fromhex(radio_address[2:])
+        else:
+            raise ValueError("Transceiver address must be in hexadecimal format (0x00)")
+        # Validate the controller address
+        if isinstance(controller_address, str) and str(controller_address).startswith("0x"):
+            self.controller_address = bytes.fromhex(controller_address[2:])
+        else:
+            raise ValueError("Controller address must be in hexadecimal format (0x00)")
+        # Open the serial port in non-blocking mode, timeouts are handled by the event loop
+        if not fake:
+            self._ser = serial.Serial(port, baudrate, timeout=0, dsrdtr=False)
+        else:
+            self._ser = FakeSerial(self.transceiver_address, self.controller_address, baudrate, port, emulator=emulator)
+        self.fake = fake
+        self.utils = AsyncUtils(self._ser, self.transceiver_address, self.controller_address, self._read_attempts, timeout=timeout, fake=fake)
+        logger.debug("Opened port: %s", self._ser.name)
+        logger.debug("Baudrate: %s bps", self._ser.baudrate)
+
+    async def __aenter__(self) -> "AsyncDeviceBase":
+        await self.utils.open()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Detach from the event loop and close the serial port"""
+        self.utils.close()
+        self._ser.close()
+
+    async def power_on(self) -> bytes:
+        """
+        Power on the radio transceiver
+
+        Returns: the response from the transceiver
+        """
+        # Preamble counts for different baudrates
+        preamble_counts = {115200: 150, 57600: 75, 38400: 50, 19200: 25, 9600: 13}
+        wakeup_preamble_count = preamble_counts.get(self._ser.baudrate, 7)
+        return await self.utils.send_command(b"\x18\x01", preamble=b"\xfe" * wakeup_preamble_count)
+
+    async def power_off(self) -> bytes:
+        """
+        Power off the radio transceiver
+
+        Returns: the response from the transceiver
+        """
+        return await self.utils.send_command(b"\x18\x00")
+
+    async def read_transceiver_id(self) -> bytes:
+        """
+        Read the transceiver address
+
+        Returns: the address of the transceiver, 0x00 if error
+        """
+        reply = await self.utils.send_command(b"\x19\x00")
+        if len(reply) > 0:
+            return reply[-2:-1]
+        return b"\x00"
+
+    async def read_operating_frequency(self) -> int:
+        """
+        Read the operating frequency
+
+        Returns: the currently tuned frequency in Hz, -1 if error
+        """
+        reply = await self.utils.send_command(b"\x03")
+        if len(reply) == 11:
+            return self.utils.decode_frequency(reply[5:10])
+        return -1
+
+    async def send_operating_frequency(self, frequency_hz: int | float) -> bool:
+        """
+        Send the operating frequency
+
+        Returns: True if the frequency was properly sent
+        """
+        if isinstance(frequency_hz, float):  # fix for using scientific notation ex: 14.074e6
+            frequency_hz = int(frequency_hz)
+        data = self.utils.encode_frequency(frequency_hz)
+        reply = await self.utils.send_command(b"\x05", data=data)
+        return len(reply) > 0
+
+    async def read_operating_mode(self) -> Tuple[str, str]:
+        """
+        Read the operating mode
+
+        Returns: a tuple containing
+            - the current mode
+            - the current filter
+        """
+        reply = await self.utils.send_command(b"\x04")
+        if len(reply) == 8:
+            mode = OperatingMode(int(reply[5:6].hex())).name
+            fil = SelectedFilter(int(reply[6:7].hex())).name
+            return [mode, fil]
+        return ["ERR", "ERR"]
+
+    async def set_operating_mode(self, mode: OperatingMode, new_filter: SelectedFilter = SelectedFilter.FIL1):
+        """Sets the operating mode and filter."""
+        await self.utils.send_command(b"\x06", data=bytes([mode.value, new_filter.value]))
+
+    async def read_smeter(self) -> int:
+        """
+        Read the S-meter value
+
+        0000=S0, 0120=S9, 0241=S9+60dB
+        """
+        reply = await self.utils.send_command(b"\x15\x02")
+        if len(reply) == 9:
+            return self.utils.bytes_to_int(reply[6], reply[7])
+        return -1
+
+    def read_scope_sweeps(self, max_pending: int = 4, use_numpy: Optional[bool] = None) -> AsyncScopeStream:
+        """
+        Read the scope sweeps sent continuously by the transceiver (scope data output must be enabled)
+
+        Args:
+            max_pending (int, optional): sweeps buffered if the consumer is too slow, the oldest are dropped. Defaults to 4.
+            use_numpy (bool, optional): return the data as numpy arrays instead of array('B'). Defaults to True if numpy is installed.
+
+        Returns: an async iterator over the ScopeSweep, use it as a context manager to stop receiving the frames when done
+        """
+        return AsyncScopeStream(self.utils, max_pending, use_numpy)
@@ -0,0 +1,207 @@
+"""Asyncio transport for the CI-V communication"""
+
+import os
+import random
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+from serial import Serial
+
+from .breaker import AsyncCircuitBreaker
+from .exceptions import CivCollisionException, CivCommandException, CivTimeoutException
+from .frame import CivFrame
+from .utils import HexBytes, Utils
+
+
+logger = logging.getLogger("iu2frl-civ")
+
+
+class AsyncUtils(Utils):
+    """
+    List of utilities for the CI-V communication using asyncio
+
+    Instead of blocking on the serial port, the file descriptor of the port is
+    registered in the event loop (`loop.add_reader`) and the received frames are
+    queued until a command awaits them. The circuit breaker probes the transceiver
+    from a task of the event loop.
+    The serial port must be opened in non-blocking mode (`timeout=0`), pseudo-terminals
+    (like the ones created by `os.openpty`) are supported as well.
+    """
+
+    _timeout: float  # Time to wait for a reply in seconds (for each attempt)
+    _fd: Optional[int] = None  # File descriptor registered in the event loop
+    _loop: Optional[asyncio.AbstractEventLoop] = None  # Event loop the transport is attached to
+    _frames: Optional[asyncio.Queue] = None  # Frames received from the transceiver
+    _lock: Optional[asyncio.Lock] = None  # Only one command at a time can wait for a reply
+    _subscriptions: List[Tuple[bytes, asyncio.Queue]]  # Queues receiving the unsolicited frames (by command prefix)
+    breaker: AsyncCircuitBreaker  # Rejects the commands when the transceiver stopped answering
+
+    def __init__(self, serial: Serial, transceiver_address, controller_address, read_attempts, timeout: float = 1, fake=False):
+        super().__init__(serial, transceiver_address, controller_address, read_attempts, fake=fake)
+        self._timeout = timeout
+        self.latency.max_timeout = timeout
+        self._subscriptions = []
+        self.breaker = AsyncCircuitBreaker(self)
+
+    async def open(self) -> None:
+        """Attach the transport to the running event loop"""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._frames = asyncio.Queue()
+        self._lock = asyncio.Lock()
+        # The fake serial port has no file descriptor, replies are read synchronously
+        if not self.fake:
+            self._fd = self._ser.fileno()
+            self._loop.add_reader(self._fd, self._on_readable)
+            logger.debug("Registered file descriptor %i in the event loop", self._fd)
+
+    def close(self) -> None:
+        """Detach the transport from the event loop"""
+        if self._loop is not None and self._fd is not None:
+            self._loop.remove_reader(self._fd)
+        self._fd = None
+        self._loop = None
+
+    def _on_readable(self) -> None:
+        """Read the available data from the file descriptor (called by the event loop)"""
+        try:
+            data = os.read(self._fd, 4096)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.error("Cannot read from the serial port: %s", e)
+            self.close()
+            return
+        self._feed(data)
+
+    def _feed(self, data: bytes) -> None:
+        """Split the received data into frames and queue them"""
+        self._reader.feed(data)
+        while True:
+            frame = self._reader.next_frame()
+            if frame is None:
+                break
+            # Queued frames outlive the receive buffer, so they are copied
+            for prefix, queue in self._subscriptions:
+                if frame.body[: len(prefix)] == prefix:
+                    if queue.full():
+                        # The subscriber is too slow, drop the oldest frame
+                        queue.get_nowait()
+                    queue.put_nowait(frame.tobytes())
+                    break
+            else:
+                self._frames.put_nowait(frame.tobytes())
+
+    def subscribe(self, prefix: bytes, maxsize: int = 64) -> asyncio.Queue:
+        """
+        Route the frames starting with the given command bytes to a new queue
+
+        Used for the data sent by the transceiver without being requested (like the scope waveform).
+        The queue is bounded: when it is full the oldest frames are dropped.
+
+        Returns: the queue receiving the frames (as bytes)
+        """
+        queue = asyncio.Queue(maxsize)
+        self._subscriptions.append((prefix, queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Stop routing the frames to a queue returned by `subscribe`"""
+        self._subscriptions = [subscription for subscription in self._subscriptions if subscription[1] is not queue]
+
+    async def send_command(self, command: bytes, data: bytes = b"", preamble: bytes = b"", no_reply: bool = False, timeout: Optional[float] = None) -> bytes:
+        """
+        Send a command to the radio transceiver and wait for the reply
+
+        Args:
+            timeout (float, optional): time to wait for the reply in seconds, for each attempt. Defaults to the timeout adapted to the measured round-trip time.
+
+        Returns: the response from the transceiver
+
+        Raises:
+            CivTimeoutException: if no reply is received before the deadline
+            CivUnavailableException (a CivTimeoutException): without sending the command if the transceiver stopped answering
+            CivCommandException: if the transceiver replied with NG
+        """
+        command_string = self.build_command(command, data, preamble)
+        await self.open()
+        if timeout is not None:
+            duration = timeout * self._read_attempts
+        elif self.adaptive_timeout:
+            duration = sum(self.latency.timeout(command[0], attempt) for attempt in range(self._read_attempts))
+        else:
+            duration = self._timeout * self._read_attempts
+        async with self._lock:
+            if not preamble:
+                # The wake-up preamble powers on the transceiver, which is not answering until then
+                self.breaker.check()
+            debug = logger.isEnabledFor(logging.DEBUG)
+            for collision in range(self.collision_retries + 1):
+                # Discard the frames received while nobody was waiting for them
+                while not self._frames.empty():
+                    self._frames.get_nowait()
+                if debug:
+                    logger.debug("Sending command: %s (length: %i)", HexBytes(command_string), len(command_string))
+                sent = self._loop.time()
+                self._ser.write(command_string)
+                if self._fd is None:
+                    self._feed(self._ser.read_until(expected=b"\xfd"))
+                if no_reply:
+                    if debug:
+                        logger.debug("No reply expected for this command")
+                    # The echo is read with the reply to the next command
+                    self._unanswered = command_string
+                    return b""
+                try:
+                    reply = await self._wait_reply(command_string, command[0], sent, duration, debug)
+                    self.breaker.record_success()
+                    return reply
+                except CivTimeoutException:
+                    self.breaker.record_timeout()
+                    raise
+                except CivCommandException:
+                    # NG reply, but the transceiver is answering
+                    self.breaker.record_success()
+                    raise
+                except CivCollisionException:
+                    if collision == self.collision_retries:
+                        raise
+                # Wait for a random time before sending again, so the colliding controllers do not retry together
+                backoff = random.uniform(0, self.collision_backoff * 2**collision)
+                if debug:
+                    logger.debug("Collision on the bus, sending again in %.3f seconds (%i/%i)", backoff, collision + 1, self.collision_retries)
+                await asyncio.sleep(backoff)
+
+    async def _wait_reply(self, command_string: bytes, command: int, sent: float, duration: float, debug: bool) -> bytes:
+        """
+        Wait for the reply to a command which was just sent
+
+        Args:
+            command (int): the command byte, to measure its round-trip time
+            sent (float): when the command was sent (loop.time)
+            duration (float): time to wait for the reply in seconds
+
+        Returns: the reply
+
+        Raises:
+            CivTimeoutException: if no reply is received before the deadline
+            CivCommandException: if the transceiver replied with NG
+            CivCollisionException: if a collision is detected on the bus
+        """
+        # Echoes and messages which are not for us do not count as attempts
+        deadline = sent + duration
+        while True:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                self.latency.record_timeout(command)
+                raise CivTimeoutException(f"Communication timeout occurred after {duration:.1f} seconds")
+            try:
+                reply = await asyncio.wait_for(self._frames.get(), remaining)
+            except asyncio.TimeoutError:
+                continue
+            if debug:
+                logger.debug("Received message: %s (length: %i)", HexBytes(reply), len(reply))
+            if len(reply) > 2 and self.validate_frame(command_string, CivFrame(memoryview(reply)), debug):
+                self.latency.record(command, self._loop.time() - sent)
+                return reply
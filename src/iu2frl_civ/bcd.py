@@ -0,0 +1,199 @@
+"""
+Binary coded decimal (BCD) encoding of the values exchanged with the transceivers
+
+The frequencies are sent least significant byte first (14.074 MHz is 00 40 07 14 00), while the
+other values (levels, tones, channels) are sent most significant byte first (255 is 02 55).
+"""
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Union
+
+if TYPE_CHECKING:
+    import numpy
+
+
+class _BcdTable(dict):
+    """Decimal value of each BCD byte, raising ValueError for the bytes which are not BCD"""
+
+    def __missing__(self, byte):
+        raise ValueError(f"Invalid BCD byte: {byte!r}")
+
+
+# Decimal value of each BCD byte (0x00-0x99), the bytes with a digit above 9 raise ValueError
+BCD_TO_INT = _BcdTable(((high << 4) | low, high * 10 + low) for high in range(10) for low in range(10))
+# Same values indexed by byte (faster than the dict), None for the bytes which are not BCD
+_BCD_VALUES = tuple(BCD_TO_INT.get(byte) for byte in range(256))
+# BCD byte of each value from 0 to 99
+INT_TO_BCD = bytes(((value // 10) << 4) | (value % 10) for value in range(100))
+# BCD bytes of each value from 0 to 9999, least significant byte first
+_QUAD_TO_BCD = tuple(bytes((INT_TO_BCD[value % 100], INT_TO_BCD[value // 100])) for value in range(10000))
+# BCD bytes of each value from 0 to 9999, most significant byte first
+_QUAD_TO_BCD_BIG_ENDIAN = tuple(quad[::-1] for quad in _QUAD_TO_BCD)
+
+FREQUENCY_WIDTH = 5  # Bytes of the frequencies, up to 9.999 GHz
+WIDE_FREQUENCY_WIDTH = 6  # Bytes of the frequencies of the transceivers working above 10 GHz
+
+
+def encode_bcd(value: int, width: int = FREQUENCY_WIDTH) -> bytes:
+    """
+    Encode a number as BCD, least significant byte first (like the frequencies)
+
+    Args:
+        value (int): the number to be encoded
+        width (int, optional): number of bytes (2 digits each). Defaults to FREQUENCY_WIDTH.
+
+    Returns: the encoded bytes
+
+    Raises: ValueError if the number is negative or does not fit the width
+    """
+    if not 0 <= value < 100**width:
+        raise ValueError(f"Value {value} cannot be encoded in {width} BCD bytes")
+    if width <= 6:
+        # Up to 12 digits, which are 3 lookups of 4 digits
+        return (_QUAD_TO_BCD[value % 10000] + _QUAD_TO_BCD[value // 10000 % 10000] + _QUAD_TO_BCD[value // 100000000])[:width]
+    result = bytearray(width)
+    for index in range(width):
+        result[index] = INT_TO_BCD[value % 100]
+        value //= 100
+    return bytes(result)
+
+
+def decode_bcd(data: Sequence[int]) -> int:
+    """
+    Decode a BCD number, least significant byte first (like the frequencies)
+
+    Returns: the decoded number
+
+    Raises: ValueError if a byte is not BCD
+    """
+    value = 0
+    try:
+        for byte in reversed(data):
+            value = value * 100 + _BCD_VALUES[byte]
+    except TypeError:
+        raise ValueError(f"Invalid BCD data: {bytes(data).hex()}") from None
+    return value
+
+
+def encode_bcd_big_endian(value: int, min_width: int = 2) -> bytes:
+    """
+    Encode a number as BCD, most significant byte first, using as few bytes as possible
+
+    Examples:
+        1      => b'\\x00\\x01'
+        255    => b'\\x02\\x55'
+        123456 => b'\\x12\\x34\\x56'
+
+    Args:
+        value (int): the number to be encoded
+        min_width (int, optional): minimum number of bytes. Defaults to 2.
+
+    Returns: the encoded bytes
+
+    Raises: ValueError if the number is negative
+    """
+    if value < 0:
+        raise ValueError("Negative values are not supported")
+    if value < 10000 and min_width == 2:
+        # Most of the levels and settings
+        return _QUAD_TO_BCD_BIG_ENDIAN[value]
+    width = min_width
+    while value >= 100**width:
+        width += 1
+    return encode_bcd(value, width)[::-1]
+
+
+def decode_bcd_big_endian(data: Sequence[int]) -> int:
+    """
+    Decode a BCD number, most significant byte first
+
+    Returns: the decoded number
+
+    Raises: ValueError if a byte is not BCD
+    """
+    value = 0
+    try:
+        for byte in data:
+            value = value * 100 + _BCD_VALUES[byte]
+    except TypeError:
+        raise ValueError(f"Invalid BCD data: {bytes(data).hex()}") from None
+    return value
+
+
+def encode_bcd_batch(values: Iterable[int], width: int = FREQUENCY_WIDTH, use_numpy: Optional[bool] = None) -> bytes:
+    """
+    Encode many numbers as BCD, least significant byte first, one after the other
+
+    Args:
+        values (Iterable[int]): the numbers to be encoded
+        width (int, optional): number of bytes of each number. Defaults to FREQUENCY_WIDTH.
+        use_numpy (bool, optional): encode with numpy (at most 9 bytes each). Defaults to using numpy if installed.
+
+    Returns: the concatenated encoded bytes (`width` bytes for each number)
+
+    Raises: ValueError if a number is negative or does not fit the width
+    """
+    numpy = _numpy_for(use_numpy)
+    if numpy is not None and width <= 9:
+        array = values.astype(numpy.int64, copy=False) if isinstance(values, numpy.ndarray) else numpy.fromiter(values, dtype=numpy.int64)
+        if array.size and (array.min() < 0 or array.max() >= 100**width):
+            raise ValueError(f"Values cannot be encoded in {width} BCD bytes")
+        pairs = array.reshape(-1, 1) // (100 ** numpy.arange(width, dtype=numpy.int64)) % 100
+        return ((pairs // 10) << 4 | pairs % 10).astype(numpy.uint8).tobytes()
+    return b"".join([encode_bcd(value, width) for value in values])
+
+
+def decode_bcd_batch(data: bytes, width: int = FREQUENCY_WIDTH, use_numpy: Optional[bool] = None) -> Union[List[int], "numpy.ndarray"]:
+    """
+    Decode many BCD numbers, least significant byte first, stored one after the other
+
+    Args:
+        data (bytes): the encoded numbers (`width` bytes each)
+        width (int, optional): number of bytes of each number. Defaults to FREQUENCY_WIDTH.
+        use_numpy (bool, optional): decode with numpy (at most 9 bytes each). Defaults to using numpy if installed.
+
+    Returns: the decoded numbers, as a numpy array of int64 if decoded with numpy
+
+    Raises: ValueError if the length of the data is not a multiple of the width or a byte is not BCD
+    """
+    if len(data) % width:
+        raise ValueError(f"The data length ({len(data)}) is not a multiple of {width}")
+    numpy = _numpy_for(use_numpy)
+    if numpy is not None and width <= 9:
+        raw = numpy.frombuffer(data, dtype=numpy.uint8).reshape(-1, width).astype(numpy.int64)
+        high, low = raw >> 4, raw & 0x0F
+        if raw.size and max(high.max(), low.max()) > 9:
+            raise ValueError("The data contains bytes which are not BCD")
+        return (high * 10 + low) @ (100 ** numpy.arange(width, dtype=numpy.int64))
+    view = memoryview(data)
+    return [decode_bcd(view[start : start + width]) for start in range(0, len(data), width)]
+
+
+@lru_cache(maxsize=None)
+def _import_numpy():
+    """
+    Import numpy the first time a batch needs it, since it takes longer to import than the whole library
+
+    Returns: the numpy module, None if it is not installed
+    """
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel,redefined-outer-name
+    except ImportError:  # numpy is optional, the batches are processed one value at a time without it
+        return None
+    return numpy
+
+
+def _numpy_for(use_numpy: Optional[bool]):
+    """
+    Get numpy if the batches must be processed with it
+
+    Returns: the numpy module, None to process the values one at a time
+
+    Raises: ImportError if numpy was requested but is not installed
+    """
+    if use_numpy is False:
+        return None
+    numpy = _import_numpy()  # pylint: disable=redefined-outer-name
+    if use_numpy and numpy is None:
+        raise ImportError("numpy is required to process the BCD batches with numpy")
+    return numpy
@@ -0,0 +1,220 @@
+"""Circuit breaker rejecting the commands sent to a transceiver which is not answering"""
+
+import asyncio
+import logging
+import threading
+import time
+from enum import Enum
+from typing import TYPE_CHECKING, Optional
+
+from .exceptions import CivCollisionException, CivCommandException, CivTimeoutException, CivUnavailableException
+
+if TYPE_CHECKING:
+    from .async_utils import AsyncUtils
+    from .utils import Utils
+
+
+logger = logging.getLogger("iu2frl-civ")
+
+# Command used to check if the transceiver is answering again (read transceiver ID)
+PROBE_COMMAND = b"\x19\x00"
+
+
+class BreakerState(Enum):
+    """State of the circuit breaker"""
+
+    CLOSED = "closed"  # The transceiver is answering, the commands are sent
+    OPEN = "open"  # The transceiver is not answering, the commands are rejected
+    HALF_OPEN = "half-open"  # The transceiver is being probed, the commands are still rejected
+
+
+class CircuitBreaker:
+    """
+    Reject the commands immediately when the transceiver stopped answering
+
+    After `failure_threshold` consecutive timeouts (a pipelined batch counts as one) the breaker
+    opens: the commands raise CivUnavailableException without being sent, instead of waiting
+    `attempts × timeout` each.
+    While open, a background thread reads the transceiver ID every `probe_interval` seconds
+    and closes the breaker as soon as the transceiver answers again. The power on command
+    (sent with the wake-up preamble) is never rejected, and closes the breaker when answered.
+
+    Example:
+        >>> try:
+        ...     radio.read_operating_frequency()
+        ... except CivUnavailableException:
+        ...     print("Radio is off")
+    """
+
+    failure_threshold: int  # Consecutive timeouts opening the breaker (0 disables the breaker)
+    probe_interval: float  # Seconds between the probes while the breaker is open
+    _utils: "Utils"  # Utilities sending the probes
+    _state: BreakerState  # Current state
+    _failures: int  # Consecutive timeouts
+    _lock: threading.Lock  # Guards the state
+    _stop: threading.Event  # Set to stop the probe thread
+    _thread: Optional[threading.Thread]  # Probe thread, running while the breaker is open
+
+    def __init__(self, utils: "Utils", failure_threshold: int = 3, probe_interval: float = 5):
+        self._utils = utils
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self._state = BreakerState.CLOSED
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def state(self) -> BreakerState:
+        """Current state of the breaker"""
+        return self._state
+
+    def check(self) -> None:
+        """
+        Check if a command can be sent
+
+        Raises: CivUnavailableException if the breaker is open (except for the probes)
+        """
+        if self._state is not BreakerState.CLOSED and threading.current_thread() is not self._thread:
+            raise CivUnavailableException(f"Transceiver is not answering (circuit breaker {self._state.value})")
+
+    def record_success(self) -> None:
+        """Record a command which received its reply"""
+        if self._failures or self._state is not BreakerState.CLOSED:
+            with self._lock:
+                self._failures = 0
+                if self._state is not BreakerState.CLOSED:
+                    logger.info("Transceiver is answering again, circuit breaker closed")
+                    # Stop the probe thread without waiting for it, it may be waiting for the command being answered
+                    self._stop.set()
+                self._state = BreakerState.CLOSED
+
+    def record_timeout(self) -> None:
+        """Record a command which timed out, opening the breaker after too many consecutive ones"""
+        with self._lock:
+            self._failures += 1
+            if self._state is not BreakerState.CLOSED or not self.failure_threshold or self._failures < self.failure_threshold:
+                return
+            logger.warning("Transceiver is not answering after %i timeouts, circuit breaker open", self._failures)
+            self._state = BreakerState.OPEN
+            self._start_probe()
+
+    def _start_probe(self) -> None:
+        """Start probing the transceiver in the background (the lock must be held)"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._probe, name="iu2frl-civ-breaker", daemon=True)
+        self._thread.start()
+
+    def reset(self) -> None:
+        """Close the breaker and stop probing"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        with self._lock:
+            self._thread = None
+            self._failures = 0
+            self._state = BreakerState.CLOSED
+
+    def _probe(self) -> None:
+        """Read the transceiver ID until it answers (runs in the probe thread)"""
+        while not self._stop.wait(self.probe_interval):
+            with self._lock:
+                if self._state is BreakerState.CLOSED or self._thread is not threading.current_thread():
+                    # Closed by a command answered meanwhile (like power_on), or by reset()
+                    break
+                self._state = BreakerState.HALF_OPEN
+            start = time.monotonic()
+            try:
+                self._utils.send_command(PROBE_COMMAND)
+            except CivCommandException:
+                # The transceiver replied NG, but it is answering
+                pass
+            except (CivTimeoutException, CivCollisionException, Exception) as e:  # pylint: disable=broad-except
+                logger.debug("Transceiver is still not answering: %s", e)
+                with self._lock:
+                    if self._state is BreakerState.HALF_OPEN:
+                        self._state = BreakerState.OPEN
+                continue
+            logger.debug("Probe answered after %.3f seconds", time.monotonic() - start)
+            self.record_success()
+            break
+        with self._lock:
+            if self._thread is threading.current_thread():
+                self._thread = None
+
+
+class AsyncCircuitBreaker(CircuitBreaker):
+    """
+    Circuit breaker of the asyncio transport
+
+    Works like CircuitBreaker, but the transceiver is probed by a task of the event loop
+    instead of a background thread.
+    """
+
+    _utils: "AsyncUtils"  # Asyncio transport sending the probes
+    _task: Optional["asyncio.Task"]  # Probe task, running while the breaker is open
+
+    def __init__(self, utils: "AsyncUtils", failure_threshold: int = 3, probe_interval: float = 5):
+        super().__init__(utils, failure_threshold, probe_interval)
+        self._task = None
+
+    def check(self) -> None:
+        """
+        Check if a command can be sent
+
+        Raises: CivUnavailableException if the breaker is open (except for the probes)
+        """
+        if self._state is not BreakerState.CLOSED and (self._task is None or asyncio.current_task() is not self._task):
+            raise CivUnavailableException(f"Transceiver is not answering (circuit breaker {self._state.value})")
+
+    def record_success(self) -> None:
+        """Record a command which received its reply"""
+        super().record_success()
+        task = self._task
+        if task is not None and self._state is BreakerState.CLOSED and task is not asyncio.current_task():
+            task.cancel()
+
+    def reset(self) -> None:
+        """Close the breaker and stop probing"""
+        with self._lock:
+            task, self._task = self._task, None
+            self._failures = 0
+            self._state = BreakerState.CLOSED
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+    def _start_probe(self) -> None:
+        """Start probing the transceiver from the event loop (the lock must be held)"""
+        self._task = asyncio.get_running_loop().create_task(self._probe_async())
+
+    async def _probe_async(self) -> None:
+        """Read the transceiver ID until it answers (runs in the probe task)"""
+        try:
+            while True:
+                await asyncio.sleep(self.probe_interval)
+                with self._lock:
+                    if self._state is BreakerState.CLOSED or self._task is not asyncio.current_task():
+                        # Closed by a command answered meanwhile (like power_on), or by reset()
+                        break
+                    self._state = BreakerState.HALF_OPEN
+                start = time.monotonic()
+                try:
+                    await self._utils.send_command(PROBE_COMMAND)
+                except CivCommandException:
+                    # The transceiver replied NG, but it is answering
+                    pass
+                except (CivTimeoutException, CivCollisionException, Exception) as e:  # pylint: disable=broad-except
+                    logger.debug("Transceiver is still not answering: %s", e)
+                    with self._lock:
+                        if self._state is BreakerState.HALF_OPEN:
+                            self._state = BreakerState.OPEN
+                    continue
+                logger.debug("Probe answered after %.3f seconds", time.monotonic() - start)
+                self.record_success()
+                break
+        finally:
+            with self._lock:
+                if self._task is asyncio.current_task():
+                    self._task = None
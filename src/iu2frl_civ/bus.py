@@ -0,0 +1,283 @@
+"""Shared CI-V bus: several transceivers connected to the same serial port"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import serial
+
+from .frame import FrameReader
+
+logger = logging.getLogger("iu2frl-civ")
+
+# Address used by the transceivers to broadcast the changes to all the controllers
+BROADCAST_ADDRESS = 0x00
+
+
+class BusPort:
+    """
+    Handle of a transceiver on a shared CI-V bus
+
+    The handle behaves like the serial port of a single transceiver: `read_until` only returns
+    the frames exchanged between this transceiver and its controller (replies, echoes of the
+    commands sent by the controller and broadcasts of the transceiver).
+    """
+
+    name: str  # Name of the serial port of the bus
+    transceiver_address: bytes  # Address of the transceiver
+    controller_address: bytes  # Address of the controller
+    timeout: Optional[float]  # Read timeout in seconds
+    rts: bool = False  # Ignored, the control lines belong to the bus
+    dtr: bool = False  # Ignored, the control lines belong to the bus
+
+    def __init__(self, bus: "CivBus", transceiver_address: bytes, controller_address: bytes, timeout: Optional[float], queue_size: int = 64):
+        self._bus = bus
+        self._frames = queue.Queue(queue_size)
+        self.name = bus.name
+        self.transceiver_address = transceiver_address
+        self.controller_address = controller_address
+        self.timeout = timeout
+
+    @property
+    def port(self) -> str:
+        """Name of the serial port of the bus"""
+        return self._bus.name
+
+    @property
+    def baudrate(self) -> int:
+        """Baudrate of the bus"""
+        return self._bus.baudrate
+
+    @property
+    def in_waiting(self) -> int:
+        """Number of frames received and not read yet"""
+        return self._frames.qsize()
+
+    def write(self, data: bytes) -> int:
+        """Send the data to the bus, waiting for it to be idle and for the other transceivers to reply"""
+        return self._bus.write(data, self)
+
+    def read_until(self, expected: bytes = b"\xfd", *args, **kwargs) -> bytes:
+        """
+        Get the next frame routed to this transceiver
+
+        Returns: the frame, an empty bytes object if nothing was received before the timeout
+        """
+        try:
+            return self._frames.get(timeout=self.timeout)
+        except queue.Empty:
+            return b""
+
+    def reset_input_buffer(self) -> None:
+        """Discard the frames which were not read yet"""
+        try:
+            while True:
+                self._frames.get_nowait()
+        except queue.Empty:
+            pass
+
+    def put(self, data: bytes) -> None:
+        """Queue a frame received from the bus (called by the reader thread)"""
+        while True:
+            try:
+                self._frames.put_nowait(data)
+                return
+            except queue.Full:
+                # Nobody is reading the frames of this transceiver, drop the oldest one
+                try:
+                    self._frames.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def close(self) -> None:
+        """Remove the transceiver from the bus (the bus stays open)"""
+        self._bus.release(self)
+
+
+class CivBus:
+    """
+    CI-V bus shared by several transceivers
+
+    The bus owns the serial port and a single reader thread, which routes the received frames
+    to the handles of the transceivers using the pair of transceiver and controller addresses.
+    Writes are serialized and only start when the bus is idle, so the transceivers on the same
+    wire do not collide. After a write the bus belongs to the transceiver it was sent to, until
+    all its replies are received (or the timeout of its handle expires): the commands to the
+    other transceivers wait, while the same transceiver can receive more commands (pipelining).
+
+    Example:
+        >>> bus = CivBus("/dev/ttyUSB0", 19200)
+        >>> hf = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, bus=bus)
+        >>> vhf = DeviceFactory.get_repository(radio_address="0xA2", device_type=DeviceType.IC_9700, bus=bus)
+    """
+
+    name: str  # Name of the serial port
+    baudrate: int  # Baudrate of the serial port
+    idle_time: float  # Silence required on the bus before sending a frame (seconds)
+    _ser: serial.Serial  # Serial port object
+    _reader: FrameReader  # Reader splitting the received data into frames
+    _ports: Dict[Tuple[int, int], List[BusPort]]  # Handles by (transceiver, controller) address
+    _lock: threading.Lock  # Guards the handles
+    _write_lock: threading.Lock  # Serializes the writes
+    _owner_changed: threading.Condition  # Guards the owner of the bus, notified when it is released
+    _owner: Optional[Tuple[int, int]]  # (transceiver, controller) address waiting for replies, None if the bus is free
+    _outstanding: int  # Commands sent to the owner which were not answered yet
+    _owner_deadline: float  # When the owner is considered not answering and the bus is released (time.monotonic)
+    _last_receive: float  # Time of the last frame received (time.monotonic)
+    _running: threading.Event  # Cleared to stop the reader
+    _thread: Optional[threading.Thread]  # Reader thread
+
+    def __init__(self, port="/dev/ttyUSB0", baudrate: int = 19200, idle_time: Optional[float] = None, ser=None):
+        """
+        Open the bus
+
+        Args:
+            port (str, optional): serial port. Defaults to "/dev/ttyUSB0".
+            baudrate (int, optional): serial baudrate. Defaults to 19200.
+            idle_time (float, optional): silence before sending a frame. Defaults to the time of 3 bytes.
+            ser (optional): an already opened serial port (or any object implementing `read_until` and `write`)
+        """
+        if ser is None:
+            # Short timeout, so the reader notices quickly when the bus is closed
+            ser = serial.Serial(port, baudrate, timeout=0.1, dsrdtr=False)
+            ser.rts = False
+            ser.dtr = False
+        self._ser = ser
+        self.name = getattr(ser, "name", port)
+        self.baudrate = getattr(ser, "baudrate", baudrate)
+        self.idle_time = idle_time if idle_time is not None else 30 / self.baudrate
+        self._reader = FrameReader(ser)
+        self._ports = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._owner_changed = threading.Condition()
+        self._owner = None
+        self._outstanding = 0
+        self._owner_deadline = 0.0
+        self._last_receive = 0.0
+        self._running = threading.Event()
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="iu2frl-civ-bus", daemon=True)
+        self._thread.start()
+        logger.debug("Opened CI-V bus on %s at %s bps", self.name, self.baudrate)
+
+    def __enter__(self) -> "CivBus":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def running(self) -> bool:
+        """True if the reader thread is running"""
+        return self._running.is_set()
+
+    def open_port(self, transceiver_address: bytes, controller_address: bytes = b"\xe0", timeout: Optional[float] = 1) -> BusPort:
+        """
+        Add a transceiver to the bus
+
+        Returns: the handle to use as the serial port of the transceiver
+        """
+        if not self._running.is_set():
+            raise ValueError("The CI-V bus is closed")
+        handle = BusPort(self, transceiver_address, controller_address, timeout)
+        with self._lock:
+            self._ports.setdefault((transceiver_address[0], controller_address[0]), []).append(handle)
+        logger.debug("Added transceiver 0x%02X (controller 0x%02X) to the bus", transceiver_address[0], controller_address[0])
+        return handle
+
+    def release(self, handle: BusPort) -> None:
+        """Remove a transceiver from the bus"""
+        with self._lock:
+            key = (handle.transceiver_address[0], handle.controller_address[0])
+            handles = self._ports.get(key, [])
+            if handle in handles:
+                handles.remove(handle)
+            if not handles:
+                self._ports.pop(key, None)
+
+    def write(self, data: bytes, handle: Optional[BusPort] = None) -> int:
+        """
+        Send the data as soon as the bus is idle, one writer at a time
+
+        Args:
+            handle (BusPort, optional): the transceiver the data is sent to, which owns the bus until it replies.
+                Defaults to None (the data is sent without waiting for a reply).
+        """
+        with self._write_lock:
+            key = None if handle is None else (handle.transceiver_address[0], handle.controller_address[0])
+            with self._owner_changed:
+                # Wait for the reply of the transceiver which received the previous command
+                while self._owner is not None and self._owner != key:
+                    remaining = self._owner_deadline - time.monotonic()
+                    if remaining <= 0:
+                        logger.debug("No reply from transceiver 0x%02X, releasing the bus", self._owner[0])
+                        self._owner = None
+                        break
+                    self._owner_changed.wait(remaining)
+                if key is not None:
+                    if self._owner != key:
+                        self._owner = key
+                        self._outstanding = 0
+                    self._outstanding += 1
+                    self._owner_deadline = time.monotonic() + (handle.timeout or 1)
+            while True:
+                wait = self._last_receive + self.idle_time - time.monotonic()
+                if wait <= 0:
+                    break
+                time.sleep(wait)
+            return self._ser.write(data)
+
+    def close(self) -> None:
+        """Stop the reader thread and close the serial port"""
+        if not self._running.is_set():
+            return
+        self._running.clear()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self._ser.close()
+        logger.debug("Closed CI-V bus on %s", self.name)
+
+    def _receive_reply(self, source: int, target: int) -> None:
+        """Count the replies received by the owner of the bus, releasing the bus after the last one"""
+        with self._owner_changed:
+            if self._owner != (source, target):
+                # Echo, broadcast or frame of another transceiver
+                return
+            self._outstanding -= 1
+            if self._outstanding <= 0:
+                self._owner = None
+                self._owner_changed.notify_all()
+
+    def _route(self, target: int, source: int) -> List[BusPort]:
+        """Get the handles receiving a frame"""
+        with self._lock:
+            if target == BROADCAST_ADDRESS:
+                # Broadcast of a transceiver, received by all its controllers
+                return [handle for (transceiver, _), handles in self._ports.items() if transceiver == source for handle in handles]
+            # Reply of the transceiver to the controller, or echo of a command sent by the controller
+            return list(self._ports.get((source, target), ())) + list(self._ports.get((target, source), ()))
+
+    def _run(self) -> None:
+        """Read and route the frames until the bus is closed (runs in the reader thread)"""
+        while self._running.is_set():
+            try:
+                frame = self._reader.read_frame()
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("CI-V bus stopped, cannot read from the serial port: %s", e)
+                self._running.clear()
+                return
+            if frame is None:
+                continue
+            self._last_receive = time.monotonic()
+            self._receive_reply(frame.source, frame.target)
+            handles = self._route(frame.target, frame.source)
+            if not handles:
+                logger.debug("Ignoring frame for an unknown transceiver (0x%02X -> 0x%02X)", frame.source, frame.target)
+                continue
+            data = frame.tobytes()
+            for handle in handles:
+                handle.put(data)
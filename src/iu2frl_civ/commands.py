@@ -0,0 +1,219 @@
+"""
+Declarative description of the commands reading or setting a single value
+
+Most of the methods of the drivers send a fixed command, check the length of the reply and convert
+one value. Instead of writing each of them by hand, a driver lists its commands in a table of
+CommandSpec and `command_table` generates the methods once, when the driver module is imported:
+
+    @command_table(
+        CommandSpec(b"\\x14\\x01", PERCENT, reader="read_af_volume", doc="the AF volume"),
+        CommandSpec(b"\\x1c\\x00", SWITCH, setter="set_mox", parameter="transmit", doc="the MOX"),
+    )
+    class MyRadio(DeviceBase):
+        ...
+
+Adding a model, or a setting to a model, is then a change of the table.
+"""
+
+import logging
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from .bcd import BCD_TO_INT, encode_bcd_big_endian
+
+logger = logging.getLogger("iu2frl-civ")
+
+
+class Codec(NamedTuple):
+    """Conversion between a value and the data of a command"""
+
+    type: type  # Type of the value, used in the annotations of the generated methods
+    encode: Callable[[Any], bytes]  # Converts the value to the data sent to the transceiver
+    decode: Callable[[bytes], Any]  # Converts the data of a reply to the value
+    size: int  # Bytes of data, the replies with a different length are not valid
+    fallback: Any  # Value returned by the reads when the reply is not valid
+    description: str  # Description of the value, used in the docstrings of the generated methods
+
+
+def _decode_level(data: bytes) -> int:
+    """Decode a 0-255 level (2 BCD bytes)"""
+    return data[0] * 100 + BCD_TO_INT[data[1]]
+
+
+def _encode_level(value: int) -> bytes:
+    """Encode a 0-255 level"""
+    return encode_bcd_big_endian(int(value))
+
+
+def _decode_percent(data: bytes) -> float:
+    """Decode a 0-255 level as a percentage"""
+    return _decode_level(data) * 100 / 255
+
+
+def _encode_percent(value: float) -> bytes:
+    """Encode a percentage as a 0-255 level"""
+    # Truncated, like the hand-written setters did (int(convert_to_range(...)))
+    return encode_bcd_big_endian(int(value * 255 / 100))
+
+
+_SWITCH_DATA = (b"\x00", b"\x01")
+_INVERTED_SWITCH_DATA = (b"\x01", b"\x00")
+
+# Level from 0% to 100%, sent as 0-255 (2 BCD bytes)
+PERCENT = Codec(float, _encode_percent, _decode_percent, 2, -1, "the percentage (0-100)")
+# Level from 0 to 255 (2 BCD bytes)
+LEVEL = Codec(int, _encode_level, _decode_level, 2, -1, "the level (0-255)")
+# On/off setting (1 byte, 0x01 when on)
+SWITCH = Codec(bool, lambda value: _SWITCH_DATA[bool(value)], lambda data: bool(data[0]), 1, False, "True if on")
+# On/off setting sending 0x00 when on
+INVERTED_SWITCH = Codec(bool, lambda value: _INVERTED_SWITCH_DATA[bool(value)], lambda data: not data[0], 1, False, "True if on")
+# Small number (1 byte, not BCD encoded)
+BYTE = Codec(int, lambda value: bytes((value,)), lambda data: data[0], 1, -1, "the value")
+# Small number starting from 1, sent starting from 0 (1 byte)
+ONE_BASED_BYTE = Codec(int, lambda value: bytes((value - 1,)), lambda data: data[0] + 1, 1, -1, "the value")
+
+_REQUIRED = object()  # Marks the arguments of the setters without a default
+
+
+class CommandSpec(NamedTuple):
+    """
+    A command reading or setting a single value
+
+    Example:
+        >>> CommandSpec(b"\\x1a\\x05\\x01\\x91", BYTE, setter="set_vox_delay", parameter="delay", value_range=(0, 20), doc="the VOX delay")
+    """
+
+    command: bytes  # Command byte followed by the subcommand, if any
+    codec: Codec  # Conversion of the value
+    reader: Optional[str] = None  # Name of the method reading the value, if any
+    setter: Optional[str] = None  # Name of the method setting the value, if any
+    parameter: str = "value"  # Name of the argument of the setter
+    default: Any = _REQUIRED  # Default value of the argument of the setter, if any
+    value_range: Optional[Tuple[int, int]] = None  # Values accepted by the setter (both included), if limited
+    doc: str = ""  # What the value is, used in the docstrings (like "the AF volume")
+    untested: bool = False  # Log a warning when the setter is used, since it was never tried on a real transceiver
+
+
+def command_table(*specs: CommandSpec) -> Callable[[type], type]:
+    """
+    Class decorator adding the methods described by the specs to a driver
+
+    The methods defined in the class itself are not replaced, so a driver can still write by hand
+    the ones which do not fit the table.
+
+    Raises: ValueError if a spec has no method to generate or is not consistent
+    """
+
+    def decorate(cls: type) -> type:
+        for spec in specs:
+            if spec.reader is None and spec.setter is None:
+                raise ValueError(f"The command {spec.command.hex()} has no method to generate")
+            if not 1 <= len(spec.command) <= 4:
+                raise ValueError(f"The command {spec.command.hex()} must be 1-4 bytes long")
+            for name, factory in ((spec.reader, make_reader), (spec.setter, make_setter)):
+                if name is not None and name not in cls.__dict__:
+                    method = factory(spec, name)
+                    method.__module__ = cls.__module__
+                    method.__qualname__ = f"{cls.__qualname__}.{name}"
+                    setattr(cls, name, method)
+        cls.command_specs = getattr(cls, "command_specs", ()) + specs
+        return cls
+
+    return decorate
+
+
+def make_reader(spec: CommandSpec, name: str) -> Callable[[Any], Any]:
+    """Create the method reading the value of a command"""
+    command = spec.command
+    decode = spec.codec.decode
+    fallback = spec.codec.fallback
+    # The reply repeats the command: 0xFE 0xFE [controller] [transceiver] [command] [data] 0xFD
+    start = 4 + len(command)
+    reply_length = start + spec.codec.size + 1
+
+    def reader(self):
+        reply = self.utils.send_command(command)
+        if len(reply) == reply_length:
+            return decode(reply[start:-1])
+        return fallback
+
+    reader.__name__ = name
+    reader.__doc__ = f"""
+        Read {spec.doc}
+
+        Returns: {spec.codec.description}, {fallback!r} if the reply is not valid
+        """
+    reader.__annotations__ = {"return": spec.codec.type}
+    return reader
+
+
+# Source of the setters, compiled once per spec so the argument keeps its name (like dataclasses do for __init__)
+_SETTER_SOURCE = """
+def {name}(self, {parameter}{default}):
+    {check}{warning}reply = self.utils.send_command(command, data=encode({parameter}))
+    return len(reply) > 0
+"""
+
+
+def make_setter(spec: CommandSpec, name: str) -> Callable[..., bool]:
+    """Create the method setting the value of a command"""
+    if not spec.parameter.isidentifier():
+        raise ValueError(f"Invalid parameter name: {spec.parameter}")
+    check = warning = ""
+    namespace: Dict[str, Any] = {"command": spec.command, "encode": spec.codec.encode, "default": spec.default, "logger": logger}
+    raises = ""
+    if spec.value_range is not None:
+        minimum, maximum = spec.value_range
+        label = spec.parameter.replace("_", " ").capitalize()
+        namespace["message"] = f"{label} must be between {minimum} and {maximum}"
+        check = f"if not ({minimum} <= {spec.parameter} <= {maximum}):\n        raise ValueError(message)\n    "
+        raises = f"\n\n        Raises: ValueError if the {spec.parameter} is not between {minimum} and {maximum}"
+    if spec.untested:
+        namespace["untested"] = f"The method `{name}` is not tested yet, please report any issues."
+        warning = "logger.warning(untested)\n    "
+    source = _SETTER_SOURCE.format(
+        name=name,
+        parameter=spec.parameter,
+        default="" if spec.default is _REQUIRED else "=default",
+        check=check,
+        warning=warning,
+    )
+    exec(source, namespace)  # pylint: disable=exec-used
+    setter = namespace[name]
+    setter.__doc__ = f"""
+        Set {spec.doc}
+
+        Args:
+            {spec.parameter} ({spec.codec.type.__name__}): {spec.codec.description}
+
+        Returns: True if the transceiver replied{raises}
+        """
+    setter.__annotations__ = {spec.parameter: spec.codec.type, "return": bool}
+    return setter
+
+
+# Commands shared by the transceivers following the CI-V reference of the IC-7300 (IC-7300, IC-9700, generic)
+STANDARD_COMMANDS = (
+    CommandSpec(b"\x14\x01", PERCENT, reader="read_af_volume", doc="the AF volume"),
+    CommandSpec(b"\x14\x02", PERCENT, reader="read_rf_gain", doc="the RF gain"),
+    CommandSpec(b"\x14\x03", PERCENT, reader="read_squelch_level", doc="the squelch level"),
+    CommandSpec(b"\x14\x06", PERCENT, reader="read_nr_level", doc="the NR level"),
+    CommandSpec(b"\x14\x12", PERCENT, reader="read_nb_level", doc="the NB level"),
+    CommandSpec(b"\x15\x02", LEVEL, reader="read_smeter", doc="the S-meter (0000=S0, 0120=S9, 0241=S9+60dB)"),
+    CommandSpec(b"\x1c\x00", SWITCH, reader="read_mox_status", setter="set_mox", parameter="transmit", doc="the MOX status"),
+    CommandSpec(b"\x1a\x07", SWITCH, setter="set_ip_plus_function", parameter="enable", doc="the IP+ function"),
+    CommandSpec(b"\x1a\x05\x01\x93", SWITCH, setter="set_mf_band_attenuator", parameter="enable", doc="the MF band attenuator"),
+    CommandSpec(b"\x1a\x05\x00\x81", LEVEL, setter="set_lcd_brightness", parameter="level", value_range=(0, 255), doc="the LCD brightness"),
+    CommandSpec(b"\x1a\x05\x00\x82", SWITCH, setter="set_display_image_type", parameter="blue_background", default=True, doc="the display image type (True for blue background)"),
+    CommandSpec(b"\x1a\x05\x01\x07", SWITCH, setter="set_scope_waterfall_display", parameter="on", doc="the waterfall display of the scope"),
+    CommandSpec(b"\x1a\x05\x01\x78", SWITCH, setter="set_scan_speed", parameter="high", doc="the scan speed (True for high)"),
+    CommandSpec(b"\x1a\x05\x01\x89", ONE_BASED_BYTE, setter="set_nb_depth", parameter="depth", value_range=(1, 10), doc="the NB depth (1-10)"),
+    CommandSpec(b"\x1a\x05\x01\x90", PERCENT, setter="set_nb_width", parameter="width", value_range=(0, 100), doc="the NB width (0-100)"),
+    CommandSpec(b"\x1a\x05\x01\x91", BYTE, setter="set_vox_delay", parameter="delay", value_range=(0, 20), doc="the VOX delay (tenths of a second)"),
+    CommandSpec(b"\x1a\x05\x01\x92", BYTE, setter="set_vox_voice_delay", parameter="voice_delay", value_range=(0, 3), doc="the VOX voice delay (0: off, 1: short, 2: mid, 3: long)"),
+    CommandSpec(b"\x27\x10", SWITCH, setter="set_scope_enabled", parameter="enabled", doc="the scope"),
+    CommandSpec(b"\x27\x11", SWITCH, setter="set_scope_data_out", parameter="enabled", doc="the output of the scope data to the COM port"),
+    # The scope settings are followed by the selection of the main (0x00) or sub (0x01) scope
+    CommandSpec(b"\x27\x14\x00", SWITCH, setter="set_scope_mode_fixed", parameter="fixed_mode", default=False, doc="the scope mode (True for fixed, False for center)"),
+    CommandSpec(b"\x27\x1a\x00", BYTE, setter="set_scope_sweep_speed", parameter="speed", value_range=(0, 2), doc="the sweep speed of the scope (0: fast, 1: mid, 2: slow)"),
+    CommandSpec(b"\x27\x1d\x00", SWITCH, setter="set_scope_vbw", parameter="wide", default=True, doc="the scope VBW (True for wide, False for narrow)"),
+)
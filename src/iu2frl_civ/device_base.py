@@ -5,11 +5,14 @@ Custom class to communicate with ICOM devices using CI-V protocol
 from abc import ABC
 import sys
 import logging
-from typing import Tuple
+from typing import Dict, Iterable, Optional, Tuple
 import serial
 
 from .enums import OperatingMode, SelectedFilter, TuningStep, VFOOperation, ScanMode
+from .bus import CivBus
+from .emulator import RadioEmulator
 from .fakeserial import FakeSerial
+from .meters import DEFAULT_METER_CALIBRATION, MeterCalibration, load_meter_calibration
 
 
 logger = logging.getLogger("iu2frl-civ")
@@ -24,8 +27,9 @@ class DeviceBase(ABC):
     controller_address: bytes  # Hexadecimal address of the controller (this code)
     fake: bool  # If the device is fake or not (used for testing)
     debug: bool  # If debug mode is enabled
+    meter_calibration: Dict[str, MeterCalibration] = DEFAULT_METER_CALIBRATION  # Calibration of the meters
 
-    def __init__(self, radio_address: str, port="/dev/ttyUSB0", baudrate: int = 19200, controller_address="0xE0", timeout=1, attempts=3, fake=False):
+    def __init__(self, radio_address: str, port="/dev/ttyUSB0", baudrate: int = 19200, controller_address="0xE0", timeout=1, attempts=3, fake=False, bus: Optional[CivBus] = None, emulator: Optional[RadioEmulator] = None):
 
         self._read_attempts = attempts
         # Validate the transceiver address
@@ -39,15 +43,28 @@ class DeviceBase(ABC):
         else:
             raise ValueError("Controller address must be in hexadecimal format (0x00)")
         # Open the serial port
-        if not fake:
+        if bus is not None:
+            # Share the serial port of the bus with the other transceivers
+            self._ser = bus.open_port(self.transceiver_address, self.controller_address, timeout)
+        elif not fake:
             self._ser = serial.Serial(port, baudrate, timeout=timeout, dsrdtr=False)
         else:
-            self._ser = FakeSerial(self.transceiver_address, self.controller_address, baudrate, port)
+            self._ser = FakeSerial(self.transceiver_address, self.controller_address, baudrate, port, timeout=timeout, emulator=emulator)
         # Print some information if debug is enabled
         self.fake = fake
         logger.debug("Opened port: %s", self._ser.name)
         logger.debug("Baudrate: %s bps", self._ser.baudrate)
 
+    def load_meter_calibration(self, file_path: str) -> None:
+        """
+        Override the meters calibration of this transceiver using a JSON file
+
+        Args:
+            file_path (str): path of the file, mapping the meter names (po, swr, alc, comp, vd, id) to their known points
+        """
+        self.meter_calibration = load_meter_calibration(file_path)
+        logger.debug("Loaded meters calibration from %s", file_path)
+
     def set_tuning_step(self, ts: TuningStep) -> bytes:
         """
         Set the tuning step on the radio transceiver
@@ -104,6 +121,18 @@ class DeviceBase(ABC):
         """
         raise NotImplementedError()
 
+    def start_transceive_listener(self):
+        """
+        Start receiving the transceive broadcasts in the background
+
+        Returns: the RadioState of the transceiver, updated by the background reader
+        """
+        raise NotImplementedError()
+
+    def stop_transceive_listener(self) -> None:
+        """Stop receiving the transceive broadcasts"""
+        raise NotImplementedError()
+
     def read_operating_mode(self) -> Tuple[str, str]:
         """
         Read the operating mode
@@ -196,6 +225,30 @@ class DeviceBase(ABC):
         """
         raise NotImplementedError()
 
+    def sweep(self, start_hz: int, stop_hz: int, step_hz: int, dwell_ms: float = 0):
+        """
+        Step the frequency across a range and read the S-meter at each point
+
+        Returns: the frequencies and the raw S-meter readings (SweepResult)
+        """
+        raise NotImplementedError()
+
+    def dump_memories(self, channels: Iterable[int] = range(1, 100)):
+        """
+        Read the content of the memory channels
+
+        Returns: the content of the channels (MemorySnapshot)
+        """
+        raise NotImplementedError()
+
+    def restore_memories(self, snapshot):
+        """
+        Write the memory channels of a snapshot, skipping the ones which already have the same content
+
+        Returns: the channels written and the ones left unchanged (RestoreReport)
+        """
+        raise NotImplementedError()
+
     def read_squelch_status(self):
         """
         Read noise or S-meter squelch status
@@ -281,6 +334,14 @@ class DeviceBase(ABC):
         """
         raise NotImplementedError()
 
+    def read_tx_meters(self):
+        """
+        Read all the TX meters (PO, SWR, ALC, COMP, Vd and Id) at once.
+
+        Returns: a TxMeters tuple with the readings of the meters
+        """
+        raise NotImplementedError()
+
     def read_mox_status(self) -> bool:
         """Reads the MOX status, returns True if MOX is on"""
         raise NotImplementedError()
@@ -415,6 +476,14 @@ class DeviceBase(ABC):
         # command is complex and requires further investigation
         raise NotImplementedError()
 
+    def read_scope_sweeps(self, max_pending: int = 4, use_numpy: Optional[bool] = None):
+        """
+        Read the scope sweeps sent continuously by the transceiver
+
+        Returns: an iterator over the ScopeSweep, with the decoded header and the data of all the divisions
+        """
+        raise NotImplementedError()
+
     def set_scope_mode_fixed(self, fixed_mode: bool = False):
         """Sets the scope mode, True for Fixed, False for Center"""
         raise NotImplementedError()
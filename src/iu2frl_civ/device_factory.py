@@ -2,13 +2,17 @@ import os
 import sys
 import pkgutil
 import importlib
+import functools
+import threading
 from pathlib import Path
 from importlib.metadata import entry_points
-from typing import Dict, Type
+from types import ModuleType
+from typing import Callable, Dict, Optional, Set, Type
 import logging
 
 from .enums import DeviceType
 from .device_base import DeviceBase
+from .emulator import RadioEmulator
 
 logger = logging.getLogger("iu2frl-civ")
 
@@ -19,16 +23,31 @@ class DeviceFactory:
     This class provides functionality to dynamically load and instantiate radio device plugins,
     either from pip-installed packages or local directories. It manages device types and their
     corresponding implementation classes through a mapping system.
+    Plugin discovery runs only once per process: the resulting registry is cached and shared
+    by all the subsequent calls, use `refresh()` to force a new scan (e.g. after installing a plugin).
+    Discovery only reads the package metadata, each driver module is imported the first time
+    its device type is requested.
     Class Attributes:
         _device_mapping (Dict[DeviceType, Type[DeviceBase]]): A dictionary mapping device types
-            to their corresponding implementation classes.
+            to their corresponding implementation classes (only the ones imported so far).
+        _plugin_index (Dict[str, Callable[[], ModuleType]]): The loaders of the discovered plugins.
+        _loaded_plugins (Set[str]): Names of the plugins which were already imported.
+        _plugin_names (Dict[DeviceType, str]): The plugin implementing each built-in device type.
+        _registry_loaded (bool): True once the plugins discovery was completed.
+        _registry_lock (threading.RLock): Lock guarding the registry.
     Methods:
-        _load_pip_plugins(group: str) -> None:
-            Discovers and loads plugins from pip-installed packages using entry points.
-        _load_local_plugins(package: str) -> None:
-            Discovers and loads plugins from local package directories.
+        _index_pip_plugins(group: str) -> Dict[str, Callable[[], ModuleType]]:
+            Discovers plugins from pip-installed packages using entry points.
+        _index_local_plugins(package: str) -> Dict[str, Callable[[], ModuleType]]:
+            Discovers plugins from local package directories.
+        _load_plugin(name: str) -> Optional[DeviceType]:
+            Imports a single plugin and registers its device class.
         is_local(module_name: str) -> bool:
             Determines if a module is loaded from a local directory or pip-installed package.
+        refresh() -> None:
+            Discards the cached registry and scans the plugins again.
+        get_device_class(device_type: DeviceType) -> Type[DeviceBase]:
+            Returns the class implementing a device type, importing it on first use.
         get_repository(
             port: str = "/dev/ttyUSB0",
             debug: bool = False,
@@ -46,43 +65,48 @@ class DeviceFactory:
     """
 
     _device_mapping: Dict[DeviceType, Type[DeviceBase]] = {}
+    _plugin_index: Dict[str, Callable[[], ModuleType]] = {}
+    _loaded_plugins: Set[str] = set()
+    _registry_loaded: bool = False
+    _registry_lock = threading.RLock()
+
+    # Name of the plugin implementing each built-in device type, this allows importing
+    # only the driver being requested instead of all the available ones
+    _plugin_names: Dict[DeviceType, str] = {
+        DeviceType.Generic: "generic",
+        DeviceType.IC_706_MK2: "ic706_mkii",
+        DeviceType.IC_7300: "ic7300",
+        DeviceType.IC_821_H: "ic821h",
+        DeviceType.IC_9700: "ic9700",
+    }
 
     @classmethod
-    def _load_pip_plugins(cls, group: str) -> None:
+    def _index_pip_plugins(cls, group: str) -> Dict[str, Callable[[], ModuleType]]:
         """
-        Discover and load plugins using entry points defined in the package's metadata.
+        Discover the plugins using entry points defined in the package's metadata.
+
+        The plugins are not imported, only their loaders are returned.
 
         Args:
             group (str): The entry point group name (e.g., "my_project.plugins").
+
+        Returns:
+            Dict[str, Callable[[], ModuleType]]: the plugin loaders indexed by entry point name
         """
-        for entry_point in entry_points().select(group=group):
-            try:
-                # Load the plugin
-                plugin = entry_point.load()
-
-                # Ensure the plugin provides the required attributes
-                if hasattr(plugin, "device_type") and hasattr(plugin, "device_class"):
-                    device_type = getattr(plugin, "device_type")
-                    device_class = getattr(plugin, "device_class")
-
-                    # Validate and register the plugin
-                    if issubclass(device_class, DeviceBase):
-                        cls._device_mapping[device_type] = device_class
-                        logger.debug("Loaded plugin: %s (%s)", entry_point.name, device_type)
-                    else:
-                        logger.error("Invalid plugin class in %s: %s", entry_point.name, device_class)
-                else:
-                    logger.error("Plugin %s is missing 'device_type' or 'device_class'", entry_point.name)
-            except Exception as e:
-                logger.error("Failed to load plugin %s: %s", entry_point.name, e)
+        return {entry_point.name: entry_point.load for entry_point in entry_points().select(group=group)}
 
     @classmethod
-    def _load_local_plugins(cls, package: str) -> None:
+    def _index_local_plugins(cls, package: str) -> Dict[str, Callable[[], ModuleType]]:
         """
-        Discover and load plugins in the given package dynamically.
+        Discover the plugins in the given package.
+
+        The plugins are not imported, only their loaders are returned.
 
         Args:
             package (str): The package name (e.g., "my_project.devices").
+
+        Returns:
+            Dict[str, Callable[[], ModuleType]]: the plugin loaders indexed by module name
         """
         # Convert package to a directory path
         package_path = package.replace(".", os.sep)
@@ -99,28 +123,44 @@ class DeviceFactory:
             if not os.path.isdir(package_dir):
                 raise ValueError(f"Package path not found: {package_dir}")
 
-        # Iterate over all modules in the package directory
-        for finder, module_name, is_pkg in pkgutil.iter_modules([package_dir]):
-            module_path = f"{package}.{module_name}"
-            try:
-                # Dynamically import the module
-                module = importlib.import_module(module_path)
-
-                # Check for required attributes
-                if hasattr(module, "device_type") and hasattr(module, "device_class"):
-                    device_type = getattr(module, "device_type")
-                    device_class = getattr(module, "device_class")
-
-                    # Validate and register the plugin
-                    if issubclass(device_class, DeviceBase):
-                        cls._device_mapping[device_type] = device_class
-                        logging.debug("Loaded plugin: %s (%s)", module_name, device_type)
-                    else:
-                        logging.debug("Invalid plugin class in %s: %s", module_name, device_class)
+        # List all modules in the package directory
+        return {module_name: functools.partial(importlib.import_module, f"{package}.{module_name}") for finder, module_name, is_pkg in pkgutil.iter_modules([package_dir])}
+
+    @classmethod
+    def _load_plugin(cls, name: str) -> Optional[DeviceType]:
+        """
+        Import a plugin from the index and register its device class.
+
+        Must be called while holding `_registry_lock`.
+
+        Args:
+            name (str): The name of the plugin in the index.
+
+        Returns:
+            Optional[DeviceType]: the device type provided by the plugin, None if it could not be loaded
+        """
+        cls._loaded_plugins.add(name)
+        try:
+            # Load the plugin
+            plugin = cls._plugin_index[name]()
+
+            # Ensure the plugin provides the required attributes
+            if hasattr(plugin, "device_type") and hasattr(plugin, "device_class"):
+                device_type = getattr(plugin, "device_type")
+                device_class = getattr(plugin, "device_class")
+
+                # Validate and register the plugin
+                if issubclass(device_class, DeviceBase):
+                    cls._device_mapping[device_type] = device_class
+                    logger.debug("Loaded plugin: %s (%s)", name, device_type)
+                    return device_type
                 else:
-                    logging.error("Module %s is missing 'device_type' or 'device_class'", module_name)
-            except Exception as e:
-                logging.error("Failed to load plugin %s: %s", module_path, e)
+                    logger.error("Invalid plugin class in %s: %s", name, device_class)
+            else:
+                logger.error("Plugin %s is missing 'device_type' or 'device_class'", name)
+        except Exception as e:
+            logger.error("Failed to load plugin %s: %s", name, e)
+        return None
 
     @classmethod
     def is_local(cls, module_name: str) -> bool:
@@ -155,6 +195,77 @@ class DeviceFactory:
             logger.debug(f"Module '{module_name}' not found.")
             return True
 
+    @classmethod
+    def _build_registry(cls) -> None:
+        """
+        Index the available plugins and discard the classes loaded so far.
+
+        Must be called while holding `_registry_lock`.
+        """
+        if not cls.is_local("iu2frl_civ.devices"):
+            cls._plugin_index = cls._index_pip_plugins("iu2frl_civ.devices")
+        else:
+            cls._plugin_index = cls._index_local_plugins("src.iu2frl_civ.devices")
+        cls._device_mapping = {}
+        cls._loaded_plugins = set()
+        cls._registry_loaded = True
+        logger.debug("Device registry built with %i plugins", len(cls._plugin_index))
+
+    @classmethod
+    def _ensure_registry(cls) -> None:
+        """Build the device registry if this was not done yet"""
+        if cls._registry_loaded:
+            return
+        with cls._registry_lock:
+            # Another thread may have completed the scan while we were waiting
+            if not cls._registry_loaded:
+                cls._build_registry()
+
+    @classmethod
+    def refresh(cls) -> None:
+        """
+        Discard the cached registry and scan the plugins again.
+
+        Useful when a new plugin was installed after the first call to `get_repository`.
+        """
+        with cls._registry_lock:
+            cls._build_registry()
+
+    @classmethod
+    def get_device_class(cls, device_type: DeviceType) -> Type[DeviceBase]:
+        """
+        Get the class implementing the specified device type, importing its plugin on first use.
+
+        Args:
+            device_type (DeviceType): The type of device to look for.
+
+        Returns:
+            Type[DeviceBase]: the class implementing the device
+
+        Raises:
+            ValueError: If the specified device type is not supported.
+        """
+        device_class = cls._device_mapping.get(device_type)
+        if device_class is not None:
+            return device_class
+
+        with cls._registry_lock:
+            cls._ensure_registry()
+            # Try with the plugin known to implement this device type first
+            plugin_name = cls._plugin_names.get(device_type)
+            if device_type not in cls._device_mapping and plugin_name in cls._plugin_index and plugin_name not in cls._loaded_plugins:
+                cls._load_plugin(plugin_name)
+            # Then fall back to the remaining plugins (e.g. from third parties)
+            for name in list(cls._plugin_index):
+                if device_type in cls._device_mapping:
+                    break
+                if name not in cls._loaded_plugins:
+                    cls._load_plugin(name)
+
+            if device_type not in cls._device_mapping:
+                raise ValueError(f"Unsupported device type: {device_type}")
+            return cls._device_mapping[device_type]
+
     @staticmethod
     def get_repository(radio_address: str, device_type: DeviceType = DeviceType.Generic, port="/dev/ttyUSB0", baudrate: int = 19200, controller_address="0xE0", timeout=1, attempts=3, fake=False, *args, **kwargs) -> DeviceBase:
         """Create and return a device repository instance based on the specified device type.
@@ -167,6 +278,8 @@ class DeviceFactory:
             controller_address (str, optional): Controller address. Defaults to "0xE0".
             timeout (int, optional): Communication timeout in seconds. Defaults to 1.
             attempts (int, optional): Number of retry attempts. Defaults to 3.
+            bus (CivBus, optional): Shared CI-V bus to use instead of opening the serial port. Defaults to None.
+            emulator (RadioEmulator, optional): Emulated transceiver used in fake mode. Defaults to the emulator of the device type.
             *args: Variable length argument list.
             **kwargs: Arbitrary keyword arguments.
         Returns:
@@ -175,15 +288,12 @@ class DeviceFactory:
             ValueError: If the specified device type is not supported.
         """
 
-        if not DeviceFactory.is_local("iu2frl_civ.devices"):
-            DeviceFactory._load_pip_plugins("iu2frl_civ.devices")
-        else:
-            DeviceFactory._load_local_plugins("src.iu2frl_civ.devices")
-
-        if device_type not in DeviceFactory._device_mapping:
-            raise ValueError(f"Unsupported device type: {device_type}")
+        device_class = DeviceFactory.get_device_class(device_type)
+        if fake and "emulator" not in kwargs:
+            # Emulate the transceiver model
+            kwargs["emulator"] = RadioEmulator.for_device(device_type)
 
-        return DeviceFactory._device_mapping.get(device_type, DeviceBase)(
+        return device_class(
             radio_address=radio_address,
             port=port,
             baudrate=baudrate,
@@ -3,21 +3,32 @@ Custom class to communicate with ICOM devices using CI-V protocol
 This class was built using the section 19 of the ICOM IC-7300 User Manual
 """
 
-from typing import Tuple
+from typing import Optional, Tuple
 import logging
 import datetime
 import time
 
 from ..enums import OperatingMode, SelectedFilter, VFOOperation, ScanMode, DeviceType
 from ..device_base import DeviceBase
+from ..commands import STANDARD_COMMANDS, SWITCH, CommandSpec, command_table
 from ..utils import Utils
+from ..transceive import RadioState
+from ..meters import TxMeters, read_tx_meters
+from ..scope import ScopeStream
+from ..sweep import SweepResult, run_sweep
 
 logger = logging.getLogger("iu2frl-civ")
 
 
+@command_table(
+    *STANDARD_COMMANDS,
+    CommandSpec(b"\x1a\x05\x00\x83", SWITCH, setter="set_display_font", parameter="round", default=True, doc="the display font (True for round)"),
+)
 class GenericDevice(DeviceBase):
     """Create a CI-V object to interact with a generic the radio transceiver"""
 
+    frequency_range = (10_000, 74_000_000)  # Frequencies accepted by send_operating_frequency, in Hz
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -67,14 +78,36 @@ class GenericDevice(DeviceBase):
         """
         Read the operating frequency
 
+        If the transceive listener is running, the frequency is taken from the state of the transceiver
+        without sending any command.
+
         Returns: the currently tuned frequency in Hz
         """
+        state = self.utils.state
+        if state.live and state.frequency is not None:
+            return state.frequency
         try:
             reply = self.utils.send_command(b"\x03")
             return self.utils.decode_frequency(reply[5:10])
         except:
             return -1
 
+    def start_transceive_listener(self) -> RadioState:
+        """
+        Start receiving the transceive broadcasts in the background
+
+        The transceiver sends the frequency and the mode when they are changed from the front panel
+        (CI-V Transceive must be enabled in the menu), so `read_operating_frequency` can be answered
+        without polling the transceiver.
+
+        Returns: the state of the transceiver, updated by the background reader
+        """
+        return self.utils.start_listener()
+
+    def stop_transceive_listener(self) -> None:
+        """Stop receiving the transceive broadcasts"""
+        self.utils.stop_listener()
+
     def read_operating_mode(self) -> Tuple[str, str]:
         """
         Read the operating mode
@@ -101,8 +134,9 @@ class GenericDevice(DeviceBase):
             frequency_hz = int(frequency_hz)
 
         # Validate input
-        if not (10_000 <= frequency_hz <= 74_000_000):  # IC-7300 frequency range in Hz
-            raise ValueError("Frequency must be between 10 kHz and 74 MHz")
+        minimum, maximum = self.frequency_range
+        if not (minimum <= frequency_hz <= maximum):
+            raise ValueError(f"Frequency must be between {minimum} Hz and {maximum} Hz")
         # Encode the frequency
         data = self.utils.encode_frequency(frequency_hz)
 
@@ -113,101 +147,25 @@ class GenericDevice(DeviceBase):
         else:
             return False
 
-    def read_af_volume(self) -> int:
-        """
-        Read the AF volume
-
-        Raw values from CI-V
-        0: min
-        255: max
-
-        Returns: The percentage of the volume being set
-        """
-        reply = self.utils.send_command(b"\x14\x01")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            return self.utils.convert_to_range(raw_value, 0, 255, 0, 100)
-        return -1
-
-    def read_rf_gain(self) -> int:
-        """
-        Read the RF gain
-
-        Raw values from CI-V
-        0: min
-        255: max
-
-        Returns: The percentage of the RF gain being set
+    def sweep(self, start_hz: int, stop_hz: int, step_hz: int, dwell_ms: float = 0) -> SweepResult:
         """
-        reply = self.utils.send_command(b"\x14\x02")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            return self.utils.convert_to_range(raw_value, 0, 255, 0, 100)
-        return -1
+        Step the frequency across a range and read the S-meter at each point
 
-    def read_squelch_level(self) -> int:
-        """
-        Read the squelch level
-
-        Raw values from CI-V
-        0: min
-        255: max
-
-        Returns: The percentage of the squelch being set
-        """
-        reply = self.utils.send_command(b"\x14\x03")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            return self.utils.convert_to_range(raw_value, 0, 255, 0, 100)
-        return -1
-
-    def read_nr_level(self) -> int:
-        """
-        Read the NR level
-
-        Raw values from CI-V
-        0: min
-        255: max
-
-        Returns: The percentage of the NR being set
-        """
-        reply = self.utils.send_command(b"\x14\x06")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            return self.utils.convert_to_range(raw_value, 0, 255, 0, 100)
-        return -1
-
-    def read_nb_level(self) -> float:
-        """
-        Read the NB level
-
-        Raw values from CI-V
-        0: min
-        255: max
-
-        Returns: The percentage of the NB being set
-        """
-        reply = self.utils.send_command(b"\x14\x12")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            return self.utils.convert_to_range(raw_value, 0, 255, 0, 100)
-        return -1
-
-    def read_smeter(self) -> int:
-        """
-        Read the S-meter value
+        The commands are pipelined, so the acknowledge of each frequency is received while the receiver settles.
 
-        0: min
-        255: max
+        Args:
+            start_hz (int): first frequency
+            stop_hz (int): last frequency (included if on the grid)
+            step_hz (int): distance between the points
+            dwell_ms (float, optional): time to wait after setting each frequency before reading the S-meter. Defaults to 0.
 
-        0000=S0, 0120=S9, 0241=S9+60dB
+        Returns: the frequencies and the raw S-meter readings (0000=S0, 0120=S9, 0241=S9+60dB, -1 if rejected)
 
-        TODO: test if properly working
+        Raises:
+            ValueError: if the range is not valid or outside the frequencies of the transceiver
+            CivTimeoutException: if the transceiver stopped answering
         """
-        reply = self.utils.send_command(b"\x15\x02")
-        if len(reply) == 9:
-            return self.utils.bytes_to_int(reply[6], reply[7])
-        return -1
+        return run_sweep(self.utils, start_hz, stop_hz, step_hz, dwell_ms, self.frequency_range)
 
     def read_squelch_status(self):
         """
@@ -241,12 +199,7 @@ class GenericDevice(DeviceBase):
         213: 100%
         """
         reply = self.utils.send_command(b"\x15\x11")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            # Known points (raw -> PO%)
-            points = [(0, 0), (143, 50), (213, 100)]
-            return self.utils.linear_interpolate(raw_value, points)
-        return -1
+        return self.utils.decode_meter_reply(reply, self.meter_calibration["po"])
 
     def read_swr_meter(self) -> float:
         """
@@ -257,12 +210,7 @@ class GenericDevice(DeviceBase):
         120: SWR3.0
         """
         reply = self.utils.send_command(b"\x15\x12")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            # Known points (raw -> SWR)
-            points = [(0, 1), (48, 1.5), (80, 2.0), (120, 3.0), (255, 99)]
-            return self.utils.linear_interpolate(raw_value, points)
-        return -1
+        return self.utils.decode_meter_reply(reply, self.meter_calibration["swr"])
 
     def read_alc_meter(self) -> float:
         """
@@ -271,12 +219,7 @@ class GenericDevice(DeviceBase):
         120: Max
         """
         reply = self.utils.send_command(b"\x15\x13")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            # Known points (raw -> ALC%)
-            points = [(0, 0), (120, 100)]
-            return self.utils.linear_interpolate(raw_value, points)
-        return -1
+        return self.utils.decode_meter_reply(reply, self.meter_calibration["alc"])
 
     def read_comp_meter(self) -> float:
         """
@@ -286,12 +229,7 @@ class GenericDevice(DeviceBase):
         241: 30 dB
         """
         reply = self.utils.send_command(b"\x15\x14")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            # Known points (raw -> dB)
-            points = [(0, 0), (130, 15), (241, 30)]
-            return self.utils.linear_interpolate(raw_value, points)
-        return -1
+        return self.utils.decode_meter_reply(reply, self.meter_calibration["comp"])
 
     def read_vd_meter(self) -> float:
         """
@@ -306,12 +244,7 @@ class GenericDevice(DeviceBase):
             float: The voltage in volts measured on the amplifier.
         """
         reply = self.utils.send_command(b"\x15\x15")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            # Known points (raw -> A)
-            points = [(0, 0), (13, 10), (241, 16)]
-            return self.utils.linear_interpolate(raw_value, points)
-        return -1.0  # Return -1 in case of error
+        return self.utils.decode_meter_reply(reply, self.meter_calibration["vd"])
 
     def read_id_meter(self) -> float:
         """
@@ -326,19 +259,19 @@ class GenericDevice(DeviceBase):
         Returns: the current in Ampere being mesured on the amplifier
         """
         reply = self.utils.send_command(b"\x15\x16")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            # List of known points (from the manual - byte -> Ampere)
-            points = [(0, 0), (97, 10), (146, 15), (241, 25)]
-            return self.utils.linear_interpolate(raw_value, points)
-        return -1.0  # Return -1 in case of error
-
-    def read_mox_status(self) -> bool:
-        """Reads the MOX status, returns True if MOX is on"""
-        reply = self.utils.send_command(b"\x1C\x00")
-        if len(reply) == 8:
-            return bool(reply[6])
-        return False
+        return self.utils.decode_meter_reply(reply, self.meter_calibration["id"])
+
+    def read_tx_meters(self) -> TxMeters:
+        """
+        Read all the TX meters (PO, SWR, ALC, COMP, Vd and Id) at once.
+
+        The commands are sent back to back, without waiting for each reply.
+
+        Returns: the readings of the meters, -1 for the ones rejected or not answered
+
+        Raises: CivUnavailableException without sending the commands if the transceiver stopped answering
+        """
+        return read_tx_meters(self.utils, self.meter_calibration)
 
     def set_antenna_tuner(self, on: bool):
         """Turns the antenna tuner on or off."""
@@ -363,33 +296,6 @@ class GenericDevice(DeviceBase):
         message_bytes = message.encode("ascii")
         self.utils.send_command(b"\x17", data=message_bytes)
 
-    def set_ip_plus_function(self, enable: bool) -> bool:
-        """
-        Sets the IP+ function setting.
-
-        Args:
-            enable (bool): True to enable, False to disable.
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-        """
-        value = 1 if enable else 0
-        reply = self.utils.send_command(b"\x1a\x07", data=bytes([value]))
-        return len(reply) > 0
-
-    def set_mf_band_attenuator(self, enable: bool) -> bool:
-        """
-        Sets the MF band attenuator setting.
-
-        Args:
-            enable (bool): True to enable, False to disable.
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-        """
-        reply = self.utils.send_command(b"\x1a\x05\x01\x93", data=bytes([int(enable)]))
-        return len(reply) > 0
-
     def set_vfo_mode(self, vfo_mode: VFOOperation = VFOOperation.SELECT_VFO_A):
         """Sets the VFO mode."""
         if vfo_mode in VFOOperation:
@@ -415,53 +321,21 @@ class GenericDevice(DeviceBase):
         hex_list.append(f"0x{number_as_string[1]}{number_as_string[2]}")
         self.utils.send_command(b"\x08", data=bytes([int(hx, 16) for hx in hex_list]))
 
-    def set_mox(self, transmit: bool):
-        """Turns the MOX on or off"""
-        if transmit:
-            self.utils.send_command(b"\x1C\x00", b"\x01")
-        else:
-            self.utils.send_command(b"\x1C\x00", b"\x00")
-
-    def set_lcd_brightness(self, level: int):
-        """Sets the LCD brightness, from 0 to 255"""
-        if not (0 <= level <= 255):
-            raise ValueError("Level must be between 0 and 255")
-        level_bytes = self.utils.encode_int_to_icom_bytes(level)
-        self.utils.send_command(b"\x1A\x05\x00\x81", data=level_bytes)
-
-    def set_display_font(self, round: bool = True):
-        """Set the display font"""
-        if round:
-            self.utils.send_command(b"\x1A\x05\x00\x83", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x00\x83", b"\x00")
-
-    def set_scope_mode_fixed(self, fixed_mode: bool = False):
-        """Sets the scope mode, True for Fixed, False for Center"""
-        if fixed_mode:
-            self.utils.send_command(b"\x27\x14", b"\x00\x01")
-        else:
-            self.utils.send_command(b"\x27\x14", b"\x00\x00")
-
-    def set_scope_enabled(self, enabled: bool) -> bool:
-        """
-        Set the Scope ON/OFF status
+    def read_scope_sweeps(self, max_pending: int = 4, use_numpy: Optional[bool] = None) -> ScopeStream:
         """
-        if enabled:
-            self.utils.send_command(b"\x27\x10", b"\x01")
-        else:
-            self.utils.send_command(b"\x27\x10", b"\x00")
-        return True
+        Read the scope sweeps sent continuously by the transceiver
+        Note, this only works if:
+        - Baudrate is set to 115200bps
+        - Scope Data Output is enabled (`set_scope_data_out(True)`)
+        - Scope is enabled
 
-    def set_scope_data_out(self, enabled: bool) -> bool:
-        """
-        Enables scope data output to the COM port
+        Args:
+            max_pending (int, optional): sweeps kept if the consumer is too slow, the oldest are dropped. Defaults to 4.
+            use_numpy (bool, optional): return the data as numpy arrays instead of array('B'). Defaults to True if numpy is installed.
+
+        Returns: an iterator over the ScopeSweep, with the decoded header and the data of all the divisions
         """
-        if enabled:
-            self.utils.send_command(b"\x27\x11", b"\x01")
-        else:
-            self.utils.send_command(b"\x27\x11", b"\x00")
-        return True
+        return ScopeStream(self.utils, max_pending, use_numpy)
 
     def set_scope_span(self, span_hz: int):
         """
@@ -476,68 +350,14 @@ class GenericDevice(DeviceBase):
         span_bytes += self.utils.encode_frequency(span_hz)
         self.utils.send_command(b"\x27\x15", data=span_bytes)
 
-    def set_scope_sweep_speed(self, speed: int):
-        """Sets the sweep speed of the scope, 0: fast, 1: mid, 2: slow"""
-        if speed in [0, 1, 2]:
-            data_bytes = b"\x00"
-            data_bytes += bytes([speed])
-            self.utils.send_command(b"\x27\x1A", data=data_bytes)
-        else:
-            raise ValueError("Invalid speed value, must be 0, 1, or 2")
-
     def memory_copy_to_vfo(self):
         """Copies memory to VFO"""
         self.utils.send_command(b"\x0A")
 
-    def set_display_image_type(self, blue_background: bool = True):
-        """Set display image type"""
-        if blue_background:
-            self.utils.send_command(b"\x1A\x05\x00\x82", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x00\x82", b"\x00")
-
     def clear_current_memory(self):
         """Clears the current memory"""
         self.utils.send_command(b"\x0B")
 
-    def set_nb_depth(self, depth: int) -> bool:
-        """
-        Sets the NB depth.
-
-        Args:
-            depth (int): The NB depth (1-10).
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-
-        Raises:
-            ValueError: If the depth is not within the valid range (1 to 10)
-        """
-        if not (1 <= depth <= 10):
-            raise ValueError("Depth must be between 1 and 10")
-        reply = self.utils.send_command(b"\x1a\x05\x01\x89", data=bytes([depth - 1]))
-        return len(reply) > 0
-
-    def set_nb_width(self, width: int) -> bool:
-        """
-        Sets the NB width.
-
-        Args:
-            width (int): The NB width (1-100).
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-
-        Raises:
-            ValueError: If the width is not within the valid range (1 to 100)
-        """
-        if not (0 <= width <= 100):
-            raise ValueError("Width must be between 0 and 100")
-        width = int(self.utils.convert_to_range(width, 0, 100, 0, 255))
-        width_bytes = self.utils.encode_int_to_icom_bytes(width)
-        reply = self.utils.send_command(b"\x1a\x05\x01\x90", data=width_bytes)
-        return len(reply) > 0
-
     def set_data_mode(self, enable: bool, filter: int = 1) -> bool:
         """
         Sets the data mode.
@@ -561,46 +381,6 @@ class GenericDevice(DeviceBase):
         reply = self.utils.send_command(b"\x1a\x06", data=bytes([value, filter]))
         return len(reply) > 0
 
-    def set_vox_delay(self, delay: int) -> bool:
-        """
-        Sets the VOX delay.
-
-        Args:
-            delay (int): The VOX delay in tenths of a second (0-20, representing 0.0 to 2.0 seconds).
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-
-        Raises:
-            ValueError: If the delay is not within the valid range (0 to 20).
-        """
-        if not (0 <= delay <= 20):
-            raise ValueError("Delay must be between 0 and 20")
-        reply = self.utils.send_command(b"\x1a\x05\x01\x91", data=bytes([delay]))
-        return len(reply) > 0
-
-    def set_vox_voice_delay(self, voice_delay: int) -> bool:
-        """
-        Sets the VOX voice delay.
-
-        Args:
-            voice_delay (int): The VOX voice delay.
-                0: OFF
-                1: Short
-                2: Mid.
-                3: Long
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-
-        Raises:
-            ValueError: If the value is not between 0 and 3
-        """
-        if not (0 <= voice_delay <= 3):
-            raise ValueError("Value must be between 0 and 3")
-        reply = self.utils.send_command(b"\x1a\x05\x01\x92", data=bytes([voice_delay]))
-        return len(reply) > 0
-
     def start_scan(self, scan_type: ScanMode = ScanMode.SELECT_DF_SPAN_100KHZ):
         """
         Starts scanning, different types available according to the sub command
@@ -614,13 +394,6 @@ class GenericDevice(DeviceBase):
         else:
             raise ValueError("Invalid scan type")
 
-    def set_scan_speed(self, high: bool):
-        """Sets the scan speed"""
-        if high:
-            self.utils.send_command(b"\x1A\x05\x01\x78", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x01\x78", b"\x00")
-
     def set_scope_reference_level(self, level: float):
         """Sets the scope reference level, range is -20.0 to +20.0 dB in 0.5 dB steps"""
         if not (-20.0 <= level <= 20.0):
@@ -638,20 +411,6 @@ class GenericDevice(DeviceBase):
 
         self.utils.send_command(b"\x27\x19", data=level_bytes)
 
-    def set_scope_vbw(self, wide: bool = True):
-        """Sets the scope VBW (Video Band Width), True for wide, false for narrow"""
-        if wide:
-            self.utils.send_command(b"\x27\x1D", b"\x00\x01")
-        else:
-            self.utils.send_command(b"\x27\x1D", b"\x00\x00")
-
-    def set_scope_waterfall_display(self, on: bool):
-        """Turns the waterfall display on or off for the scope"""
-        if on:
-            self.utils.send_command(b"\x1A\x05\x01\x07", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x01\x07", b"\x00")
-
     def sync_clock(self, utc: bool = False):
         """
         Synchronizes the radio's clock with the PC's time.
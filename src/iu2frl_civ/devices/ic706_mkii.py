@@ -2,6 +2,7 @@
 
 from ..device_base import DeviceBase
 from ..utils import Utils
+from ..transceive import RadioState
 from ..enums import OperatingMode, VFOOperation, TuningStep, DeviceType
 
 
@@ -21,14 +22,36 @@ class IC706MKII(DeviceBase):
         """
         Read the operating frequency
 
+        If the transceive listener is running, the frequency is taken from the state of the transceiver
+        without sending any command.
+
         Returns: the currently tuned frequency in Hz
         """
+        state = self.utils.state
+        if state.live and state.frequency is not None:
+            return state.frequency
         try:
             reply = self.utils.send_command(b"\x03")
             return self.utils.decode_frequency(reply[5:10])
         except:
             return -1
 
+    def start_transceive_listener(self) -> RadioState:
+        """
+        Start receiving the transceive broadcasts in the background
+
+        The transceiver sends the frequency and the mode when they are changed from the front panel
+        (CI-V Transceive must be enabled in the menu), so `read_operating_frequency` can be answered
+        without polling the transceiver.
+
+        Returns: the state of the transceiver, updated by the background reader
+        """
+        return self.utils.start_listener()
+
+    def stop_transceive_listener(self) -> None:
+        """Stop receiving the transceive broadcasts"""
+        self.utils.stop_listener()
+
     def read_operating_mode(self) -> OperatingMode:
         """
         Read the operating mode
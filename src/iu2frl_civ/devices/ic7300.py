@@ -3,21 +3,55 @@ Custom class to communicate with ICOM devices using CI-V protocol
 This class was built using the section 19 of the ICOM IC-7300 User Manual
 """
 
-from typing import Tuple
+from typing import Iterable, Optional, Tuple
 import logging
 import datetime
 import time
 
 from ..enums import OperatingMode, SelectedFilter, VFOOperation, ScanMode, DeviceType, ToneType
 from ..device_base import DeviceBase
+from ..commands import BYTE, INVERTED_SWITCH, STANDARD_COMMANDS, SWITCH, CommandSpec, command_table
 from ..utils import Utils
+from ..transceive import RadioState
+from ..meters import TxMeters, read_tx_meters
+from ..scope import ScopeStream
+from ..sweep import SweepResult, run_sweep
+from ..bcd import encode_bcd_big_endian
+from ..memories import MemorySnapshot, RestoreReport, read_snapshot, write_snapshot
 
 logger = logging.getLogger("iu2frl-civ")
 
 
+@command_table(
+    *STANDARD_COMMANDS,
+    CommandSpec(b"\x1a\x05\x00\x83", SWITCH, setter="set_display_font", parameter="round_font", default=True, doc="the display font (True for round)"),
+    CommandSpec(b"\x1a\x05\x00\x39", INVERTED_SWITCH, setter="set_speech_language", parameter="english", default=True, doc="the speech language (True for english, False for japanese)", untested=True),
+    CommandSpec(b"\x1a\x05\x00\x40", SWITCH, setter="set_speech_speed", parameter="high", default=True, doc="the speech speed (True for high)", untested=True),
+    CommandSpec(b"\x1a\x05\x00\x36", BYTE, setter="set_rtty_mark_frequency", parameter="frequency", value_range=(0, 2), doc="the RTTY mark frequency (0: 1275 Hz, 1: 1615 Hz, 2: 2125 Hz)", untested=True),
+    CommandSpec(b"\x1a\x05\x00\x37", BYTE, setter="set_rtty_shift_width", parameter="width", value_range=(0, 2), doc="the RTTY shift width (0: 170 Hz, 1: 200 Hz, 2: 425 Hz)", untested=True),
+    CommandSpec(b"\x1a\x05\x00\x38", SWITCH, setter="set_rtty_keying_polarity", parameter="reverse", default=False, doc="the RTTY keying polarity (True for reverse)", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x68", SWITCH, setter="set_rtty_decode_usos", parameter="on", default=False, doc="the RTTY decode USOS", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x69", SWITCH, setter="set_rtty_decode_newline_code", parameter="crlf", default=True, doc="the RTTY decode new line code (True for CR+LF)", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x70", SWITCH, setter="set_rtty_tx_usos", parameter="on", default=False, doc="the RTTY TX USOS", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x73", SWITCH, setter="set_rtty_log", parameter="on", default=False, doc="the RTTY log function", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x74", SWITCH, setter="set_rtty_log_file_format", parameter="html", default=False, doc="the file format of the RTTY log (True for HTML, False for text)", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x75", SWITCH, setter="set_rtty_log_time_stamp", parameter="on", default=False, doc="the RTTY log time stamp", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x76", INVERTED_SWITCH, setter="set_rtty_log_time_stamp_local", parameter="local", default=True, doc="the RTTY log time stamp (True for local, False for UTC)", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x77", SWITCH, setter="set_rtty_log_frequency_stamp", parameter="enable", doc="the RTTY log frequency stamp", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x80", SWITCH, setter="set_auto_monitor_voice_memory", parameter="enable", doc="the auto monitor when transmitting a recorded voice memory", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x81", BYTE, setter="set_repeat_interval_voice_memory", parameter="interval", value_range=(1, 15), doc="the repeat interval of the recorded voice audio (seconds)", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x82", INVERTED_SWITCH, setter="set_qso_recorder_mode", parameter="tx_rx", doc="the QSO recorder mode (True for TX & RX, False for RX only)", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x83", INVERTED_SWITCH, setter="set_qso_recorder_tx_audio", parameter="mic_audio", doc="the TX audio of the QSO recorder (True for microphone, False for TX monitor)", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x84", INVERTED_SWITCH, setter="set_qso_recorder_squelch_relation", parameter="always_record", doc="the squelch relation of the QSO recorder (True to always record, False for squelch auto)", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x85", SWITCH, setter="set_qso_record_file_split", parameter="enable", doc="the QSO record file split", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x86", SWITCH, setter="set_ptt_automatic_recording", parameter="enable", doc="the PTT automatic recording", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x87", BYTE, setter="set_ptt_automatic_recording_rx_audio", parameter="rx_audio_time", value_range=(0, 3), doc="the RX audio recorded by the PTT automatic recording (0: off, 1: 5 s, 2: 10 s, 3: 15 s)", untested=True),
+    CommandSpec(b"\x1a\x05\x01\x88", BYTE, setter="set_qso_play_skip_time", parameter="skip_time", value_range=(0, 3), doc="the QSO play skip time (0: 3 s, 1: 5 s, 2: 10 s, 3: 30 s)", untested=True),
+)
 class IC7300(DeviceBase):
     """Create a CI-V object to interact with a generic the radio transceiver"""
 
+    frequency_range = (10_000, 74_000_000)  # Frequencies accepted by send_operating_frequency, in Hz
     valid_rpt_tones = [67.0, 69.3, 71.9, 74.4, 77.0, 79.7, 82.5, 85.4, 88.5, 91.5, 94.8, 97.4, 100.0, 103.5, 107.2, 110.9, 114.8, 118.8, 123.0, 127.3, 131.8, 136.5, 141.3, 146.2, 151.4, 156.7, 162.2, 167.9, 173.8, 179.9, 186.2, 192.8, 203.5, 210.7, 218.1, 225.7, 233.6, 241.8, 250.3, 254.1]
     allowed_memory_Name_characters = [
         'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z',
@@ -78,14 +112,36 @@ class IC7300(DeviceBase):
         """
         Read the operating frequency
 
+        If the transceive listener is running, the frequency is taken from the state of the transceiver
+        without sending any command.
+
         Returns: the currently tuned frequency in Hz
         """
+        state = self.utils.state
+        if state.live and state.frequency is not None:
+            return state.frequency
         try:
             reply = self.utils.send_command(b"\x03")
             return self.utils.decode_frequency(reply[5:10])
         except:
             return -1
 
+    def start_transceive_listener(self) -> RadioState:
+        """
+        Start receiving the transceive broadcasts in the background
+
+        The transceiver sends the frequency and the mode when they are changed from the front panel
+        (CI-V Transceive must be enabled in the menu), so `read_operating_frequency` can be answered
+        without polling the transceiver.
+
+        Returns: the state of the transceiver, updated by the background reader
+        """
+        return self.utils.start_listener()
+
+    def stop_transceive_listener(self) -> None:
+        """Stop receiving the transceive broadcasts"""
+        self.utils.stop_listener()
+
     def read_operating_mode(self) -> Tuple[str, str]:
         """
         Read the operating mode
@@ -112,8 +168,9 @@ class IC7300(DeviceBase):
             frequency_hz = int(frequency_hz)
 
         # Validate input
-        if not (10_000 <= frequency_hz <= 74_000_000):  # IC-7300 frequency range in Hz
-            raise ValueError("Frequency must be between 10 kHz and 74 MHz")
+        minimum, maximum = self.frequency_range
+        if not (minimum <= frequency_hz <= maximum):
+            raise ValueError(f"Frequency must be between {minimum} Hz and {maximum} Hz")
         # Encode the frequency
         data = self.utils.encode_frequency(frequency_hz)
 
@@ -124,101 +181,25 @@ class IC7300(DeviceBase):
         else:
             return False
 
-    def read_af_volume(self) -> int:
-        """
-        Read the AF volume
-
-        Raw values from CI-V
-        0: min
-        255: max
-
-        Returns: The percentage of the volume being set
-        """
-        reply = self.utils.send_command(b"\x14\x01")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            return self.utils.convert_to_range(raw_value, 0, 255, 0, 100)
-        return -1
-
-    def read_rf_gain(self) -> int:
-        """
-        Read the RF gain
-
-        Raw values from CI-V
-        0: min
-        255: max
-
-        Returns: The percentage of the RF gain being set
-        """
-        reply = self.utils.send_command(b"\x14\x02")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            return self.utils.convert_to_range(raw_value, 0, 255, 0, 100)
-        return -1
-
-    def read_squelch_level(self) -> int:
+    def sweep(self, start_hz: int, stop_hz: int, step_hz: int, dwell_ms: float = 0) -> SweepResult:
         """
-        Read the squelch level
+        Step the frequency across a range and read the S-meter at each point
 
-        Raw values from CI-V
-        0: min
-        255: max
+        The commands are pipelined, so the acknowledge of each frequency is received while the receiver settles.
 
-        Returns: The percentage of the squelch being set
-        """
-        reply = self.utils.send_command(b"\x14\x03")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            return self.utils.convert_to_range(raw_value, 0, 255, 0, 100)
-        return -1
-
-    def read_nr_level(self) -> int:
-        """
-        Read the NR level
-
-        Raw values from CI-V
-        0: min
-        255: max
-
-        Returns: The percentage of the NR being set
-        """
-        reply = self.utils.send_command(b"\x14\x06")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            return self.utils.convert_to_range(raw_value, 0, 255, 0, 100)
-        return -1
-
-    def read_nb_level(self) -> float:
-        """
-        Read the NB level
-
-        Raw values from CI-V
-        0: min
-        255: max
-
-        Returns: The percentage of the NB being set
-        """
-        reply = self.utils.send_command(b"\x14\x12")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            return self.utils.convert_to_range(raw_value, 0, 255, 0, 100)
-        return -1
-
-    def read_smeter(self) -> int:
-        """
-        Read the S-meter value
-
-        0: min
-        255: max
+        Args:
+            start_hz (int): first frequency
+            stop_hz (int): last frequency (included if on the grid)
+            step_hz (int): distance between the points
+            dwell_ms (float, optional): time to wait after setting each frequency before reading the S-meter. Defaults to 0.
 
-        0000=S0, 0120=S9, 0241=S9+60dB
+        Returns: the frequencies and the raw S-meter readings (0000=S0, 0120=S9, 0241=S9+60dB, -1 if rejected)
 
-        TODO: test if properly working
+        Raises:
+            ValueError: if the range is not valid or outside the frequencies of the transceiver
+            CivTimeoutException: if the transceiver stopped answering
         """
-        reply = self.utils.send_command(b"\x15\x02")
-        if len(reply) == 9:
-            return self.utils.bytes_to_int(reply[6], reply[7])
-        return -1
+        return run_sweep(self.utils, start_hz, stop_hz, step_hz, dwell_ms, self.frequency_range)
 
     def read_squelch_status(self):
         """
@@ -252,12 +233,7 @@ class IC7300(DeviceBase):
         213: 100%
         """
         reply = self.utils.send_command(b"\x15\x11")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            # Known points (raw -> PO%)
-            points = [(0, 0), (143, 50), (213, 100)]
-            return self.utils.linear_interpolate(raw_value, points)
-        return -1
+        return self.utils.decode_meter_reply(reply, self.meter_calibration["po"])
 
     def read_swr_meter(self) -> float:
         """
@@ -268,12 +244,7 @@ class IC7300(DeviceBase):
         120: SWR3.0
         """
         reply = self.utils.send_command(b"\x15\x12")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            # Known points (raw -> SWR)
-            points = [(0, 1), (48, 1.5), (80, 2.0), (120, 3.0), (255, 99)]
-            return self.utils.linear_interpolate(raw_value, points)
-        return -1
+        return self.utils.decode_meter_reply(reply, self.meter_calibration["swr"])
 
     def read_alc_meter(self) -> float:
         """
@@ -282,12 +253,7 @@ class IC7300(DeviceBase):
         120: Max
         """
         reply = self.utils.send_command(b"\x15\x13")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            # Known points (raw -> ALC%)
-            points = [(0, 0), (120, 100)]
-            return self.utils.linear_interpolate(raw_value, points)
-        return -1
+        return self.utils.decode_meter_reply(reply, self.meter_calibration["alc"])
 
     def read_comp_meter(self) -> float:
         """
@@ -297,12 +263,7 @@ class IC7300(DeviceBase):
         241: 30 dB
         """
         reply = self.utils.send_command(b"\x15\x14")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            # Known points (raw -> dB)
-            points = [(0, 0), (130, 15), (241, 30)]
-            return self.utils.linear_interpolate(raw_value, points)
-        return -1
+        return self.utils.decode_meter_reply(reply, self.meter_calibration["comp"])
 
     def read_vd_meter(self) -> float:
         """
@@ -317,12 +278,7 @@ class IC7300(DeviceBase):
             float: The voltage in volts measured on the amplifier.
         """
         reply = self.utils.send_command(b"\x15\x15")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            # Known points (raw -> A)
-            points = [(0, 0), (13, 10), (241, 16)]
-            return self.utils.linear_interpolate(raw_value, points)
-        return -1.0  # Return -1 in case of error
+        return self.utils.decode_meter_reply(reply, self.meter_calibration["vd"])
 
     def read_id_meter(self) -> float:
         """
@@ -337,19 +293,19 @@ class IC7300(DeviceBase):
         Returns: the current in Ampere being mesured on the amplifier
         """
         reply = self.utils.send_command(b"\x15\x16")
-        if len(reply) == 9:
-            raw_value = self.utils.bytes_to_int(reply[6], reply[7])
-            # List of known points (from the manual - byte -> Ampere)
-            points = [(0, 0), (97, 10), (146, 15), (241, 25)]
-            return self.utils.linear_interpolate(raw_value, points)
-        return -1.0  # Return -1 in case of error
-
-    def read_mox_status(self) -> bool:
-        """Reads the MOX status, returns True if MOX is on"""
-        reply = self.utils.send_command(b"\x1C\x00")
-        if len(reply) == 8:
-            return bool(reply[6])
-        return False
+        return self.utils.decode_meter_reply(reply, self.meter_calibration["id"])
+
+    def read_tx_meters(self) -> TxMeters:
+        """
+        Read all the TX meters (PO, SWR, ALC, COMP, Vd and Id) at once.
+
+        The commands are sent back to back, without waiting for each reply.
+
+        Returns: the readings of the meters, -1 for the ones rejected or not answered
+
+        Raises: CivUnavailableException without sending the commands if the transceiver stopped answering
+        """
+        return read_tx_meters(self.utils, self.meter_calibration)
 
     def set_antenna_tuner(self, on: bool):
         """Turns the antenna tuner on or off."""
@@ -374,33 +330,6 @@ class IC7300(DeviceBase):
         message_bytes = message.encode("ascii")
         self.utils.send_command(b"\x17", data=message_bytes)
 
-    def set_ip_plus_function(self, enable: bool) -> bool:
-        """
-        Sets the IP+ function setting.
-
-        Args:
-            enable (bool): True to enable, False to disable.
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-        """
-        value = 1 if enable else 0
-        reply = self.utils.send_command(b"\x1a\x07", data=bytes([value]))
-        return len(reply) > 0
-
-    def set_mf_band_attenuator(self, enable: bool) -> bool:
-        """
-        Sets the MF band attenuator setting.
-
-        Args:
-            enable (bool): True to enable, False to disable.
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-        """
-        reply = self.utils.send_command(b"\x1a\x05\x01\x93", data=bytes([int(enable)]))
-        return len(reply) > 0
-
     def set_vfo_mode(self, vfo_mode: VFOOperation = VFOOperation.SELECT_VFO_A):
         """Sets the VFO mode."""
         if vfo_mode in VFOOperation:
@@ -426,53 +355,21 @@ class IC7300(DeviceBase):
         hex_list.append(f"0x{number_as_string[1]}{number_as_string[2]}")
         self.utils.send_command(b"\x08", data=bytes([int(hx, 16) for hx in hex_list]))
 
-    def set_mox(self, transmit: bool):
-        """Turns the MOX on or off"""
-        if transmit:
-            self.utils.send_command(b"\x1C\x00", b"\x01")
-        else:
-            self.utils.send_command(b"\x1C\x00", b"\x00")
-
-    def set_lcd_brightness(self, level: int):
-        """Sets the LCD brightness, from 0 to 255"""
-        if not (0 <= level <= 255):
-            raise ValueError("Level must be between 0 and 255")
-        level_bytes = self.utils.encode_int_to_icom_bytes(level)
-        self.utils.send_command(b"\x1A\x05\x00\x81", data=level_bytes)
-
-    def set_display_font(self, round_font: bool = True):
-        """Set the display font"""
-        if round_font:
-            self.utils.send_command(b"\x1A\x05\x00\x83", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x00\x83", b"\x00")
-
-    def set_scope_mode_fixed(self, fixed_mode: bool = False):
-        """Sets the scope mode, True for Fixed, False for Center"""
-        if fixed_mode:
-            self.utils.send_command(b"\x27\x14", b"\x00\x01")
-        else:
-            self.utils.send_command(b"\x27\x14", b"\x00\x00")
-
-    def set_scope_enabled(self, enabled: bool) -> bool:
-        """
-        Set the Scope ON/OFF status
+    def read_scope_sweeps(self, max_pending: int = 4, use_numpy: Optional[bool] = None) -> ScopeStream:
         """
-        if enabled:
-            self.utils.send_command(b"\x27\x10", b"\x01")
-        else:
-            self.utils.send_command(b"\x27\x10", b"\x00")
-        return True
+        Read the scope sweeps sent continuously by the transceiver
+        Note, this only works if:
+        - Baudrate is set to 115200bps
+        - Scope Data Output is enabled (`set_scope_data_out(True)`)
+        - Scope is enabled
 
-    def set_scope_data_out(self, enabled: bool) -> bool:
-        """
-        Enables scope data output to the COM port
+        Args:
+            max_pending (int, optional): sweeps kept if the consumer is too slow, the oldest are dropped. Defaults to 4.
+            use_numpy (bool, optional): return the data as numpy arrays instead of array('B'). Defaults to True if numpy is installed.
+
+        Returns: an iterator over the ScopeSweep, with the decoded header and the data of all the divisions
         """
-        if enabled:
-            self.utils.send_command(b"\x27\x11", b"\x01")
-        else:
-            self.utils.send_command(b"\x27\x11", b"\x00")
-        return True
+        return ScopeStream(self.utils, max_pending, use_numpy)
 
     def set_scope_span(self, span_hz: int):
         """
@@ -487,68 +384,14 @@ class IC7300(DeviceBase):
         span_bytes += self.utils.encode_frequency(span_hz)
         self.utils.send_command(b"\x27\x15", data=span_bytes)
 
-    def set_scope_sweep_speed(self, speed: int):
-        """Sets the sweep speed of the scope, 0: fast, 1: mid, 2: slow"""
-        if speed in [0, 1, 2]:
-            data_bytes = b"\x00"
-            data_bytes += bytes([speed])
-            self.utils.send_command(b"\x27\x1A", data=data_bytes)
-        else:
-            raise ValueError("Invalid speed value, must be 0, 1, or 2")
-
     def memory_copy_to_vfo(self):
         """Copies memory to VFO"""
         self.utils.send_command(b"\x0A")
 
-    def set_display_image_type(self, blue_background: bool = True):
-        """Set display image type"""
-        if blue_background:
-            self.utils.send_command(b"\x1A\x05\x00\x82", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x00\x82", b"\x00")
-
     def clear_current_memory(self):
         """Clears the current memory"""
         self.utils.send_command(b"\x0B")
 
-    def set_nb_depth(self, depth: int) -> bool:
-        """
-        Sets the NB depth.
-
-        Args:
-            depth (int): The NB depth (1-10).
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-
-        Raises:
-            ValueError: If the depth is not within the valid range (1 to 10)
-        """
-        if not (1 <= depth <= 10):
-            raise ValueError("Depth must be between 1 and 10")
-        reply = self.utils.send_command(b"\x1a\x05\x01\x89", data=bytes([depth - 1]))
-        return len(reply) > 0
-
-    def set_nb_width(self, width: int) -> bool:
-        """
-        Sets the NB width.
-
-        Args:
-            width (int): The NB width (1-100).
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-
-        Raises:
-            ValueError: If the width is not within the valid range (1 to 100)
-        """
-        if not (0 <= width <= 100):
-            raise ValueError("Width must be between 0 and 100")
-        width = int(self.utils.convert_to_range(width, 0, 100, 0, 255))
-        width_bytes = self.utils.encode_int_to_icom_bytes(width)
-        reply = self.utils.send_command(b"\x1a\x05\x01\x90", data=width_bytes)
-        return len(reply) > 0
-
     def set_data_mode(self, enable: bool, new_filter: int = 1) -> bool:
         """
         Sets the data mode.
@@ -572,46 +415,6 @@ class IC7300(DeviceBase):
         reply = self.utils.send_command(b"\x1a\x06", data=bytes([value, new_filter]))
         return len(reply) > 0
 
-    def set_vox_delay(self, delay: int) -> bool:
-        """
-        Sets the VOX delay.
-
-        Args:
-            delay (int): The VOX delay in tenths of a second (0-20, representing 0.0 to 2.0 seconds).
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-
-        Raises:
-            ValueError: If the delay is not within the valid range (0 to 20).
-        """
-        if not (0 <= delay <= 20):
-            raise ValueError("Delay must be between 0 and 20")
-        reply = self.utils.send_command(b"\x1a\x05\x01\x91", data=bytes([delay]))
-        return len(reply) > 0
-
-    def set_vox_voice_delay(self, voice_delay: int) -> bool:
-        """
-        Sets the VOX voice delay.
-
-        Args:
-            voice_delay (int): The VOX voice delay.
-                0: OFF
-                1: Short
-                2: Mid.
-                3: Long
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-
-        Raises:
-            ValueError: If the value is not between 0 and 3
-        """
-        if not (0 <= voice_delay <= 3):
-            raise ValueError("Value must be between 0 and 3")
-        reply = self.utils.send_command(b"\x1a\x05\x01\x92", data=bytes([voice_delay]))
-        return len(reply) > 0
-
     def start_scan(self, scan_type: ScanMode = ScanMode.SELECT_DF_SPAN_100KHZ):
         """
         Starts scanning, different types available according to the sub command
@@ -625,13 +428,6 @@ class IC7300(DeviceBase):
         else:
             raise ValueError("Invalid scan type")
 
-    def set_scan_speed(self, high: bool):
-        """Sets the scan speed"""
-        if high:
-            self.utils.send_command(b"\x1A\x05\x01\x78", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x01\x78", b"\x00")
-
     def set_scope_reference_level(self, level: float):
         """Sets the scope reference level, range is -20.0 to +20.0 dB in 0.5 dB steps"""
         if not (-20.0 <= level <= 20.0):
@@ -649,20 +445,6 @@ class IC7300(DeviceBase):
 
         self.utils.send_command(b"\x27\x19", data=level_bytes)
 
-    def set_scope_vbw(self, wide: bool = True):
-        """Sets the scope VBW (Video Band Width), True for wide, false for narrow"""
-        if wide:
-            self.utils.send_command(b"\x27\x1D", b"\x00\x01")
-        else:
-            self.utils.send_command(b"\x27\x1D", b"\x00\x00")
-
-    def set_scope_waterfall_display(self, on: bool):
-        """Turns the waterfall display on or off for the scope"""
-        if on:
-            self.utils.send_command(b"\x1A\x05\x01\x07", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x01\x07", b"\x00")
-
     def set_memory_keyer_message(self, channel: int, text: str) -> bool:
         """
         Sends a message to the radio transceiver's memory keyer.
@@ -737,11 +519,51 @@ class IC7300(DeviceBase):
         if not 1 <= memory_channel <= 99:
             raise ValueError("Memory channel must be between 1 and 99")
         
-        command_data = memory_channel.to_bytes(2, 'big') + b'\xFF' 
+        # The channel number is sent as BCD, like the memory dumps
+        command_data = encode_bcd_big_endian(memory_channel) + b'\xFF' 
         
         reply = self.utils.send_command(b'\x1a\x00', data=command_data)
         return len(reply) > 0
 
+    def dump_memories(self, channels: Iterable[int] = range(1, 100)) -> MemorySnapshot:
+        """
+        Read the content of the memory channels
+
+        The reading commands are pipelined, so the 99 channels are read in a fraction of the time.
+
+        Args:
+            channels (Iterable[int], optional): the channels to be read. Defaults to all the channels (1-99).
+
+        Returns: the content of the channels, None for the empty ones (can be saved to CSV or JSON)
+
+        Raises:
+            ValueError: If a channel is not between 1 and 99
+        """
+        channels = list(channels)
+        if not all(1 <= channel <= 99 for channel in channels):
+            raise ValueError("Memory channels must be between 1 and 99")
+        return read_snapshot(self.utils, channels)
+
+    def restore_memories(self, snapshot: MemorySnapshot) -> RestoreReport:
+        """
+        Write the memory channels of a snapshot
+
+        The current content of the channels is read first, and only the channels which differ are written.
+        The channels empty in the snapshot are cleared, the ones not in the snapshot are not touched.
+
+        Args:
+            snapshot (MemorySnapshot): the channels to be written, as returned by `dump_memories` or `MemorySnapshot.load`
+
+        Returns: the channels written and the ones left unchanged
+
+        Raises:
+            ValueError: If a channel is not between 1 and 99
+            CivCommandException: If the transceiver rejected some channels (the other ones are written anyway)
+        """
+        if not all(1 <= channel <= 99 for channel in snapshot.channels):
+            raise ValueError("Memory channels must be between 1 and 99")
+        return write_snapshot(self.utils, snapshot)
+
     def sync_clock(self, utc: bool = False):
         """
         Synchronizes the radio's clock with the PC's time.
@@ -827,22 +649,6 @@ class IC7300(DeviceBase):
         level_bytes = level.to_bytes(2, "little")
         self.utils.send_command(b"\x1A\x05\x00\x43", data=level_bytes)
 
-    def set_speech_language(self, english: bool = True):
-        """Sets the speech language, True for english, false for japanese"""
-        self.utils.logger.warning(("The method `set_speech_language` is not tested yet, please report any issues."))
-        if english:
-            self.utils.send_command(b"\x1A\x05\x00\x39", b"\x00")
-        else:
-            self.utils.send_command(b"\x1A\x05\x00\x39", b"\x01")
-
-    def set_speech_speed(self, high: bool = True):
-        """Sets the speech speed"""
-        self.utils.logger.warning(("The method `set_speech_speed` is not tested yet, please report any issues."))
-        if high:
-            self.utils.send_command(b"\x1A\x05\x00\x40", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x00\x40", b"\x00")
-
     def read_band_edge_frequencies(self):
         """
         Reads the band edge frequencies.
@@ -897,8 +703,8 @@ class IC7300(DeviceBase):
         if len(name) > 10:
             raise ValueError("Memory name must be 10 characters or less")
 
-        # Convert the memory channel to a byte array
-        channel_bytes = memory_channel.to_bytes(2, "big")
+        # Convert the memory channel to BCD
+        channel_bytes = encode_bcd_big_endian(memory_channel)
         # convert the string to bytes
         name_bytes = b""
 
@@ -913,254 +719,6 @@ class IC7300(DeviceBase):
 
         self.utils.send_command(b"\x1A\x00", data=data)
 
-    def set_rtty_mark_frequency(self, frequency: int):
-        """Sets the RTTY mark frequency, 0=1275 Hz, 1=1615 Hz, 2=2125 Hz"""
-        self.utils.logger.warning(("The method `set_rtty_mark_frequency` is not tested yet, please report any issues."))
-        if frequency not in [1, 2]:
-            raise ValueError("Invalid RTTY mark frequency")
-        self.utils.send_command(b"\x1A\x05\x00\x36", data=bytes([frequency]))
-
-    def set_rtty_shift_width(self, width: int):
-        """Sets the RTTY shift width, 0=170 Hz, 1=200 Hz, 2=425 Hz"""
-        self.utils.logger.warning(("The method `set_rtty_shift_width` is not tested yet, please report any issues."))
-        if width not in [1, 2]:
-            raise ValueError("Invalid RTTY shift width")
-        self.utils.send_command(b"\x1A\x05\x00\x37", data=bytes([width]))
-
-    def set_rtty_keying_polarity(self, reverse: bool = False):
-        """Sets the RTTY keying polarity, True for reverse, False for normal"""
-        self.utils.logger.warning(("The method `set_rtty_keying_polarity` is not tested yet, please report any issues."))
-        if reverse:
-            self.utils.send_command(b"\x1A\x05\x00\x38", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x00\x38", b"\x00")
-
-    def set_rtty_decode_usos(self, on: bool = False):
-        """Set RTTY decode USOS"""
-        self.utils.logger.warning(("The method `set_rtty_decode_usos` is not tested yet, please report any issues."))
-        if on:
-            self.utils.send_command(b"\x1A\x05\x01\x68", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x01\x68", b"\x00")
-
-    def set_rtty_decode_newline_code(self, crlf: bool = True):
-        """Set RTTY decode new line code"""
-        self.utils.logger.warning(("The method `set_rtty_decode_newline_code` is not tested yet, please report any issues."))
-        if crlf:
-            self.utils.send_command(b"\x1A\x05\x01\x69", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x01\x69", b"\x00")
-
-    def set_rtty_tx_usos(self, on: bool = False):
-        """Sets RTTY tx USOS"""
-        self.utils.logger.warning(("The method `set_rtty_tx_usos` is not tested yet, please report any issues."))
-        if on:
-            self.utils.send_command(b"\x1A\x05\x01\x70", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x01\x70", b"\x00")
-
-    def set_rtty_log(self, on: bool = False):
-        """Set RTTY log function"""
-        self.utils.logger.warning(("The method `set_rtty_log` is not tested yet, please report any issues."))
-        if on:
-            self.utils.send_command(b"\x1A\x05\x01\x73", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x01\x73", b"\x00")
-
-    def set_rtty_log_file_format(self, html: bool = False):
-        """Set the file format for the RTTY log, True for HTML, False for text"""
-        self.utils.logger.warning(("The method `set_rtty_log_file_format` is not tested yet, please report any issues."))
-        if html:
-            self.utils.send_command(b"\x1A\x05\x01\x74", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x01\x74", b"\x00")
-
-    def set_rtty_log_time_stamp(self, on: bool = False):
-        """Set RTTY time stamp"""
-        self.utils.logger.warning(("The method `set_rtty_log_time_stamp` is not tested yet, please report any issues."))
-        if on:
-            self.utils.send_command(b"\x1A\x05\x01\x75", b"\x01")
-        else:
-            self.utils.send_command(b"\x1A\x05\x01\x75", b"\x00")
-
-    def set_rtty_log_time_stamp_local(self, local: bool = True):
-        """Set the RTTY Log Time Stamp local or UTC"""
-        self.utils.logger.warning(("The method `set_rtty_log_time_stamp_local` is not tested yet, please report any issues."))
-        if local:
-            self.utils.send_command(b"\x1A\x05\x01\x76", b"\x00")
-        else:
-            self.utils.send_command(b"\x1A\x05\x01\x76", b"\x01")
-
-    def set_rtty_log_frequency_stamp(self, enable: bool) -> bool:
-        """
-        Sets the RTTY frequency stamp.
-
-        Args:
-            enable (bool): True to enable, False to disable.
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-        """
-        self.utils.logger.warning(("The method `set_rtty_log_frequency_stamp` is not tested yet, please report any issues."))
-        value = 1 if enable else 0
-        reply = self.utils.send_command(b"\x1a\x05\x01\x77", data=bytes([value]))
-        return len(reply) > 0
-
-    def set_auto_monitor_voice_memory(self, enable: bool) -> bool:
-        """
-        Sets the auto monitor function when transmitting a recorded voice memory.
-
-        Args:
-            enable (bool): True to enable, False to disable.
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-        """
-        self.utils.logger.warning(("The method `set_auto_monitor_voice_memory` is not tested yet, please report any issues."))
-        value = 1 if enable else 0
-        reply = self.utils.send_command(b"\x1a\x05\x01\x80", data=bytes([value]))
-        return len(reply) > 0
-
-    def set_repeat_interval_voice_memory(self, interval: int) -> bool:
-        """
-        Sets the repeat interval to transmit recorded voice audio.
-
-        Args:
-            interval (int): Repeat interval in seconds (1-15).
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-
-        Raises:
-            ValueError: If the interval is not within the valid range (1 to 15)
-        """
-        self.utils.logger.warning(("The method `set_repeat_interval_voice_memory` is not tested yet, please report any issues."))
-        if not (1 <= interval <= 15):
-            raise ValueError("Interval must be between 1 and 15 seconds")
-        reply = self.utils.send_command(b"\x1a\x05\x01\x81", data=bytes([interval]))
-        return len(reply) > 0
-
-    def set_qso_recorder_mode(self, tx_rx: bool) -> bool:
-        """
-        Sets the recording mode for QSO recorder (TX&RX or RX Only).
-
-        Args:
-            tx_rx (bool): True for TX & RX, False for RX only.
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-        """
-        self.utils.logger.warning(("The method `set_qso_recorder_mode` is not tested yet, please report any issues."))
-        value = 0 if tx_rx else 1
-        reply = self.utils.send_command(b"\x1a\x05\x01\x82", data=bytes([value]))
-        return len(reply) > 0
-
-    def set_qso_recorder_tx_audio(self, mic_audio: bool) -> bool:
-        """
-        Sets the recording TX audio source for QSO recorder (Microphone audio or TX monitor audio).
-
-        Args:
-            mic_audio (bool): True for Microphone audio, False for TX monitor audio.
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-        """
-        self.utils.logger.warning(("The method `set_qso_recorder_tx_audio` is not tested yet, please report any issues."))
-        value = 0 if mic_audio else 1
-        reply = self.utils.send_command(b"\x1a\x05\x01\x83", data=bytes([value]))
-        return len(reply) > 0
-
-    def set_qso_recorder_squelch_relation(self, always_record: bool) -> bool:
-        """
-        Sets the squelch relation to recording RX audio for QSO recorder.
-
-        Args:
-            always_record (bool): True to always record, False for Squelch Auto.
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-        """
-        self.utils.logger.warning(("The method `set_qso_recorder_squelch_relation` is not tested yet, please report any issues."))
-        value = 0 if always_record else 1
-        reply = self.utils.send_command(b"\x1a\x05\x01\x84", data=bytes([value]))
-        return len(reply) > 0
-
-    def set_qso_record_file_split(self, enable: bool) -> bool:
-        """
-        Sets the QSO record file split function.
-
-        Args:
-            enable (bool): True to enable, False to disable.
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-        """
-        self.utils.logger.warning(("The method `set_qso_record_file_split` is not tested yet, please report any issues."))
-        value = 1 if enable else 0
-        reply = self.utils.send_command(b"\x1a\x05\x01\x85", data=bytes([value]))
-        return len(reply) > 0
-
-    def set_ptt_automatic_recording(self, enable: bool) -> bool:
-        """
-        Sets the PTT automatic recording function.
-
-        Args:
-            enable (bool): True to enable, False to disable.
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-        """
-        self.utils.logger.warning(("The method `set_ptt_automatic_recording` is not tested yet, please report any issues."))
-        value = 1 if enable else 0
-        reply = self.utils.send_command(b"\x1a\x05\x01\x86", data=bytes([value]))
-        return len(reply) > 0
-
-    def set_ptt_automatic_recording_rx_audio(self, rx_audio_time: int) -> bool:
-        """
-        Sets the RX audio recording status for PTT Automatic Recording function.
-
-         Args:
-             rx_audio_time (int): The RX audio recording time.
-             0: OFF (records no RX audio)
-             1: Records the RX audio just before 5 sec.
-             2: Records the RX audio just before 10 sec.
-             3: Records the RX audio just before 15 sec.
-
-         Returns:
-             bool: True if the command was successful, False otherwise.
-
-         Raises:
-            ValueError: If the value is not between 0 and 3
-        """
-        self.utils.logger.warning(("The method `set_ptt_automatic_recording_rx_audio` is not tested yet, please report any issues."))
-        if not (0 <= rx_audio_time <= 3):
-            raise ValueError("Value must be between 0 and 3")
-        reply = self.utils.send_command(b"\x1a\x05\x01\x87", data=bytes([rx_audio_time]))
-        return len(reply) > 0
-
-    def set_qso_play_skip_time(self, skip_time: int) -> bool:
-        """
-         Sets the QSO Play skip time
-
-         Args:
-             skip_time (int): The skip time in seconds
-                0: 3 sec.
-                1: 5 sec.
-                2: 10 sec.
-                3: 30 sec.
-
-        Returns:
-            bool: True if the command was successful, False otherwise.
-
-        Raises:
-             ValueError: If the skip time is not within the valid range
-        """
-        self.utils.logger.warning(("The method `set_qso_play_skip_time` is not tested yet, please report any issues."))
-        if not (0 <= skip_time <= 3):
-            raise ValueError("Value must be between 0 and 3")
-        reply = self.utils.send_command(b"\x1a\x05\x01\x88", data=bytes([skip_time]))
-        return len(reply) > 0
-
     def set_memory(
         self,
         memory_channel: int,
@@ -1207,9 +765,6 @@ class IC7300(DeviceBase):
         if not 1 <= memory_channel <= 99:
             raise ValueError("Memory channel must be between 1 and 99")
 
-        # Format memory channel
-        memory_channel_str = f"{memory_channel:04d}" #aggiunge zeri iniziali
-
         # Validate frequency
         if not 10_000_000 <= frequency_hz <= 74_800_000:
             raise ValueError("Frequency must be between 10,000,000 and 74,800,000 Hz")
@@ -1258,8 +813,7 @@ class IC7300(DeviceBase):
 
         # Format the full command data
         command_data = (
-            bytes([int(memory_channel_str[0:2])])
-            + bytes([int(memory_channel_str[2:4])])
+            encode_bcd_big_endian(memory_channel) # channel as BCD, like the memory dumps
             + bytes([memory_setting]) # star
             + frequency_bytes
             + mode_byte
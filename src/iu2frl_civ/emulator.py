@@ -0,0 +1,533 @@
+"""Emulation of an ICOM transceiver, answering the CI-V commands like the real one"""
+
+import datetime
+import random
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from .bcd import BCD_TO_INT, decode_bcd, encode_bcd
+from .enums import DeviceType
+
+OK_REPLY = b"\xfb"  # Command accepted
+NG_REPLY = b"\xfa"  # Command rejected
+BROADCAST_ADDRESS = 0x00  # Transceive broadcasts are sent to all the controllers
+
+
+class EmulatorProfile(NamedTuple):
+    """Characteristics of an emulated transceiver model"""
+
+    name: str  # Model name
+    address: int  # Default CI-V address
+    frequency_ranges: Tuple[Tuple[int, int], ...]  # Tunable ranges in Hz
+    frequency: int  # Frequency at power on (Hz)
+    frequency_bytes: int = 5  # Length of the BCD frequency in the replies
+    memories: int = 101  # Number of memory channels (1-99, plus the program scan edges P1 and P2)
+    acknowledges: bool = True  # Replies OK/NG to the commands setting a value (the oldest models do not)
+
+
+PROFILES: Dict[DeviceType, EmulatorProfile] = {
+    DeviceType.Generic: EmulatorProfile("Generic", 0x94, ((10_000, 74_000_000),), 14_074_000),
+    DeviceType.IC_706_MK2: EmulatorProfile("IC-706MKIIG", 0x58, ((30_000, 200_000_000), (400_000_000, 470_000_000)), 14_074_000),
+    DeviceType.IC_7300: EmulatorProfile("IC-7300", 0x94, ((30_000, 74_800_000),), 14_074_000),
+    DeviceType.IC_821_H: EmulatorProfile("IC-821H", 0x4C, ((144_000_000, 146_000_000), (430_000_000, 440_000_000)), 144_300_000, acknowledges=False),
+    DeviceType.IC_9700: EmulatorProfile(
+        "IC-9700", 0xA2, ((144_000_000, 148_000_000), (430_000_000, 450_000_000), (1_240_000_000, 1_300_000_000)), 144_300_000, frequency_bytes=5
+    ),
+}
+
+# Length of the subcommand following each command byte (0x1A 0x05 has 2 more bytes, handled apart)
+SUBCOMMAND_LENGTH = {0x0E: 0, 0x14: 1, 0x15: 1, 0x16: 1, 0x18: 1, 0x19: 1, 0x1A: 1, 0x1B: 1, 0x1C: 1, 0x1E: 1, 0x21: 1, 0x25: 1, 0x26: 1, 0x27: 1}
+
+# Scope settings followed by the selection of the main (0x00) or sub (0x01) scope
+SCOPE_SELECTOR_SUBCOMMANDS = (0x14, 0x15, 0x16, 0x17, 0x19, 0x1A, 0x1B, 0x1C, 0x1D)
+
+# Values returned by the settings which were never written
+DEFAULT_VALUES = {
+    b"\x0c": b"\x00\x00\x00",  # Offset frequency
+    b"\x0f": b"\x00",  # Split off
+    b"\x10": b"\x00",  # Tuning step
+    b"\x11": b"\x00",  # Attenuator off
+    b"\x15\x01": b"\x00",  # Squelch closed
+    b"\x15\x02": b"\x01\x20",  # S-meter: S9
+    b"\x15\x05": b"\x00",  # Squelch (tone/DTCS) closed
+    b"\x15\x11": b"\x00\x00",  # PO
+    b"\x15\x12": b"\x00\x00",  # SWR
+    b"\x15\x13": b"\x00\x00",  # ALC
+    b"\x15\x14": b"\x00\x00",  # COMP
+    b"\x15\x15": b"\x01\x57",  # Vd: 13.8 V
+    b"\x15\x16": b"\x00\x00",  # Id
+    b"\x1c\x00": b"\x00",  # Receiving
+    b"\x1c\x01": b"\x00",  # Tuner off
+    b"\x21\x00": b"\x00\x00\x00",  # RIT frequency
+    b"\x21\x01": b"\x00",  # RIT off
+}
+
+# Meters while transmitting
+TX_METER_VALUES = {
+    b"\x15\x02": b"\x00\x00",  # S-meter
+    b"\x15\x11": b"\x02\x13",  # PO: 100%
+    b"\x15\x12": b"\x00\x48",  # SWR: 1.5
+    b"\x15\x13": b"\x00\x60",  # ALC
+    b"\x15\x16": b"\x01\x46",  # Id: 15 A
+}
+
+# Default value by command, for the settings not listed above
+DEFAULT_FAMILY_VALUES = {0x14: b"\x01\x28", 0x16: b"\x00", 0x1A: b"\x00", 0x1C: b"\x00", 0x27: b"\x00"}
+
+
+class VfoState:
+    """Frequency, mode and filter of a VFO"""
+
+    __slots__ = ("frequency", "mode", "filter")
+
+    def __init__(self, frequency: int, mode: int = 1, filter: int = 1):  # pylint: disable=redefined-builtin
+        self.frequency = frequency
+        self.mode = mode
+        self.filter = filter
+
+    def copy(self) -> "VfoState":
+        """Copy the VFO (to equalize VFO A and B)"""
+        return VfoState(self.frequency, self.mode, self.filter)
+
+
+class RadioEmulator:
+    """
+    Stateful emulation of an ICOM transceiver
+
+    The emulator parses the CI-V frames sent by the controller and keeps the state of the
+    transceiver (VFO A/B, mode, filter, split, levels, settings, memories, clock), replying
+    with the same frames the real transceiver would send. Settings which are not emulated
+    explicitly are stored as they are written, and read back with the same bytes.
+
+    Example:
+        >>> emulator = RadioEmulator.for_device(DeviceType.IC_7300)
+        >>> emulator.handle(b"\\xfe\\xfe\\x94\\xe0\\x03\\xfd")
+        [b'\\xfe\\xfe\\xe0\\x94\\x03\\x00\\x40\\x07\\x14\\x00\\xfd']
+    """
+
+    profile: EmulatorProfile  # Emulated model
+    address: int  # CI-V address of the transceiver
+    powered: bool  # Power status, the transceiver only answers the power on command when off
+    transceive: bool  # Broadcast the changes made from the front panel
+    vfos: List[VfoState]  # VFO A and VFO B
+    selected: int  # Index of the selected VFO
+    memory_mode: bool  # True if working on a memory channel
+    memory_channel: int  # Selected memory channel
+    split: bool  # Split status
+    transmitting: bool  # TX status
+    settings: Dict[bytes, bytes]  # Value of the settings by command and subcommand
+    memories: Dict[int, bytes]  # Content of the memory channels (after the channel number)
+    keyer: Dict[int, bytes]  # Content of the memory keyer channels
+    clock_offset: float  # Difference between the emulated clock and the system clock (seconds)
+    signals: Dict[int, int]  # Raw S-meter reading (0-255) of the signals received, by frequency in Hz
+
+    def __init__(self, profile: EmulatorProfile = PROFILES[DeviceType.Generic], address: Optional[int] = None):
+        self.profile = profile
+        self.address = profile.address if address is None else address
+        self.powered = True
+        self.transceive = True
+        self.vfos = [VfoState(profile.frequency), VfoState(profile.frequency)]
+        self.selected = 0
+        self.memory_mode = False
+        self.memory_channel = 1
+        self.split = False
+        self.transmitting = False
+        self.settings = {}
+        self.memories = {}
+        self.keyer = {}
+        self.clock_offset = 0.0
+        self.signals = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_device(cls, device_type: DeviceType, address: Optional[int] = None) -> "RadioEmulator":
+        """Create the emulator of a transceiver model"""
+        return cls(PROFILES.get(device_type, PROFILES[DeviceType.Generic]), address)
+
+    @property
+    def vfo(self) -> VfoState:
+        """The selected VFO"""
+        return self.vfos[self.selected]
+
+    def handle(self, frame: bytes) -> List[bytes]:
+        """
+        Process a frame received from the controller
+
+        Returns: the frames sent by the transceiver in reply (none if the frame is not for it)
+        """
+        if len(frame) < 6 or frame[-1] != 0xFD:
+            return []
+        start = frame.rfind(b"\xfe\xfe", 0, len(frame) - 1)
+        if start < 0 or len(frame) - start < 6:
+            return []
+        target, controller = frame[start + 2], frame[start + 3]
+        if target not in (self.address, BROADCAST_ADDRESS):
+            return []
+        body = frame[start + 4 : -1]
+        with self._lock:
+            if not self.powered and body != b"\x18\x01":
+                # Only the power on command is received when the transceiver is off
+                return []
+            try:
+                reply = self._execute(body)
+            except ValueError:
+                # Data which is not BCD (like a binary channel number) is rejected
+                reply = self._ack(False)
+        if reply is None:
+            return []
+        # The reply comes from the address the command was sent to, so 0x00 works as well
+        return [b"\xfe\xfe" + bytes([controller, target]) + reply + b"\xfd"]
+
+    def tune(self, frequency_hz: int) -> List[bytes]:
+        """
+        Change the frequency from the front panel
+
+        Returns: the transceive broadcast, if enabled
+        """
+        with self._lock:
+            self.vfo.frequency = frequency_hz
+        return self._broadcast(b"\x00" + encode_bcd(frequency_hz, self.profile.frequency_bytes))
+
+    def change_mode(self, mode: int, filter: int = 1) -> List[bytes]:  # pylint: disable=redefined-builtin
+        """
+        Change the mode from the front panel
+
+        Returns: the transceive broadcast, if enabled
+        """
+        with self._lock:
+            self.vfo.mode = mode
+            self.vfo.filter = filter
+        return self._broadcast(bytes([0x01, mode, filter]))
+
+    def _broadcast(self, body: bytes) -> List[bytes]:
+        """Build a transceive broadcast"""
+        if not self.transceive or not self.powered:
+            return []
+        return [b"\xfe\xfe" + bytes([BROADCAST_ADDRESS, self.address]) + body + b"\xfd"]
+
+    def _ack(self, ok: bool = True) -> Optional[bytes]:
+        """Reply to a command setting a value"""
+        if not self.profile.acknowledges:
+            return None
+        return OK_REPLY if ok else NG_REPLY
+
+    def _valid_frequency(self, frequency: int) -> bool:
+        """True if the frequency is within the ranges of the model"""
+        return any(low <= frequency <= high for low, high in self.profile.frequency_ranges)
+
+    def _execute(self, body: bytes) -> Optional[bytes]:
+        """Execute a command and build the body of the reply (None if there is no reply)"""
+        command = body[0]
+        data = body[1:]
+        if command in (0x00, 0x05):
+            # Set the frequency (0x00 is the transceive version, without reply)
+            if not 4 <= len(data) <= 6 or not self._valid_frequency(decode_bcd(data)):
+                return None if command == 0x00 else self._ack(False)
+            self.vfo.frequency = decode_bcd(data)
+            return None if command == 0x00 else self._ack()
+        if command in (0x01, 0x06):
+            # Set the mode and the filter
+            if not 1 <= len(data) <= 2:
+                return None if command == 0x01 else self._ack(False)
+            self.vfo.mode = BCD_TO_INT[data[0]]
+            self.vfo.filter = BCD_TO_INT[data[1]] if len(data) == 2 else 1
+            return None if command == 0x01 else self._ack()
+        if command == 0x02:
+            low, high = self.profile.frequency_ranges[0]
+            return b"\x02" + encode_bcd(low, 5) + b"\x2d" + encode_bcd(high, 5)
+        if command == 0x03:
+            return b"\x03" + encode_bcd(self.vfo.frequency, self.profile.frequency_bytes)
+        if command == 0x04:
+            return bytes([0x04, self.vfo.mode, self.vfo.filter])
+        if command == 0x07:
+            return self._vfo_operation(data)
+        if command == 0x08:
+            if data:
+                channel = decode_bcd(data[::-1])
+                if not 1 <= channel <= self.profile.memories:
+                    return self._ack(False)
+                self.memory_channel = channel
+            self.memory_mode = True
+            return self._ack()
+        if command == 0x09:
+            # VFO to memory
+            self.memories[self.memory_channel] = self._memory_from_vfo()
+            return self._ack()
+        if command == 0x0A:
+            # Memory to VFO
+            content = self.memories.get(self.memory_channel)
+            if content is None:
+                # Blank channel, nothing to copy
+                return self._ack()
+            self.vfo.frequency = decode_bcd(content[1:6])
+            self.vfo.mode, self.vfo.filter = content[6], content[7]
+            return self._ack()
+        if command == 0x0B:
+            self.memories.pop(self.memory_channel, None)
+            return self._ack()
+        if command == 0x0F and len(data) == 1 and data[0] in (0x00, 0x01):
+            self.split = bool(data[0])
+            self.settings[b"\x0f"] = bytes(data)
+            return self._ack()
+        if command == 0x18 and len(data) == 1:
+            self.powered = data[0] == 0x01
+            return self._ack()
+        if command == 0x19:
+            return b"\x19\x00" + bytes([self.address])
+        if command == 0x1A and data[:1] == b"\x00":
+            return self._memory_contents(data[1:])
+        if command == 0x1A and data[:1] == b"\x02":
+            return self._memory_keyer(data[1:])
+        if command == 0x1A and data[:1] == b"\x05" and data[1:3] in (b"\x00\x94", b"\x00\x95"):
+            return self._clock(data[2], data[3:])
+        if command in (0x25, 0x26) and data[:1] in (b"\x00", b"\x01"):
+            return self._other_vfo(command, data[0], data[1:])
+        if command == 0x1C and data[:1] == b"\x00" and len(data) == 2:
+            self.transmitting = bool(data[1])
+        return self._setting(body)
+
+    def _other_vfo(self, command: int, unselected: int, data: bytes) -> Optional[bytes]:
+        """Read or write the frequency (0x25) or the mode (0x26) of the selected or unselected VFO"""
+        vfo = self.vfos[self.selected ^ unselected]
+        if command == 0x25:
+            if not data:
+                return bytes([0x25, unselected]) + encode_bcd(vfo.frequency, self.profile.frequency_bytes)
+            if not self._valid_frequency(decode_bcd(data)):
+                return self._ack(False)
+            vfo.frequency = decode_bcd(data)
+            return self._ack()
+        if not data:
+            return bytes([0x26, unselected, vfo.mode, 0x00, vfo.filter])
+        vfo.mode = BCD_TO_INT[data[0]]
+        if len(data) >= 3:
+            vfo.filter = BCD_TO_INT[data[2]]
+        return self._ack()
+
+    def _vfo_operation(self, data: bytes) -> Optional[bytes]:
+        """Execute a VFO operation (0x07)"""
+        if data == b"\x00" or data == b"\xd0":
+            self.selected = 0
+        elif data == b"\x01" or data == b"\xd1":
+            self.selected = 1
+        elif data == b"\xa0":
+            self.vfos[1 - self.selected] = self.vfo.copy()
+        elif data == b"\xb0":
+            self.vfos.reverse()
+        elif data:
+            return self._ack(False)
+        self.memory_mode = False
+        return self._ack()
+
+    def _memory_from_vfo(self) -> bytes:
+        """Memory contents storing the selected VFO (without name and tones)"""
+        vfo = self.vfo
+        return b"\x00" + encode_bcd(vfo.frequency, 5) + bytes([vfo.mode, vfo.filter, 0x00]) + b"\x00\x08\x85" * 2 + b" " * 10
+
+    def _memory_contents(self, data: bytes) -> Optional[bytes]:
+        """Read or write a memory channel (0x1A 0x00)"""
+        if len(data) < 2:
+            return self._ack(False)
+        channel = decode_bcd(data[1::-1])
+        if not 1 <= channel <= self.profile.memories:
+            return self._ack(False)
+        content = data[2:]
+        if not content:
+            # Read, blank channels only contain 0xFF
+            return b"\x1a\x00" + data[:2] + self.memories.get(channel, b"\xff")
+        if content == b"\xff":
+            self.memories.pop(channel, None)
+        else:
+            self.memories[channel] = bytes(content)
+        return self._ack()
+
+    def _memory_keyer(self, data: bytes) -> Optional[bytes]:
+        """Read or write a memory keyer channel (0x1A 0x02)"""
+        if not data or not 1 <= data[0] <= 8:
+            return self._ack(False)
+        if len(data) == 1:
+            return b"\x1a\x02" + data[:1] + self.keyer.get(data[0], b"")
+        self.keyer[data[0]] = bytes(data[1:])
+        return self._ack()
+
+    def _clock(self, item: int, data: bytes) -> Optional[bytes]:
+        """Read or write the date (0x1A 0x05 0x00 0x94) or the time (0x1A 0x05 0x00 0x95)"""
+        now = datetime.datetime.now() + datetime.timedelta(seconds=self.clock_offset)
+        prefix = b"\x1a\x05\x00" + bytes([item])
+        if not data:
+            if item == 0x94:
+                return prefix + encode_bcd(now.year * 10000 + now.month * 100 + now.day, 4)[::-1]
+            return prefix + encode_bcd(now.hour * 100 + now.minute, 2)[::-1]
+        digits = "".join(f"{byte:02X}" for byte in data)
+        try:
+            if item == 0x94:
+                target = now.replace(year=int(digits[0:4]), month=int(digits[4:6]), day=int(digits[6:8]))
+            else:
+                target = now.replace(hour=int(digits[0:2]), minute=int(digits[2:4]), second=0)
+        except ValueError:
+            return self._ack(False)
+        self.clock_offset += (target - now).total_seconds()
+        return self._ack()
+
+    def _setting(self, body: bytes) -> Optional[bytes]:
+        """Read or write a setting which is only stored (levels, functions, menu items, scope)"""
+        command = body[0]
+        if command == 0x1A and body[1:2] == b"\x05":
+            length = 4
+        elif command == 0x27 and len(body) > 1 and body[1] in SCOPE_SELECTOR_SUBCOMMANDS:
+            length = 3
+        else:
+            length = 1 + SUBCOMMAND_LENGTH.get(command, 0)
+        if len(body) < length:
+            return self._ack(False)
+        key = bytes(body[:length])
+        value = body[length:]
+        if value:
+            if command == 0x15:
+                # The meters cannot be written
+                return self._ack(False)
+            self.settings[key] = bytes(value)
+            return self._ack()
+        if key == b"\x15\x02" and not self.transmitting and self.vfo.frequency in self.signals:
+            # Signal received on the frequency, above the noise floor
+            return key + encode_bcd(self.signals[self.vfo.frequency], 2)[::-1]
+        stored = self.settings.get(key)
+        if stored is None and self.transmitting:
+            stored = TX_METER_VALUES.get(key)
+        if stored is None:
+            stored = DEFAULT_VALUES.get(key, DEFAULT_FAMILY_VALUES.get(command))
+        if stored is None:
+            # Commands without a value to read (scan, speech, CW...) are accepted
+            return self._ack()
+        return key + stored
+
+
+class EmulatedSerial:
+    """
+    Serial port connected to a RadioEmulator
+
+    Implements the subset of `serial.Serial` used by the library. The replies are delivered
+    after a configurable latency, the frames sent can be echoed back (like on the CI-V bus)
+    and errors can be injected at random to test the error handling.
+
+    Args:
+        emulator (RadioEmulator): the emulated transceiver
+        latency (float, optional): delay of the replies in seconds. Defaults to 0.
+        jitter (float, optional): random delay added to the latency in seconds. Defaults to 0.
+        echo (bool, optional): echo the frames sent, like the CI-V bus. Defaults to False (like the USB port).
+        drop_rate (float, optional): probability of a reply being lost. Defaults to 0.
+        ng_rate (float, optional): probability of a reply being replaced by NG. Defaults to 0.
+        corrupt_rate (float, optional): probability of a reply being corrupted by a collision (jam code). Defaults to 0.
+        seed (int, optional): seed of the random generator of the errors.
+    """
+
+    name: str  # Name of the port
+    port: str  # Name of the port
+    baudrate: int  # Baudrate (not emulated)
+    timeout: Optional[float]  # Read timeout in seconds
+    emulator: RadioEmulator  # Emulated transceiver
+    _frames: Deque[Tuple[float, bytes]]  # Frames to be received, with the time they are available
+
+    def __init__(
+        self,
+        emulator: RadioEmulator,
+        port: str = "emulator",
+        baudrate: int = 19200,
+        timeout: Optional[float] = 1,
+        latency: float = 0,
+        jitter: float = 0,
+        echo: bool = False,
+        drop_rate: float = 0,
+        ng_rate: float = 0,
+        corrupt_rate: float = 0,
+        seed: Optional[int] = None,
+    ):
+        self.emulator = emulator
+        self.name = self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.latency = latency
+        self.jitter = jitter
+        self.echo = echo
+        self.drop_rate = drop_rate
+        self.ng_rate = ng_rate
+        self.corrupt_rate = corrupt_rate
+        self.rts = False
+        self.dtr = False
+        self._random = random.Random(seed)
+        self._frames = deque()
+        self._condition = threading.Condition()
+
+    @property
+    def in_waiting(self) -> int:
+        """Number of bytes available to be read"""
+        now = time.monotonic()
+        with self._condition:
+            return sum(len(frame) for ready, frame in self._frames if ready <= now)
+
+    def write(self, data: bytes) -> int:
+        """Send data to the emulated transceiver"""
+        data = bytes(data)
+        now = time.monotonic()
+        frames = []
+        if self.echo:
+            frames.append((now, data))
+        for frame in data.split(b"\xfd")[:-1]:
+            for reply in self.emulator.handle(frame + b"\xfd"):
+                reply = self._inject_errors(reply)
+                if reply is not None:
+                    frames.append((now + self.latency + self._random.uniform(0, self.jitter), reply))
+        self.push(frames)
+        return len(data)
+
+    def push(self, frames: List[Tuple[float, bytes]]) -> None:
+        """Queue frames to be received (with the time they are available)"""
+        if not frames:
+            return
+        with self._condition:
+            self._frames.extend(frames)
+            self._condition.notify_all()
+
+    def tune(self, frequency_hz: int) -> None:
+        """Change the frequency from the front panel of the emulated transceiver"""
+        now = time.monotonic()
+        self.push([(now, frame) for frame in self.emulator.tune(frequency_hz)])
+
+    def _inject_errors(self, reply: bytes) -> Optional[bytes]:
+        """Apply the configured errors to a reply (None if it is lost)"""
+        if self.drop_rate and self._random.random() < self.drop_rate:
+            return None
+        if self.ng_rate and self._random.random() < self.ng_rate:
+            return reply[:4] + NG_REPLY + b"\xfd"
+        if self.corrupt_rate and self._random.random() < self.corrupt_rate:
+            return reply[:4] + b"\xfc\xfc\xfc\xfd"
+        return reply
+
+    def read_until(self, expected: bytes = b"\xfd", size: Optional[int] = None) -> bytes:
+        """
+        Read the next frame sent by the emulated transceiver
+
+        Returns: the frame, an empty bytes object if nothing was received before the timeout
+        """
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                if self._frames and self._frames[0][0] <= now:
+                    return self._frames.popleft()[1]
+                wait = None if deadline is None else deadline - now
+                if self._frames:
+                    wait = self._frames[0][0] - now if wait is None else min(wait, self._frames[0][0] - now)
+                if wait is not None and wait <= 0:
+                    return b""
+                self._condition.wait(wait)
+
+    def reset_input_buffer(self) -> None:
+        """Discard the frames which were not read yet"""
+        with self._condition:
+            self._frames.clear()
+
+    def close(self) -> None:
+        """Close the port (nothing to release)"""
+        pass
@@ -23,3 +23,21 @@ class CivTimeoutException(BaseException):
     """
 
     pass
+
+
+class CivCollisionException(BaseException):
+    """
+    This exception is generated when a collision is detected on the CI-V bus
+    (corrupted echo of the command or jam code received)
+    """
+
+    pass
+
+
+class CivUnavailableException(CivTimeoutException):
+    """
+    This exception is generated when the transceiver stopped answering and the commands
+    are rejected without being sent (circuit breaker open)
+    """
+
+    pass
@@ -0,0 +1,162 @@
+"""Parsing of the CI-V frames received from the transceivers"""
+
+from typing import Optional
+
+
+OK_CODE = 0xFB  # Reply status: OK
+NG_CODE = 0xFA  # Reply status: NG
+PREAMBLE_CODE = 0xFE  # Frame preamble
+END_CODE = 0xFD  # Frame terminator
+JAM_CODE = 0xFC  # Sent on the bus when a collision is detected
+
+
+class CivFrame:
+    """
+    A CI-V frame received from the transceiver
+
+    The frame is parsed only once, and all the fields are views over the receive buffer
+    (no data is copied). Frames returned by a FrameReader are only valid until the next read,
+    use `tobytes()` to keep a copy.
+
+    Frame layout: 0xFE 0xFE [target] [source] [command] [subcommand] [data] 0xFD
+    """
+
+    __slots__ = ("raw", "target", "source", "command", "status")
+
+    raw: memoryview  # The whole frame, including the preamble and the terminator
+    target: int  # Address of the receiver of the frame
+    source: int  # Address of the sender of the frame
+    command: int  # Command byte (or the status code for OK/NG replies)
+    status: Optional[int]  # OK_CODE or NG_CODE for status replies, None for replies carrying data
+
+    def __init__(self, raw: memoryview):
+        if len(raw) < 6:
+            raise ValueError("A CI-V frame is at least 6 bytes long")
+        self.raw = raw
+        self.target = raw[2]
+        self.source = raw[3]
+        self.command = raw[4]
+        self.status = self.command if len(raw) == 6 and self.command in (OK_CODE, NG_CODE) else None
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __getitem__(self, index):
+        return self.raw[index]
+
+    def __bytes__(self) -> bytes:
+        return self.raw.tobytes()
+
+    def __repr__(self) -> str:
+        return f"CivFrame({self.raw.hex(' ')})"
+
+    @property
+    def body(self) -> memoryview:
+        """Command, subcommand and data bytes"""
+        return self.raw[4:-1]
+
+    @property
+    def is_jammed(self) -> bool:
+        """True if the frame contains the jam code (a collision occurred while it was sent)"""
+        return JAM_CODE in self.raw
+
+    @property
+    def is_ng(self) -> bool:
+        """True if the transceiver replied NG"""
+        return self.status == NG_CODE
+
+    def data(self, offset: int = 1) -> memoryview:
+        """
+        Get the data bytes of the frame
+
+        Args:
+            offset (int, optional): length of the command and subcommand to skip. Defaults to 1 (command only).
+        """
+        return self.raw[4 + offset : -1]
+
+    def tobytes(self) -> bytes:
+        """Copy the whole frame into a bytes object"""
+        return self.raw.tobytes()
+
+
+class FrameReader:
+    """
+    Read CI-V frames from a serial port into a preallocated receive buffer
+
+    Received bytes are appended to the buffer and split into frames, which are returned
+    as CivFrame views over the buffer. A frame truncated by a read timeout stays in the buffer
+    until the rest is received, data before the start of a frame is discarded.
+    """
+
+    _ser: object  # Serial port object (or any object implementing `read_until`)
+    _buffer: bytearray  # Receive buffer
+    _start: int  # Start of the bytes not yet returned as frames
+    _end: int  # End of the received bytes
+
+    def __init__(self, serial, size: int = 4096):
+        self._ser = serial
+        self._buffer = bytearray(size)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of received bytes which were not returned as frames yet"""
+        return self._end - self._start
+
+    def feed(self, data: bytes) -> None:
+        """Append the received data to the buffer (invalidates the frames returned so far)"""
+        size = len(data)
+        if self._end + size > len(self._buffer):
+            pending = self._end - self._start
+            if pending + size > len(self._buffer):
+                # Not enough room even after compacting, frames returned so far keep the old buffer
+                self._buffer = bytearray(max(2 * len(self._buffer), pending + size))
+                self._buffer[:pending] = self._view[self._start : self._end]
+                self._view = memoryview(self._buffer)
+            else:
+                self._buffer[:pending] = self._buffer[self._start : self._end]
+            self._start = 0
+            self._end = pending
+        self._buffer[self._end : self._end + size] = data
+        self._end += size
+
+    def next_frame(self) -> Optional[CivFrame]:
+        """Get the next complete frame from the buffer, None if there is none"""
+        buffer = self._buffer
+        while True:
+            first = self._start
+            end = buffer.find(b"\xfd", first, self._end)
+            if end < 0:
+                return None
+            self._start = end + 1
+            if self._start == self._end:
+                self._start = self._end = 0
+            if end - first >= 5 and buffer[first] == PREAMBLE_CODE and buffer[first + 1] == PREAMBLE_CODE and buffer[first + 2] != PREAMBLE_CODE:
+                start = first
+            else:
+                # Junk or a longer preamble (power on), the frame starts at the last preamble before the terminator
+                start = buffer.rfind(b"\xfe\xfe", first, end)
+            if start >= 0 and end - start >= 5:
+                return CivFrame(self._view[start : end + 1])
+
+    def read_frame(self) -> Optional[CivFrame]:
+        """
+        Read the next frame from the serial port
+
+        Returns: the frame, None if the serial port timed out before a complete frame was received
+        """
+        frame = self.next_frame()
+        if frame is not None:
+            return frame
+        data = self._ser.read_until(expected=b"\xfd")
+        if not data:
+            return None
+        # A frame truncated by the timeout is kept in the buffer, the next read completes it
+        self.feed(data)
+        return self.next_frame()
+
+    def clear(self) -> None:
+        """Discard all the received bytes"""
+        self._start = self._end = 0
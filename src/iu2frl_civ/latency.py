@@ -0,0 +1,159 @@
+"""Round-trip latency of the CI-V commands, used to adapt the read timeout"""
+
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Optional
+
+
+# Upper bounds of the histogram buckets in seconds: 1 ms to about 5 s, 4 buckets per octave
+BUCKET_BOUNDS = tuple(0.001 * 2 ** (k / 4) for k in range(50))
+
+
+class LatencyStats(NamedTuple):
+    """Round-trip time statistics of a command (all the times are in seconds)"""
+
+    count: int  # Replies received
+    timeouts: int  # Attempts which timed out
+    mean: float  # Smoothed round-trip time (EWMA)
+    deviation: float  # Smoothed mean deviation of the round-trip time
+    p50: float  # Median (upper bound of the histogram bucket)
+    p90: float  # 90th percentile
+    p99: float  # 99th percentile
+    max: float  # Slowest reply
+    timeout: float  # Read timeout currently used for the first attempt
+
+
+class CommandLatency:
+    """Round-trip time of a single command: EWMA (like the TCP retransmission timer) and histogram"""
+
+    __slots__ = ("count", "timeouts", "mean", "deviation", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.timeouts = 0
+        self.mean = 0.0
+        self.deviation = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def add(self, rtt: float) -> None:
+        """Add a round-trip time measurement"""
+        if self.count == 0:
+            self.mean = rtt
+            self.deviation = rtt / 2
+        else:
+            self.deviation += (abs(rtt - self.mean) - self.deviation) / 4
+            self.mean += (rtt - self.mean) / 8
+        self.count += 1
+        if rtt > self.max:
+            self.max = rtt
+        self.buckets[bisect_left(BUCKET_BOUNDS, rtt)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Get the upper bound of the bucket containing a percentile (at most the slowest reply), 0 if there are no measurements"""
+        if self.count == 0:
+            return 0.0
+        rank = fraction * self.count
+        total = 0
+        for index, count in enumerate(self.buckets):
+            total += count
+            if total >= rank:
+                return min(BUCKET_BOUNDS[index], self.max) if index < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+
+class LatencyTracker:
+    """
+    Measure the round-trip time of the commands sent to a transceiver and adapt the read timeout
+
+    Once enough replies were received, the timeout of the first attempt is the largest of the
+    smoothed round-trip time plus 4 deviations and the 99th percentile, times a safety margin,
+    and it is doubled at each following attempt. The timeout never goes below `min_timeout`
+    nor above `max_timeout` (the timeout the serial port was opened with), so a transceiver
+    which is powered off fails after a few times its usual latency instead of `attempts × timeout`.
+
+    Example:
+        >>> radio.utils.latency.stats()[0x03]
+        LatencyStats(count=120, timeouts=0, mean=0.012, ...)
+    """
+
+    max_timeout: float  # Timeout used until enough replies are measured, and upper limit
+    min_timeout: float  # Lower limit of the timeout
+    min_samples: int  # Replies needed before the timeout is adapted
+    margin: float  # Safety factor applied to the estimated latency
+    _commands: Dict[int, CommandLatency]  # Statistics by command byte
+    _total: CommandLatency  # Statistics of all the commands, used for the commands never sent before
+
+    def __init__(self, max_timeout: float = 1, min_timeout: float = 0.05, min_samples: int = 8, margin: float = 2):
+        self.max_timeout = max_timeout
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.margin = margin
+        self._commands = {}
+        self._total = CommandLatency()
+
+    def _get(self, command: int) -> CommandLatency:
+        """Get the statistics of a command, creating them on the first use"""
+        latency = self._commands.get(command)
+        if latency is None:
+            latency = self._commands[command] = CommandLatency()
+        return latency
+
+    def record(self, command: int, rtt: float) -> None:
+        """Record the round-trip time of a command which received its reply"""
+        self._get(command).add(rtt)
+        self._total.add(rtt)
+
+    def record_timeout(self, command: int) -> None:
+        """Record a read attempt which timed out"""
+        self._get(command).timeouts += 1
+        self._total.timeouts += 1
+
+    def timeout(self, command: int, attempt: int = 0) -> float:
+        """
+        Get the read timeout of an attempt
+
+        Args:
+            command (int): the command byte
+            attempt (int, optional): the attempt number, starting from 0. Defaults to 0.
+
+        Returns: the timeout in seconds
+        """
+        latency = self._commands.get(command)
+        if latency is None or latency.count < self.min_samples:
+            latency = self._total
+        return self._timeout(latency, attempt)
+
+    def _timeout(self, latency: CommandLatency, attempt: int) -> float:
+        """Get the read timeout of an attempt from the statistics of a command"""
+        if latency.count < self.min_samples:
+            return self.max_timeout
+        estimate = max(latency.mean + 4 * latency.deviation, latency.percentile(0.99)) * self.margin
+        return min(max(estimate, self.min_timeout) * 2**attempt, self.max_timeout)
+
+    def stats(self) -> Dict[Optional[int], LatencyStats]:
+        """
+        Get the statistics of the commands sent so far
+
+        Returns: the statistics by command byte, the key None holds the statistics of all the commands
+        """
+        result = {command: self._stats(latency, self.timeout(command)) for command, latency in self._commands.items()}
+        result[None] = self._stats(self._total, self._timeout(self._total, 0))
+        return result
+
+    def reset(self) -> None:
+        """Discard all the measurements"""
+        self._commands = {}
+        self._total = CommandLatency()
+
+    @staticmethod
+    def _stats(latency: CommandLatency, timeout: float) -> LatencyStats:
+        """Summarize the statistics of a command"""
+        return LatencyStats(
+            latency.count, latency.timeouts, latency.mean, latency.deviation,
+            latency.percentile(0.5), latency.percentile(0.9), latency.percentile(0.99), latency.max, timeout,
+        )
+
+    def buckets(self, command: Optional[int] = None) -> List[int]:
+        """Get the histogram of a command (None for all the commands), one count for each of BUCKET_BOUNDS plus the overflow"""
+        latency = self._total if command is None else self._commands.get(command, CommandLatency())
+        return list(latency.buckets)
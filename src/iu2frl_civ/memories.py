@@ -0,0 +1,276 @@
+"""
+Bulk reading and writing of the memory channels (0x1A 0x00)
+
+A snapshot of the channels can be saved to a CSV or JSON file, edited, and written to other
+transceivers. Only the channels which differ from the ones stored in the transceiver are written.
+"""
+
+import csv
+import json
+import logging
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from .bcd import decode_bcd, decode_bcd_big_endian, encode_bcd, encode_bcd_big_endian
+from .enums import OperatingMode, SelectedFilter, ToneType
+from .exceptions import CivCommandException
+from .pipeline import CommandPipeline
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from .utils import Utils
+
+
+logger = logging.getLogger("iu2frl-civ")
+
+MEMORY_COMMAND = b"\x1a\x00"
+BLANK_CHANNEL = b"\xff"  # Content of the empty channels
+CHANNEL_LENGTH = 25  # Bytes of a programmed channel, after the channel number
+NAME_LENGTH = 10  # Characters of the channel names
+MAX_IN_FLIGHT = 4  # Commands sent before waiting for the replies
+
+
+class MemoryChannel(NamedTuple):
+    """Content of a programmed memory channel"""
+
+    frequency: int  # Frequency in Hz
+    mode: OperatingMode  # Operating mode
+    filter: SelectedFilter  # Selected filter
+    name: str = ""  # Name, up to 10 characters
+    data_mode: bool = False  # Data mode enabled
+    tone_type: ToneType = ToneType.OFF  # Tone type (OFF/TONE/TSQL)
+    repeater_tone: float = 88.5  # Repeater tone in Hz
+    tone_squelch: float = 88.5  # Tone squelch in Hz
+    select: int = 0  # Memory select setting (0=OFF, 1=☆1, 2=☆2, 3=☆3)
+
+    @classmethod
+    def from_bytes(cls, content: bytes) -> "MemoryChannel":
+        """
+        Decode the content of a channel, as read from the transceiver (after the channel number)
+
+        Raises: ValueError if the content is not a programmed channel
+        """
+        if len(content) != CHANNEL_LENGTH:
+            raise ValueError(f"A memory channel is {CHANNEL_LENGTH} bytes long, received {len(content)}")
+        return cls(
+            frequency=decode_bcd(content[1:6]),
+            mode=OperatingMode(content[6]),
+            filter=SelectedFilter(content[7]),
+            name=bytes(content[15:25]).decode("ascii").rstrip(" "),
+            data_mode=bool(content[8] >> 4),
+            tone_type=ToneType(content[8] & 0x0F),
+            repeater_tone=decode_bcd_big_endian(content[9:12]) / 10,
+            tone_squelch=decode_bcd_big_endian(content[12:15]) / 10,
+            select=content[0],
+        )
+
+    def to_bytes(self) -> bytes:
+        """
+        Encode the content of the channel, as written to the transceiver (after the channel number)
+
+        Raises: ValueError if the name is longer than 10 characters or not ASCII
+        """
+        if len(self.name) > NAME_LENGTH:
+            raise ValueError(f"Memory name must be {NAME_LENGTH} characters or less")
+        return (
+            bytes((self.select,))
+            + encode_bcd(self.frequency)
+            + bytes((self.mode.value, self.filter.value, int(self.data_mode) << 4 | self.tone_type.value))
+            + encode_bcd_big_endian(round(self.repeater_tone * 10), 3)
+            + encode_bcd_big_endian(round(self.tone_squelch * 10), 3)
+            + self.name.ljust(NAME_LENGTH).encode("ascii")
+        )
+
+
+# Columns of the CSV files, the empty channels only have the channel number
+CSV_COLUMNS = ("channel", "frequency", "mode", "filter", "name", "data_mode", "tone_type", "repeater_tone", "tone_squelch", "select")
+
+
+class MemorySnapshot:
+    """
+    Content of the memory channels of a transceiver, None for the empty ones
+
+    Example:
+        >>> snapshot = radio.dump_memories()
+        >>> snapshot.save("club.csv")
+        >>> radio.restore_memories(MemorySnapshot.load("club.csv"))
+    """
+
+    channels: Dict[int, Optional[MemoryChannel]]  # Content by channel number
+
+    def __init__(self, channels: Optional[Dict[int, Optional[MemoryChannel]]] = None):
+        self.channels = dict(sorted((channels or {}).items()))
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, MemorySnapshot) and self.channels == other.channels
+
+    def __repr__(self) -> str:
+        programmed = sum(1 for channel in self.channels.values() if channel is not None)
+        return f"MemorySnapshot({len(self.channels)} channels, {programmed} programmed)"
+
+    def to_rows(self) -> List[Dict[str, Union[int, float, str, bool, None]]]:
+        """Get the channels as rows of plain values (enum names instead of members), ready for CSV or JSON"""
+        rows = []
+        for number, channel in self.channels.items():
+            row = {column: None for column in CSV_COLUMNS}
+            row["channel"] = number
+            if channel is not None:
+                row.update(channel._asdict())
+                row.update(mode=channel.mode.name, filter=channel.filter.name, tone_type=channel.tone_type.name)
+            rows.append(row)
+        return rows
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, object]]) -> "MemorySnapshot":
+        """
+        Create a snapshot from rows of plain values (the values can be strings, like the ones read from CSV)
+
+        Raises: ValueError if a row is not valid
+        """
+        channels = {}
+        for row in rows:
+            number = int(row["channel"])
+            if row.get("frequency") in (None, ""):
+                channels[number] = None
+                continue
+            try:
+                channels[number] = MemoryChannel(
+                    frequency=int(row["frequency"]),
+                    mode=OperatingMode[row["mode"]],
+                    filter=SelectedFilter[row["filter"]],
+                    name=row.get("name") or "",
+                    data_mode=str(row.get("data_mode")).lower() in ("true", "1"),
+                    tone_type=ToneType[row.get("tone_type") or "OFF"],
+                    repeater_tone=float(row.get("repeater_tone") or 88.5),
+                    tone_squelch=float(row.get("tone_squelch") or 88.5),
+                    select=int(row.get("select") or 0),
+                )
+            except KeyError as e:
+                raise ValueError(f"Invalid value {e} in memory channel {number}") from e
+        return cls(channels)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the snapshot to a CSV or JSON file (according to the extension)"""
+        path = Path(path)
+        if path.suffix.lower() == ".json":
+            path.write_text(json.dumps(self.to_rows(), indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+            return
+        with path.open("w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows({key: "" if value is None else value for key, value in row.items()} for row in self.to_rows())
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "MemorySnapshot":
+        """
+        Load a snapshot from a CSV or JSON file (according to the extension)
+
+        Raises: ValueError if the file is not valid
+        """
+        path = Path(path)
+        if path.suffix.lower() == ".json":
+            return cls.from_rows(json.loads(path.read_text(encoding="utf-8")))
+        with path.open(newline="", encoding="utf-8") as file:
+            return cls.from_rows(csv.DictReader(file))
+
+
+class RestoreReport(NamedTuple):
+    """Outcome of writing a snapshot to a transceiver"""
+
+    written: List[int]  # Channels which were written
+    unchanged: List[int]  # Channels which already had the content of the snapshot
+    elapsed: float  # Seconds taken, including the reading of the current content
+
+
+def read_channels(utils: "Utils", channels: Iterable[int]) -> Dict[int, bytes]:
+    """
+    Read the raw content of some memory channels, with the commands pipelined
+
+    Returns: the content of each channel (after the channel number), BLANK_CHANNEL for the empty ones
+
+    Raises:
+        CivCommandException: if the transceiver rejected a channel
+        CivTimeoutException: if the transceiver stopped answering
+    """
+    requests: List[Tuple[int, "Future"]] = []
+    with utils.transaction():
+        utils.breaker.check()
+        pipeline = CommandPipeline(utils, max_in_flight=MAX_IN_FLIGHT)
+        for channel in channels:
+            requests.append((channel, pipeline.submit(MEMORY_COMMAND, encode_bcd_big_endian(channel))))
+        pipeline.flush()
+    # The reply repeats the command and the channel number: FE FE [to] [from] 1A 00 [channel] [content] FD
+    return {channel: future.result()[8:-1] for channel, future in requests}
+
+
+def write_channels(utils: "Utils", contents: Dict[int, bytes]) -> None:
+    """
+    Write the raw content of some memory channels, with the commands pipelined
+
+    Raises:
+        CivCommandException: if the transceiver rejected some channels (the other ones are written anyway)
+        CivTimeoutException: if the transceiver stopped answering
+    """
+    requests: List[Tuple[int, "Future"]] = []
+    with utils.transaction():
+        utils.breaker.check()
+        pipeline = CommandPipeline(utils, max_in_flight=MAX_IN_FLIGHT)
+        for channel, content in contents.items():
+            requests.append((channel, pipeline.submit(MEMORY_COMMAND, encode_bcd_big_endian(channel) + content)))
+        pipeline.flush()
+    rejected = []
+    for channel, future in requests:
+        error = future.exception()
+        if isinstance(error, CivCommandException):
+            rejected.append(channel)
+        elif error is not None:
+            raise error
+    if rejected:
+        raise CivCommandException(f"Memory channels rejected: {rejected}", b"\xfa")
+
+
+def read_snapshot(utils: "Utils", channels: Iterable[int]) -> MemorySnapshot:
+    """
+    Read the content of the memory channels
+
+    Returns: the snapshot of the channels
+
+    Raises:
+        CivCommandException: if the transceiver rejected a channel
+        CivTimeoutException: if the transceiver stopped answering
+        ValueError: if a channel contains data which cannot be decoded
+    """
+    start = time.monotonic()
+    contents = read_channels(utils, channels)
+    snapshot = MemorySnapshot({channel: None if content == BLANK_CHANNEL else MemoryChannel.from_bytes(content) for channel, content in contents.items()})
+    logger.debug("Read %i memory channels in %.3f seconds", len(snapshot), time.monotonic() - start)
+    return snapshot
+
+
+def write_snapshot(utils: "Utils", snapshot: MemorySnapshot) -> RestoreReport:
+    """
+    Write a snapshot to the memory channels, skipping the channels which already have the same content
+
+    The channels not in the snapshot are not touched, the ones which are None in the snapshot are cleared.
+
+    Returns: the channels written and the ones left unchanged
+
+    Raises:
+        CivCommandException: if the transceiver rejected some channels (the other ones are written anyway)
+        CivTimeoutException: if the transceiver stopped answering
+        ValueError: if a channel of the snapshot cannot be encoded
+    """
+    start = time.monotonic()
+    wanted = {channel: BLANK_CHANNEL if content is None else content.to_bytes() for channel, content in snapshot.channels.items()}
+    current = read_channels(utils, wanted)
+    changed = {channel: content for channel, content in wanted.items() if current[channel] != content}
+    if changed:
+        write_channels(utils, changed)
+    elapsed = time.monotonic() - start
+    logger.debug("Wrote %i memory channels of %i in %.3f seconds", len(changed), len(wanted), elapsed)
+    return RestoreReport(list(changed), [channel for channel in wanted if channel not in changed], elapsed)
@@ -0,0 +1,168 @@
+"""Calibration and decoding of the transceiver meters"""
+
+import json
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .bcd import BCD_TO_INT
+from .pipeline import CommandPipeline
+
+if TYPE_CHECKING:
+    from .utils import Utils
+
+
+# Known points (raw -> PO%)
+PO_METER_POINTS = [(0, 0), (143, 50), (213, 100)]
+# Known points (raw -> SWR)
+SWR_METER_POINTS = [(0, 1), (48, 1.5), (80, 2.0), (120, 3.0), (255, 99)]
+# Known points (raw -> ALC%)
+ALC_METER_POINTS = [(0, 0), (120, 100)]
+# Known points (raw -> dB)
+COMP_METER_POINTS = [(0, 0), (130, 15), (241, 30)]
+# Known points (raw -> V)
+VD_METER_POINTS = [(0, 0), (13, 10), (241, 16)]
+# List of known points (from the manual - byte -> Ampere)
+ID_METER_POINTS = [(0, 0), (97, 10), (146, 15), (241, 25)]
+
+# Commands to read the TX meters, in the same order of the TxMeters fields
+TX_METER_COMMANDS = (b"\x15\x11", b"\x15\x12", b"\x15\x13", b"\x15\x14", b"\x15\x15", b"\x15\x16")
+
+
+class TxMeters(NamedTuple):
+    """Readings of all the TX meters, -1 if the meter could not be read"""
+
+    po: float  # Output power (%)
+    swr: float  # Standing wave ratio
+    alc: float  # ALC level (%)
+    comp: float  # Compression level (dB)
+    vd: float  # Amplifier voltage (V)
+    id: float  # Amplifier current (A)
+
+
+def linear_interpolate(raw_value: int, points: Sequence[Tuple[float, float]]) -> float:
+    """
+    Perform linear interpolation based on the provided points.
+
+    Args:
+        raw_value (int): The raw input value to interpolate.
+        points (list): A list of tuples (raw, value) representing the known points.
+
+    Returns:
+        float: The interpolated or exact value.
+    """
+    # Check if raw_value matches any known point
+    for point in points:
+        if raw_value == point[0]:
+            return float(point[1])
+
+    # Perform linear interpolation between points
+    for i in range(len(points) - 1):
+        x0, y0 = points[i]
+        x1, y1 = points[i + 1]
+        if x0 < raw_value < x1:
+            return y0 + (y1 - y0) * (raw_value - x0) / (x1 - x0)
+
+    # Handle out-of-range values
+    if raw_value < points[0][0]:
+        return float(points[0][1])
+    if raw_value > points[-1][0]:
+        return float(points[-1][1])
+
+    return -1.0  # Return -1 if interpolation is not possible
+
+
+class MeterCalibration:
+    """
+    Calibration of a meter, converting the raw CI-V readings to physical values
+
+    The conversion of all the raw values (0-255) is computed once when the calibration is
+    created, so reading a meter is a single lookup in a precomputed table.
+    """
+
+    __slots__ = ("points", "table", "_last")
+
+    points: Tuple[Tuple[float, float], ...]  # Known points (raw -> value)
+    table: Tuple[float, ...]  # Converted value of each raw reading
+
+    def __init__(self, points: Sequence[Tuple[float, float]]):
+        if len(points) < 1:
+            raise ValueError("At least one calibration point is required")
+        self.points = tuple((point[0], point[1]) for point in points)
+        if any(self.points[i][0] >= self.points[i + 1][0] for i in range(len(self.points) - 1)):
+            raise ValueError("Calibration points must be sorted by raw value")
+        # Raw values above the last point are clamped to it, so the table can stop there
+        size = max(256, int(self.points[-1][0]) + 1)
+        self.table = tuple(linear_interpolate(raw_value, self.points) for raw_value in range(size))
+        self._last = size - 1
+
+    def __repr__(self) -> str:
+        return f"MeterCalibration({list(self.points)})"
+
+    def convert(self, raw_value: int) -> float:
+        """Convert a raw reading (0-255) to the calibrated value"""
+        if raw_value > self._last:
+            raw_value = self._last
+        return self.table[raw_value]
+
+
+# Calibration shared by all the transceivers, unless overridden
+DEFAULT_METER_CALIBRATION: Dict[str, MeterCalibration] = {
+    "po": MeterCalibration(PO_METER_POINTS),
+    "swr": MeterCalibration(SWR_METER_POINTS),
+    "alc": MeterCalibration(ALC_METER_POINTS),
+    "comp": MeterCalibration(COMP_METER_POINTS),
+    "vd": MeterCalibration(VD_METER_POINTS),
+    "id": MeterCalibration(ID_METER_POINTS),
+}
+
+
+def load_meter_calibration(file_path: str) -> Dict[str, MeterCalibration]:
+    """
+    Load the meters calibration from a JSON file
+
+    The file maps the name of the meters (po, swr, alc, comp, vd, id) to their known points,
+    the meters which are not listed keep the default calibration, for example:
+
+        {"swr": [[0, 1.0], [50, 1.5], [82, 2.0], [125, 3.0], [255, 99]]}
+
+    Returns: the calibration of all the meters
+    """
+    with open(file_path, "r", encoding="utf-8") as calibration_file:
+        content = json.load(calibration_file)
+    calibration = dict(DEFAULT_METER_CALIBRATION)
+    for meter, points in content.items():
+        if meter not in calibration:
+            raise ValueError(f"Unknown meter in calibration file: {meter}")
+        calibration[meter] = MeterCalibration([tuple(point) for point in points])
+    return calibration
+
+
+def decode_meter_reply(reply: bytes, calibration: MeterCalibration) -> float:
+    """
+    Decode the reply to a meter reading command (0x15)
+
+    Returns: the calibrated value, -1 if the reply is not valid
+    """
+    if len(reply) == 9:
+        return calibration.convert(reply[6] * 100 + BCD_TO_INT[reply[7]])
+    return -1.0
+
+
+def decode_tx_meters(replies: List[Optional[bytes]], calibration: Dict[str, MeterCalibration]) -> TxMeters:
+    """Decode the replies to the TX_METER_COMMANDS (None for the meters which were not read)"""
+    return TxMeters(*(-1.0 if reply is None else decode_meter_reply(reply, calibration[meter]) for reply, meter in zip(replies, TxMeters._fields)))
+
+
+def read_tx_meters(utils: "Utils", calibration: Dict[str, MeterCalibration]) -> TxMeters:
+    """
+    Read all the TX meters, with the commands sent back to back
+
+    Returns: the readings of the meters, -1 for the ones rejected (NG) or not answered
+
+    Raises: CivUnavailableException without sending the commands if the transceiver stopped answering
+    """
+    with utils.transaction():
+        utils.breaker.check()
+        pipeline = CommandPipeline(utils, max_in_flight=len(TX_METER_COMMANDS))
+        futures = [pipeline.submit(command) for command in TX_METER_COMMANDS]
+        pipeline.flush()
+    return decode_tx_meters([None if future.exception() is not None else future.result() for future in futures], calibration)
@@ -0,0 +1,164 @@
+"""Pipelined execution of CI-V commands"""
+
+import logging
+from collections import deque
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Deque, Iterable, List, Optional, Tuple
+
+from .exceptions import CivCommandException, CivTimeoutException
+from .frame import OK_CODE, NG_CODE, CivFrame
+
+if TYPE_CHECKING:
+    from .utils import Utils
+
+
+logger = logging.getLogger("iu2frl-civ")
+
+
+class PendingCommand:
+    """A command which was sent to the transceiver and is waiting for its reply"""
+
+    __slots__ = ("command", "data", "frame", "future")
+
+    def __init__(self, command: bytes, data: bytes, frame: bytes):
+        self.command = command
+        self.data = data
+        self.frame = frame
+        self.future: Future = Future()
+
+
+class CommandPipeline:
+    """
+    Keep several CI-V commands in flight on the serial port
+
+    Commands are written back to back (up to `max_in_flight` at the same time) without
+    waiting for the previous replies. Each reply is then matched to its request:
+    - replies carrying data echo the command and subcommand bytes, so they are matched to
+      the oldest pending command with the same bytes (even if they arrive out of order)
+    - OK/NG replies (0xFB/0xFA) carry no command bytes, so they are matched to the oldest
+      pending command (the transceiver answers in order)
+    - replies with data not matching any pending command (like the scope waveform) are ignored
+
+    Example:
+        >>> pipeline = CommandPipeline(radio.utils, max_in_flight=6)
+        >>> po = pipeline.submit(b"\\x15\\x11")
+        >>> swr = pipeline.submit(b"\\x15\\x12")
+        >>> pipeline.flush()
+        >>> po.result(), swr.result()
+    """
+
+    _utils: "Utils"  # Utilities used to build and send the frames
+    _max_in_flight: int  # Maximum number of commands waiting for a reply
+    _pending: Deque[PendingCommand]  # Commands waiting for a reply (oldest first)
+    _timed_out: bool  # True once a read timed out, the batch counts as one timeout for the circuit breaker
+
+    def __init__(self, utils: "Utils", max_in_flight: int = 4):
+        if max_in_flight < 1:
+            raise ValueError("At least one command must be allowed in flight")
+        self._utils = utils
+        self._max_in_flight = max_in_flight
+        self._pending = deque()
+        self._timed_out = False
+
+    @property
+    def in_flight(self) -> int:
+        """Number of commands waiting for a reply"""
+        return len(self._pending)
+
+    def submit(self, command: bytes, data: bytes = b"") -> Future:
+        """
+        Send a command without waiting for its reply
+
+        If too many commands are already in flight, the oldest replies are read first.
+
+        Returns: a future which will hold the reply (or the exception) once the pipeline is flushed
+        """
+        frame = self._utils.build_command(command, data)
+        while len(self._pending) >= self._max_in_flight:
+            self._read_reply()
+        if not self._pending and self._utils._listener is not None:
+            # Discard the replies nobody waited for, so they cannot be taken for the replies to this batch
+            self._utils._listener.clear()
+        pending = PendingCommand(command, data, frame)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending pipelined command: %s (%i in flight)", self._utils.bytes_to_string(frame), len(self._pending))
+        self._utils._ser.write(frame)
+        self._pending.append(pending)
+        return pending.future
+
+    def receive(self) -> None:
+        """Read the replies until one of the commands in flight is resolved (nothing if none is in flight)"""
+        if self._pending:
+            self._read_reply()
+
+    def flush(self) -> None:
+        """Read the replies until all the commands in flight are resolved"""
+        while self._pending:
+            self._read_reply()
+
+    def run(self, commands: Iterable[Tuple[bytes, bytes]]) -> List[bytes]:
+        """
+        Send a batch of commands and wait for all the replies
+
+        Args:
+            commands: a list of (command, data) tuples
+
+        Returns: the replies, in the same order of the commands
+
+        Raises:
+            CivTimeoutException: if the transceiver did not reply to some command
+            CivCommandException: if the transceiver replied NG to some command
+        """
+        futures = [self.submit(command, data) for command, data in commands]
+        self.flush()
+        return [future.result() for future in futures]
+
+    def _read_reply(self) -> None:
+        """Read frames from the serial port until one of the pending commands is resolved"""
+        timeouts = 0
+        debug = logger.isEnabledFor(logging.DEBUG)
+        while timeouts < self._utils._read_attempts:
+            # Taken from the queue of the transceive listener, if running
+            frame = self._utils.read_frame()
+            if frame is None:
+                timeouts += 1
+                if debug:
+                    logger.debug("Serial communication timeout (%i/%i)", timeouts, self._utils._read_attempts)
+                continue
+            if debug:
+                logger.debug("Received message: %s (length: %i)", self._utils.bytes_to_string(frame.raw), len(frame))
+            pending = self._match(frame)
+            if pending is None:
+                continue
+            self._pending.remove(pending)
+            # Fed to the circuit breaker like the commands sent one at a time (NG replies included, the transceiver is answering)
+            self._utils.breaker.record_success()
+            if frame.is_ng:
+                pending.future.set_exception(CivCommandException("Reply status: NG", b"\xfa"))
+            else:
+                pending.future.set_result(frame.tobytes())
+            return
+        # The transceiver stopped answering, fail all the commands in flight
+        if not self._timed_out:
+            self._timed_out = True
+            self._utils.breaker.record_timeout()
+        while self._pending:
+            self._pending.popleft().future.set_exception(CivTimeoutException(f"Communication timeout occurred after {timeouts} attempts"))
+
+    def _match(self, frame: CivFrame) -> Optional[PendingCommand]:
+        """Find the pending command a frame belongs to, None if the frame must be ignored"""
+        # Ignore our own commands echoed back by the bus
+        if frame.target != self._utils.controller_address[0] or frame.source != self._utils.transceiver_address[0]:
+            return None
+        # OK/NG status, the transceiver does not repeat the command bytes but replies in order
+        if frame.status in (OK_CODE, NG_CODE):
+            return self._pending[0] if self._pending else None
+        # Reply with data, starting with the command and subcommand bytes
+        body = frame.body
+        for pending in self._pending:
+            if body[: len(pending.command)] == pending.command:
+                return pending
+        # Not a reply to the commands in flight (like the scope waveform sent continuously)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Ignoring frame not matching any pending command: %s", self._utils.bytes_to_string(frame.raw))
+        return None
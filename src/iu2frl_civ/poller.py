@@ -0,0 +1,255 @@
+"""Polling of the transceiver parameters on behalf of several consumers"""
+
+import logging
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .exceptions import CivCollisionException, CivCommandException, CivTimeoutException
+
+if TYPE_CHECKING:
+    from .device_base import DeviceBase
+
+
+logger = logging.getLogger("iu2frl-civ")
+
+
+class PollResult(NamedTuple):
+    """A value read by the poller"""
+
+    parameter: str  # Name of the device method which was called
+    value: Any  # Value returned by the method
+    timestamp: float  # Time of the reading (time.time())
+
+
+class Subscription:
+    """A consumer of a parameter, receiving the values at most at its own rate"""
+
+    __slots__ = ("parameter", "interval", "callback", "queue", "_poller", "_next_delivery")
+
+    def __init__(
+        self,
+        poller: "Poller",
+        parameter: str,
+        interval: float,
+        callback: Optional[Callable[[PollResult], None]],
+        results: Optional["queue.Queue[PollResult]"],
+    ):
+        self.parameter = parameter  # Name of the device method
+        self.interval = interval  # Seconds between the values delivered
+        self.callback = callback  # Function receiving the values
+        self.queue = results  # Queue receiving the values
+        self._poller = poller
+        self._next_delivery = 0.0
+
+    def cancel(self) -> None:
+        """Stop receiving the values"""
+        self._poller.unsubscribe(self)
+
+    def _deliver(self, result: PollResult, now: float) -> None:
+        """Send a value to the consumer, unless it already received one in the last interval"""
+        # 10% tolerance, so the consumers polling at the same rate as the parameter receive every value
+        if now < self._next_delivery - self.interval * 0.1:
+            return
+        self._next_delivery = now + self.interval
+        if self.queue is not None:
+            try:
+                self.queue.put_nowait(result)
+            except queue.Full:
+                logger.debug("Poll result of %s dropped, the queue is full", self.parameter)
+        if self.callback is not None:
+            try:
+                self.callback(result)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.error("Poll callback of %s failed: %s", self.parameter, e)
+
+
+class Poller:
+    """
+    Read the parameters of a transceiver periodically on behalf of several consumers
+
+    Each consumer subscribes to a parameter (the name of a device method without arguments, like
+    `read_smeter`) with the interval it needs. The poller reads each parameter only once, at the
+    shortest interval requested, and delivers the value to all its consumers (callback or queue).
+    The other threads can keep using the device, the commands are serialized by its transaction lock.
+
+    Example:
+        >>> poller = Poller(radio)
+        >>> poller.subscribe("read_smeter", 0.1, callback=lambda result: print(result.value))
+        >>> frequencies = poller.subscribe("read_operating_frequency", 1).queue
+        >>> poller.start()
+    """
+
+    reads: Dict[str, int]  # Number of readings of each parameter
+    _device: "DeviceBase"  # Device the parameters are read from
+    _subscriptions: Dict[str, List[Subscription]]  # Consumers of each parameter
+    _next_read: Dict[str, float]  # Time of the next reading of each parameter (time.monotonic()), not listed while being read
+    _latest: Dict[str, PollResult]  # Last value read of each parameter
+    _condition: threading.Condition  # Guards the schedule, notified when it changes
+    _running: bool  # Cleared to stop the polling thread
+    _thread: Optional[threading.Thread]  # Polling thread
+
+    def __init__(self, device: "DeviceBase"):
+        self._device = device
+        self.reads = {}
+        self._subscriptions = {}
+        self._next_read = {}
+        self._latest = {}
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        """True if the polling thread is running"""
+        return self._running
+
+    def subscribe(
+        self,
+        parameter: str,
+        interval: float,
+        callback: Optional[Callable[[PollResult], None]] = None,
+        results: Optional["queue.Queue[PollResult]"] = None,
+    ) -> Subscription:
+        """
+        Receive the value of a parameter periodically
+
+        Args:
+            parameter (str): name of the device method reading the parameter (like "read_smeter")
+            interval (float): seconds between the values
+            callback (Callable, optional): function called with each PollResult, from the polling thread
+            results (queue.Queue, optional): queue receiving each PollResult. A queue of 100 values is created if there is no callback.
+
+        Returns: the subscription, to be cancelled when the values are not needed anymore
+
+        Raises: ValueError if the device has no such method or the interval is not positive
+        """
+        if not callable(getattr(self._device, parameter, None)):
+            raise ValueError(f"The device has no method named {parameter}")
+        if interval <= 0:
+            raise ValueError("The interval must be positive")
+        if callback is None and results is None:
+            results = queue.Queue(100)
+        subscription = Subscription(self, parameter, interval, callback, results)
+        with self._condition:
+            self._subscriptions.setdefault(parameter, []).append(subscription)
+            self.reads.setdefault(parameter, 0)
+            # The new consumer receives a value right away, then at the shortest interval
+            self._next_read[parameter] = time.monotonic()
+            self._condition.notify_all()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop delivering the values to a consumer, the parameter is not read anymore if it was the last one"""
+        with self._condition:
+            subscriptions = self._subscriptions.get(subscription.parameter, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.parameter, None)
+                self._next_read.pop(subscription.parameter, None)
+            self._condition.notify_all()
+
+    def interval(self, parameter: str) -> Optional[float]:
+        """Get the interval the parameter is read at (the shortest requested), None if not subscribed"""
+        with self._condition:
+            subscriptions = self._subscriptions.get(parameter)
+            return min(subscription.interval for subscription in subscriptions) if subscriptions else None
+
+    def latest(self, parameter: str) -> Optional[PollResult]:
+        """Get the last value read of a parameter, None if it was never read"""
+        return self._latest.get(parameter)
+
+    def start(self) -> "Poller":
+        """Start polling in a background thread"""
+        with self._condition:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="iu2frl-civ-poller", daemon=True)
+        self._thread.start()
+        logger.debug("Poller started")
+        return self
+
+    def stop(self) -> None:
+        """Stop polling and wait for the thread to exit"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        logger.debug("Poller stopped")
+
+    def __enter__(self) -> "Poller":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def _next(self) -> Optional[Tuple[str, float]]:
+        """
+        Wait for the next parameter to be read
+
+        Returns: the parameter and the time it was due (time.monotonic()), None if the poller was stopped
+        """
+        with self._condition:
+            while self._running:
+                if not self._next_read:
+                    self._condition.wait()
+                    continue
+                parameter = min(self._next_read, key=self._next_read.get)
+                due = self._next_read[parameter]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                # Scheduled again once read, so it is not read twice at the same time
+                del self._next_read[parameter]
+                self.reads[parameter] += 1
+                return parameter, due
+        return None
+
+    def _schedule(self, parameter: str, due: float) -> None:
+        """
+        Schedule the next reading of a parameter which was just read, one interval after it was due
+
+        The readings keep the requested rate whatever the time they take, the ones which would
+        already be late (the reading took longer than the interval) are skipped.
+        """
+        with self._condition:
+            subscriptions = self._subscriptions.get(parameter)
+            if not subscriptions:
+                # Unsubscribed while being read
+                return
+            interval = min(subscription.interval for subscription in subscriptions)
+            due += interval
+            now = time.monotonic()
+            if due <= now:
+                due += ((now - due) // interval + 1) * interval
+            # Unless a consumer subscribed while it was being read
+            self._next_read[parameter] = min(self._next_read.get(parameter, due), due)
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        """Read the parameters when they are due and deliver the values (runs in the polling thread)"""
+        while True:
+            scheduled = self._next()
+            if scheduled is None:
+                return
+            parameter, due = scheduled
+            try:
+                value = getattr(self._device, parameter)()
+            except (CivTimeoutException, CivCommandException, CivCollisionException, Exception) as e:  # pylint: disable=broad-except
+                logger.debug("Polling %s failed: %s", parameter, e)
+                continue
+            finally:
+                self._schedule(parameter, due)
+            result = PollResult(parameter, value, time.time())
+            self._latest[parameter] = result
+            now = time.monotonic()
+            with self._condition:
+                subscriptions = list(self._subscriptions.get(parameter, ()))
+            for subscription in subscriptions:
+                subscription._deliver(result, now)
@@ -0,0 +1,295 @@
+"""
+Configuration profiles applied to the settings of a transceiver
+
+A profile holds the wanted value of some settings, named after their setter without `set_` (like
+`lcd_brightness` for `set_lcd_brightness`). Applying it reads the current values in one pipelined
+batch and writes only the settings which differ, so a transceiver already configured is not written.
+Only the settings described by the command table of the driver (see commands.py) can be used.
+"""
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from .exceptions import CivCommandException
+from .pipeline import CommandPipeline
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from .commands import CommandSpec
+    from .device_base import DeviceBase
+    from .utils import Utils
+
+
+logger = logging.getLogger("iu2frl-civ")
+
+MAX_IN_FLIGHT = 4  # Commands sent before waiting for the replies
+
+
+class SettingResult(NamedTuple):
+    """Outcome of applying one setting of a profile"""
+
+    name: str  # Name of the setting
+    previous: Any  # Value read from the transceiver, None if it could not be read
+    value: Any  # Value of the profile
+    changed: bool  # True if the setting was written
+    elapsed: float  # Seconds waiting for the replies of the setting (reading, plus writing if changed)
+
+
+class ProfileReport(NamedTuple):
+    """Outcome of applying a profile to a transceiver"""
+
+    results: List[SettingResult]  # Outcome of each setting, in the order of the profile
+    elapsed: float  # Seconds taken, including the reading of the current values
+
+    @property
+    def changed(self) -> List[str]:
+        """Names of the settings which were written"""
+        return [result.name for result in self.results if result.changed]
+
+    @property
+    def unchanged(self) -> List[str]:
+        """Names of the settings which already had the value of the profile"""
+        return [result.name for result in self.results if not result.changed]
+
+
+def available_settings(device: "DeviceBase") -> Dict[str, "CommandSpec"]:
+    """
+    Get the settings which can be used in the profiles of a device
+
+    Returns: the spec of each setting, by name (the setter without `set_`)
+    """
+    specs = getattr(type(device), "command_specs", ())
+    return {spec.setter[4:]: spec for spec in specs if spec.setter is not None and spec.setter.startswith("set_")}
+
+
+class RadioProfile:
+    """
+    Wanted values of some settings of a transceiver
+
+    Example:
+        >>> profile = RadioProfile(lcd_brightness=128, vox_delay=5, nb_depth=4)
+        >>> report = profile.apply(radio)
+        >>> print(report.changed)
+    """
+
+    settings: Dict[str, Any]  # Wanted value by setting name
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None, **values: Any):
+        self.settings = dict(settings or {}, **values)
+
+    def __len__(self) -> int:
+        return len(self.settings)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RadioProfile) and self.settings == other.settings
+
+    def __repr__(self) -> str:
+        return f"RadioProfile({self.settings!r})"
+
+    def read(self, device: "DeviceBase") -> Dict[str, Any]:
+        """
+        Read the current value of the settings of the profile, with the commands pipelined
+
+        Returns: the value of each setting, None for the ones which could not be read
+
+        Raises:
+            ValueError: if the profile contains a setting not supported by the device
+            CivTimeoutException: if the transceiver stopped answering
+        """
+        specs = self._specs(device)
+        current, _ = read_settings(device.utils, specs)
+        return {name: _decode(specs[name], data) for name, data in current.items()}
+
+    def diff(self, device: "DeviceBase") -> Dict[str, Tuple[Any, Any]]:
+        """
+        Compare the profile with the current value of the settings
+
+        Returns: the current and the wanted value of the settings which differ, by name
+
+        Raises:
+            ValueError: if the profile contains a setting not supported by the device or a value not valid
+            CivTimeoutException: if the transceiver stopped answering
+        """
+        wanted = self._encode(device)
+        specs = {name: spec for name, (spec, _) in wanted.items()}
+        current, _ = read_settings(device.utils, specs)
+        return {name: (_decode(spec, current[name]), self.settings[name]) for name, (spec, data) in wanted.items() if current[name] != data}
+
+    def apply(self, device: "DeviceBase") -> ProfileReport:
+        """
+        Write the settings of the profile which differ from the current ones
+
+        All the values are checked before sending any command, then the current values are read
+        in one pipelined batch and only the settings which differ are written (pipelined as well).
+
+        Returns: the outcome and the timing of each setting
+
+        Raises:
+            ValueError: if the profile contains a setting not supported by the device or a value not valid
+            CivCommandException: if the transceiver rejected some settings (the other ones are written anyway)
+            CivTimeoutException: if the transceiver stopped answering
+        """
+        start = time.monotonic()
+        wanted = self._encode(device)
+        specs = {name: spec for name, (spec, _) in wanted.items()}
+        current, timings = read_settings(device.utils, specs)
+        changed = {name: (spec.command, data) for name, (spec, data) in wanted.items() if current[name] != data}
+        write_timings: Dict[str, float] = {}
+        if changed:
+            write_timings = write_settings(device.utils, changed)
+        results = [
+            SettingResult(name, _decode(spec, current[name]), self.settings[name], name in changed, timings[name] + write_timings.get(name, 0.0))
+            for name, (spec, _) in wanted.items()
+        ]
+        elapsed = time.monotonic() - start
+        logger.debug("Applied %i settings of %i in %.3f seconds", len(changed), len(wanted), elapsed)
+        return ProfileReport(results, elapsed)
+
+    @classmethod
+    def from_device(cls, device: "DeviceBase", names: Iterable[str]) -> "RadioProfile":
+        """
+        Create a profile with the current value of some settings of a transceiver
+
+        The settings which cannot be read are left out of the profile.
+
+        Raises:
+            ValueError: if a setting is not supported by the device
+            CivTimeoutException: if the transceiver stopped answering
+        """
+        values = cls({name: None for name in names}).read(device)
+        return cls({name: value for name, value in values.items() if value is not None})
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the profile to a JSON file"""
+        Path(path).write_text(json.dumps(self.settings, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "RadioProfile":
+        """
+        Load a profile from a JSON file
+
+        Raises: ValueError if the file does not contain an object
+        """
+        settings = json.loads(Path(path).read_text(encoding="utf-8"))
+        if not isinstance(settings, dict):
+            raise ValueError("A profile must be a JSON object")
+        return cls(settings)
+
+    def _specs(self, device: "DeviceBase") -> Dict[str, "CommandSpec"]:
+        """
+        Find the spec of each setting of the profile
+
+        Raises: ValueError if a setting is not supported by the device
+        """
+        available = available_settings(device)
+        unknown = [name for name in self.settings if name not in available]
+        if unknown:
+            raise ValueError(f"Settings not supported by {type(device).__name__}: {unknown}")
+        return {name: available[name] for name in self.settings}
+
+    def _encode(self, device: "DeviceBase") -> Dict[str, Tuple["CommandSpec", bytes]]:
+        """
+        Check and encode the values of the profile
+
+        Returns: the spec and the data to send for each setting
+
+        Raises: ValueError if a setting is not supported by the device or a value is not valid
+        """
+        encoded = {}
+        for name, spec in self._specs(device).items():
+            value = self.settings[name]
+            try:
+                in_range = spec.value_range is None or spec.value_range[0] <= value <= spec.value_range[1]
+                data = spec.codec.encode(value)
+            except (TypeError, ValueError, OverflowError) as e:
+                raise ValueError(f"Invalid value {value!r} for setting {name}") from e
+            if not in_range:
+                raise ValueError(f"Setting {name} must be between {spec.value_range[0]} and {spec.value_range[1]}")
+            encoded[name] = (spec, data)
+        return encoded
+
+
+def _decode(spec: "CommandSpec", data: Optional[bytes]) -> Any:
+    """Decode the data of a setting, None if it could not be read"""
+    return None if data is None else spec.codec.decode(data)
+
+
+def _timer(timings: Dict[str, float], name: str) -> Callable[["Future"], None]:
+    """Create a callback storing the seconds between now and the resolution of a future"""
+    start = time.perf_counter()
+
+    def done(_future: "Future") -> None:
+        timings[name] = time.perf_counter() - start
+
+    return done
+
+
+def read_settings(utils: "Utils", specs: Dict[str, "CommandSpec"]) -> Tuple[Dict[str, Optional[bytes]], Dict[str, float]]:
+    """
+    Read the raw value of some settings, with the commands pipelined
+
+    Returns: the data of each setting (None if it was rejected or not valid) and the seconds taken by each reply
+
+    Raises: CivTimeoutException if the transceiver stopped answering
+    """
+    requests: List[Tuple[str, "CommandSpec", "Future"]] = []
+    timings: Dict[str, float] = {}
+    with utils.transaction():
+        utils.breaker.check()
+        pipeline = CommandPipeline(utils, max_in_flight=MAX_IN_FLIGHT)
+        for name, spec in specs.items():
+            future = pipeline.submit(spec.command)
+            future.add_done_callback(_timer(timings, name))
+            requests.append((name, spec, future))
+        pipeline.flush()
+    current: Dict[str, Optional[bytes]] = {}
+    for name, spec, future in requests:
+        error = future.exception()
+        if isinstance(error, CivCommandException):
+            current[name] = None
+            continue
+        if error is not None:
+            raise error
+        # The reply repeats the command: FE FE [to] [from] [command] [data] FD
+        data = future.result()[4 + len(spec.command) : -1]
+        current[name] = data if len(data) == spec.codec.size else None
+    return current, timings
+
+
+def write_settings(utils: "Utils", settings: Dict[str, Tuple[bytes, bytes]]) -> Dict[str, float]:
+    """
+    Write the raw value of some settings, with the commands pipelined
+
+    Args:
+        settings: the command and the data of each setting, by name
+
+    Returns: the seconds taken by the reply of each setting
+
+    Raises:
+        CivCommandException: if the transceiver rejected some settings (the other ones are written anyway)
+        CivTimeoutException: if the transceiver stopped answering
+    """
+    requests: List[Tuple[str, "Future"]] = []
+    timings: Dict[str, float] = {}
+    with utils.transaction():
+        utils.breaker.check()
+        pipeline = CommandPipeline(utils, max_in_flight=MAX_IN_FLIGHT)
+        for name, (command, data) in settings.items():
+            future = pipeline.submit(command, data)
+            future.add_done_callback(_timer(timings, name))
+            requests.append((name, future))
+        pipeline.flush()
+    rejected = []
+    for name, future in requests:
+        error = future.exception()
+        if isinstance(error, CivCommandException):
+            rejected.append(name)
+        elif error is not None:
+            raise error
+    if rejected:
+        raise CivCommandException(f"Settings rejected: {rejected}", b"\xfa")
+    return timings
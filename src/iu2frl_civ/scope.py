@@ -0,0 +1,251 @@
+"""Streaming of the scope waveform data (command 0x27 0x00)"""
+
+import asyncio
+import logging
+from array import array
+from collections import deque
+from types import ModuleType
+from typing import TYPE_CHECKING, Deque, NamedTuple, Optional, Union
+
+from .bcd import BCD_TO_INT, decode_bcd
+from .exceptions import CivTimeoutException
+from .frame import CivFrame
+
+if TYPE_CHECKING:
+    import numpy
+
+    from .async_utils import AsyncUtils
+    from .utils import Utils
+
+
+logger = logging.getLogger("iu2frl-civ")
+
+# Command sent by the transceiver with each division of the waveform
+SCOPE_WAVEFORM_COMMAND = b"\x27\x00"
+# Length of the header in the first division (mode, frequency, span and out of range flag)
+_HEADER_LENGTH = 12
+# Maximum number of divisions per sweep (the IC-7300 sends 11 divisions)
+_MAX_DIVISIONS = 16
+
+
+class ScopeSweep(NamedTuple):
+    """A full sweep of the scope, reassembled from all its divisions"""
+
+    fixed_mode: bool  # True if the scope is in fixed mode, False if in center mode
+    center_hz: int  # Center frequency of the sweep
+    span_hz: int  # Half of the width of the sweep (±Hz)
+    lower_hz: int  # Frequency of the first point
+    upper_hz: int  # Frequency of the last point
+    out_of_range: bool  # True if the sweep is outside of the scope range
+    data: Union[array, "numpy.ndarray"]  # Amplitude of each point (0-160), as unsigned bytes
+
+
+class ScopeAssembler:
+    """
+    Reassemble the scope waveform divisions into full sweeps
+
+    Each sweep is sent by the transceiver as a sequence of 0x27 0x00 frames:
+    - the first division carries the header (mode, center or lower frequency, span or upper frequency)
+    - the following divisions carry the waveform data (one byte per point)
+    When the whole sweep fits in one frame (single division), the data follows the header.
+    Sweeps with missing or out of order divisions are discarded.
+    """
+
+    _numpy: Optional[ModuleType]  # numpy, to return the data as numpy arrays (None to return array('B'))
+    _header: Optional[ScopeSweep]  # Header of the sweep being received
+    _data: array  # Waveform data of the sweep being received
+    _next_division: int  # Number of the next expected division
+
+    def __init__(self, use_numpy: Optional[bool] = None):
+        self._numpy = None
+        if use_numpy is not False:
+            # Imported only when needed, since it takes longer to import than the whole library
+            try:
+                import numpy  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+                self._numpy = numpy
+            except ImportError:  # numpy is optional, sweeps are returned as array('B') without it
+                if use_numpy:
+                    raise ImportError("numpy is required to return the scope data as numpy arrays") from None
+        self._header = None
+        self._data = array("B")
+        self._next_division = 0
+
+    def reset(self) -> None:
+        """Discard the sweep being received"""
+        self._header = None
+        self._next_division = 0
+
+    def feed(self, frame: CivFrame) -> Optional[ScopeSweep]:
+        """
+        Process a frame received from the transceiver
+
+        Returns: the sweep, if the frame completed it, None otherwise
+        """
+        body = frame.body
+        # 0x27 0x00, main/sub, division number, number of divisions
+        if len(body) < 5 or body[0] != 0x27 or body[1] != 0x00:
+            return None
+        division = BCD_TO_INT[body[3]]
+        divisions = BCD_TO_INT[body[4]]
+        if division == 1:
+            if len(body) < 5 + _HEADER_LENGTH:
+                logger.debug("Ignoring scope header which is too short (length: %i)", len(body))
+                self.reset()
+                return None
+            header = body[5:]
+            fixed_mode = header[0] == 0x01
+            first = decode_bcd(header[1:6])
+            second = decode_bcd(header[6:11])
+            if fixed_mode:
+                # Lower and upper edge frequencies
+                center, span = (first + second) // 2, (second - first) // 2
+            else:
+                # Center frequency and span (±Hz)
+                center, span = first, second
+            self._header = ScopeSweep(fixed_mode, center, span, center - span, center + span, header[11] == 0x01, None)
+            # The data of the previous sweep was handed over to the consumer, start a new buffer
+            self._data = array("B")
+            self._data.frombytes(header[_HEADER_LENGTH:])
+            self._next_division = 2
+        elif self._header is None or division != self._next_division:
+            if self._header is not None:
+                logger.debug("Discarding scope sweep, expected division %i but received %i", self._next_division, division)
+            self.reset()
+            return None
+        else:
+            self._data.frombytes(body[5:])
+            self._next_division += 1
+        if division < divisions:
+            return None
+        sweep = self._header._replace(data=self._data if self._numpy is None else self._numpy.frombuffer(self._data, dtype=self._numpy.uint8))
+        self.reset()
+        return sweep
+
+
+class ScopeStream:
+    """
+    Iterate over the sweeps sent by the transceiver when the scope data output is enabled
+
+    The sweeps are read from the serial port only when the consumer asks for them. The frames
+    which were already received are processed first, and only the latest `max_pending` sweeps
+    are kept: if the consumer is too slow the oldest sweeps are dropped, so the memory
+    usage is bounded and the sweeps returned are never too old.
+
+    Each frame is read holding the transaction lock of the device (see `Utils.transaction()`), so
+    the other threads can send commands while iterating: their replies are read by them, not by
+    the stream. When the transceive listener is running, the frames are taken from its queue.
+    Frames which are not part of the scope waveform are ignored.
+
+    Example:
+        >>> radio.set_scope_data_out(True)
+        >>> for sweep in ScopeStream(radio.utils):
+        ...     render(sweep.data)
+    """
+
+    _utils: "Utils"  # Utilities used to read the frames
+    _assembler: ScopeAssembler  # Reassembly of the divisions
+    _sweeps: Deque[ScopeSweep]  # Sweeps received but not yet consumed
+    dropped: int  # Number of sweeps dropped because the consumer was too slow
+
+    def __init__(self, utils: "Utils", max_pending: int = 4, use_numpy: Optional[bool] = None):
+        if max_pending < 1:
+            raise ValueError("At least one pending sweep must be allowed")
+        self._utils = utils
+        self._assembler = ScopeAssembler(use_numpy)
+        self._sweeps = deque(maxlen=max_pending)
+        self.dropped = 0
+
+    def __iter__(self) -> "ScopeStream":
+        return self
+
+    def __next__(self) -> ScopeSweep:
+        timeouts = 0
+        # Limit the frames processed in one call, so a sweep is returned even if the data never stops
+        budget = self._sweeps.maxlen * _MAX_DIVISIONS
+        while True:
+            # Return a sweep once all the frames already received are processed
+            if self._sweeps and (budget <= 0 or not getattr(self._utils._ser, "in_waiting", 0)):
+                return self._sweeps.popleft()
+            budget -= 1
+            # Not waiting in the middle of the commands sent by the other threads
+            with self._utils.transaction():
+                frame = self._utils.read_frame()
+                if frame is not None:
+                    # The receive buffer is reused by the next read, the frame is processed before releasing the lock
+                    self._push(self._assembler.feed(frame))
+            if frame is None:
+                timeouts += 1
+                logger.debug("Serial communication timeout (%i/%i)", timeouts, self._utils._read_attempts)
+                if timeouts >= self._utils._read_attempts:
+                    raise CivTimeoutException(f"No scope data received after {timeouts} attempts")
+                continue
+            timeouts = 0
+
+    def _push(self, sweep: Optional[ScopeSweep]) -> None:
+        """Queue a sweep, dropping the oldest one if the queue is full"""
+        if sweep is None:
+            return
+        if len(self._sweeps) == self._sweeps.maxlen:
+            self.dropped += 1
+            logger.debug("Dropping scope sweep, the consumer is too slow (%i dropped)", self.dropped)
+        self._sweeps.append(sweep)
+
+
+class AsyncScopeStream:
+    """
+    Iterate over the sweeps sent by the transceiver from an asyncio event loop
+
+    The scope frames are routed to a bounded queue as soon as they are received, while
+    the replies to other commands keep working as usual. If the consumer is too slow the oldest
+    frames are dropped (the incomplete sweeps are then discarded).
+
+    Example:
+        >>> async with AsyncScopeStream(radio.utils) as sweeps:
+        ...     async for sweep in sweeps:
+        ...         render(sweep.data)
+    """
+
+    _utils: "AsyncUtils"  # Asyncio transport receiving the frames
+    _assembler: ScopeAssembler  # Reassembly of the divisions
+    _max_pending: int  # Sweeps which can be buffered
+    _frames: Optional[asyncio.Queue]  # Scope frames received but not yet processed
+
+    def __init__(self, utils: "AsyncUtils", max_pending: int = 4, use_numpy: Optional[bool] = None):
+        if max_pending < 1:
+            raise ValueError("At least one pending sweep must be allowed")
+        self._utils = utils
+        self._assembler = ScopeAssembler(use_numpy)
+        self._max_pending = max_pending
+        self._frames = None
+
+    async def __aenter__(self) -> "AsyncScopeStream":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.close()
+
+    def __aiter__(self) -> "AsyncScopeStream":
+        return self
+
+    async def __anext__(self) -> ScopeSweep:
+        await self.open()
+        while True:
+            sweep = self._assembler.feed(CivFrame(memoryview(await self._frames.get())))
+            if sweep is not None:
+                return sweep
+
+    async def open(self) -> None:
+        """Start receiving the scope frames"""
+        if self._frames is None:
+            await self._utils.open()
+            # Room for the divisions of the pending sweeps
+            self._frames = self._utils.subscribe(SCOPE_WAVEFORM_COMMAND, maxsize=self._max_pending * _MAX_DIVISIONS)
+
+    def close(self) -> None:
+        """Stop receiving the scope frames"""
+        if self._frames is not None:
+            self._utils.unsubscribe(self._frames)
+            self._frames = None
+            self._assembler.reset()
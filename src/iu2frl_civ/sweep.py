@@ -0,0 +1,126 @@
+"""Frequency sweep: step the VFO across a range and sample the S-meter at each point"""
+
+import logging
+import time
+from array import array
+from typing import TYPE_CHECKING, Iterable, List, NamedTuple, Optional, Tuple
+
+from .bcd import BCD_TO_INT, encode_bcd
+from .exceptions import CivTimeoutException
+from .pipeline import CommandPipeline
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from .utils import Utils
+
+
+logger = logging.getLogger("iu2frl-civ")
+
+# Commands used by the sweep
+SET_FREQUENCY_COMMAND = b"\x05"
+SMETER_COMMAND = b"\x15\x02"
+
+
+class SweepResult(NamedTuple):
+    """Samples of a sweep, one for each frequency"""
+
+    frequencies: array  # Frequency of each point in Hz (array of signed 64 bit integers)
+    smeter: array  # Raw S-meter reading of each point (0000=S0, 0120=S9, 0241=S9+60dB), -1 if the transceiver rejected it
+
+    def __len__(self) -> int:
+        return len(self.frequencies)
+
+    def points(self) -> List[Tuple[int, int]]:
+        """Get the samples as (frequency, S-meter) tuples"""
+        return list(zip(self.frequencies, self.smeter))
+
+
+def run_sweep(
+    utils: "Utils", start_hz: int, stop_hz: int, step_hz: int, dwell_ms: float = 0, frequency_range: Optional[Tuple[int, int]] = None
+) -> SweepResult:
+    """
+    Step the frequency from `start_hz` to `stop_hz` (included if on the grid) and read the S-meter at each point
+
+    The commands are pipelined: after setting a frequency, the S-meter is read once `dwell_ms`
+    have passed, and meanwhile the acknowledge of the frequency and the reading of the previous
+    point are received. The transceiver executes the commands in order, so each reading belongs
+    to the frequency set just before it. The sweep stops at the first point without a reply.
+
+    Args:
+        utils (Utils): the utilities of the transceiver
+        start_hz (int): first frequency
+        stop_hz (int): last frequency
+        step_hz (int): distance between the points
+        dwell_ms (float, optional): time to wait after setting each frequency before reading the S-meter. Defaults to 0.
+        frequency_range (Tuple[int, int], optional): frequencies accepted by the transceiver, in Hz. Defaults to any.
+
+    Returns: the samples of the sweep (-1 for the points rejected by the transceiver)
+
+    Raises:
+        ValueError: if the range or the step are not valid
+        CivTimeoutException: if the transceiver stopped answering
+    """
+    if step_hz <= 0:
+        raise ValueError("The step must be positive")
+    if not 0 <= start_hz <= stop_hz:
+        raise ValueError("The start frequency must be positive and not above the stop frequency")
+    if frequency_range is not None:
+        minimum, maximum = frequency_range
+        if not (minimum <= start_hz and stop_hz <= maximum):
+            raise ValueError(f"Frequency must be between {minimum} Hz and {maximum} Hz")
+    if dwell_ms < 0:
+        raise ValueError("The dwell time cannot be negative")
+    frequencies = array("q", range(start_hz, stop_hz + 1, step_hz))
+    dwell = dwell_ms / 1000
+    # The other threads cannot send commands in the middle of the sweep
+    with utils.transaction():
+        utils.breaker.check()
+        pipeline = CommandPipeline(utils, max_in_flight=2)
+        futures: List[Tuple["Future", "Future"]] = []
+        start = time.monotonic()
+        try:
+            for frequency in frequencies:
+                tuned = pipeline.submit(SET_FREQUENCY_COMMAND, encode_bcd(frequency))
+                if dwell:
+                    # Receive the acknowledge and the previous reading while the receiver settles
+                    settled = time.monotonic() + dwell
+                    while pipeline.in_flight and time.monotonic() < settled:
+                        pipeline.receive()
+                    remaining = settled - time.monotonic()
+                    if remaining > 0:
+                        time.sleep(remaining)
+                futures.append((tuned, pipeline.submit(SMETER_COMMAND)))
+                # A timeout fails all the commands in flight, which belong to the last points
+                _check_timeout(futures[-2:])
+            pipeline.flush()
+            _check_timeout(futures)
+        finally:
+            # The frequency of the transceiver changed without going through send_command
+            utils.state.invalidate()
+    smeter = array("h", (_decode_smeter(tuned, reading) for tuned, reading in futures))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Swept %i points in %.3f seconds", len(frequencies), time.monotonic() - start)
+    return SweepResult(frequencies, smeter)
+
+
+def _check_timeout(futures: Iterable[Tuple["Future", "Future"]]) -> None:
+    """
+    Stop the sweep if some point was not answered
+
+    Raises: CivTimeoutException if a command of the points timed out
+    """
+    for pair in futures:
+        for future in pair:
+            if future.done() and isinstance(future.exception(), CivTimeoutException):
+                raise future.exception()
+
+
+def _decode_smeter(tuned: "Future", reading: "Future") -> int:
+    """Get the raw S-meter value of a point, -1 if the frequency or the reading were rejected (NG)"""
+    if tuned.exception() is not None or reading.exception() is not None:
+        return -1
+    reply = reading.result()
+    if len(reply) != 9:
+        return -1
+    return reply[6] * 100 + BCD_TO_INT[reply[7]]
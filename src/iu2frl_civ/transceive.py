@@ -0,0 +1,194 @@
+"""Mirror of the transceiver state, kept up to date by the CI-V transceive broadcasts"""
+
+import logging
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+from .bcd import BCD_TO_INT, decode_bcd
+from .frame import CivFrame
+
+if TYPE_CHECKING:
+    from .utils import Utils
+
+
+logger = logging.getLogger("iu2frl-civ")
+
+# Address used by the transceiver to broadcast the changes to all the controllers
+BROADCAST_ADDRESS = 0x00
+# Commands updating the frequency (transceive broadcast and reply to the read command)
+FREQUENCY_COMMANDS = (0x00, 0x03)
+# Commands updating the mode and filter (transceive broadcast and reply to the read command)
+MODE_COMMANDS = (0x01, 0x04)
+# Commands sent by the controller which change the frequency or the mode without a broadcast
+INVALIDATING_COMMANDS = (0x00, 0x01, 0x05, 0x06, 0x07, 0x08)
+
+
+class RadioState:
+    """
+    Last known state of the transceiver
+
+    The state is updated from the transceive broadcasts (sent by the transceiver when the
+    frequency or the mode are changed from the front panel, if CI-V transceive is enabled)
+    and from the replies to the frequency and mode readings.
+    """
+
+    __slots__ = ("frequency", "mode", "filter", "timestamp", "live")
+
+    frequency: Optional[int]  # Operating frequency in Hz, None if unknown
+    mode: Optional[int]  # Operating mode (OperatingMode value), None if unknown
+    filter: Optional[int]  # Selected filter (SelectedFilter value), None if unknown
+    timestamp: float  # Time of the last update (seconds since the epoch), 0 if never updated
+    live: bool  # True while the transceive listener is running, so the state follows the transceiver
+
+    def __init__(self):
+        self.frequency = None
+        self.mode = None
+        self.filter = None
+        self.timestamp = 0.0
+        self.live = False
+
+    def __repr__(self) -> str:
+        return f"RadioState(frequency={self.frequency}, mode={self.mode}, filter={self.filter}, timestamp={self.timestamp:.3f}, live={self.live})"
+
+    def invalidate(self) -> None:
+        """Forget the frequency and the mode, until they are received again"""
+        self.frequency = None
+        self.mode = None
+        self.filter = None
+
+    def update(self, frame: CivFrame) -> bool:
+        """
+        Update the state from a frame sent by the transceiver
+
+        Returns: True if the frame carried the frequency or the mode
+        """
+        command = frame.command
+        if command in FREQUENCY_COMMANDS:
+            # Frequency in BCD, least significant byte first (4 bytes on the older transceivers)
+            data = frame.data()
+            if not 4 <= len(data) <= 5:
+                return False
+            self.frequency = decode_bcd(data)
+        elif command in MODE_COMMANDS:
+            # Mode in BCD, followed by the filter (not sent by all the transceivers)
+            data = frame.data()
+            if not 1 <= len(data) <= 2:
+                return False
+            self.mode = BCD_TO_INT[data[0]]
+            self.filter = BCD_TO_INT[data[1]] if len(data) == 2 else None
+        else:
+            return False
+        self.timestamp = time.time()
+        return True
+
+
+class TransceiveListener:
+    """
+    Read the serial port in a background thread, to receive the transceive broadcasts
+
+    While the listener is running it is the only reader of the serial port: the broadcasts
+    update the RadioState, all the other frames are queued for the commands waiting a reply.
+
+    Example:
+        >>> radio.start_transceive_listener()
+        >>> radio.read_operating_frequency()  # no CI-V traffic once the frequency is known
+    """
+
+    _utils: "Utils"  # Utilities owning the serial port and the state
+    _frames: "queue.Queue[CivFrame]"  # Frames which are not broadcasts (replies to the commands)
+    _thread: Optional[threading.Thread]  # Background reader
+    _running: threading.Event  # Cleared to stop the reader
+
+    def __init__(self, utils: "Utils", queue_size: int = 64):
+        self._utils = utils
+        self._frames = queue.Queue(queue_size)
+        self._thread = None
+        self._running = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        """True if the background reader is running"""
+        return self._running.is_set()
+
+    def start(self) -> None:
+        """Start the background reader"""
+        if self._running.is_set():
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="iu2frl-civ-transceive", daemon=True)
+        self._thread.start()
+        self._utils.state.live = True
+        logger.debug("Transceive listener started")
+
+    def stop(self) -> None:
+        """Stop the background reader and wait for it to exit"""
+        if not self._running.is_set():
+            return
+        self._running.clear()
+        self._utils.state.live = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        logger.debug("Transceive listener stopped")
+
+    def clear(self) -> None:
+        """Discard the frames which were not read yet"""
+        try:
+            while True:
+                self._frames.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _drop_oldest(self) -> None:
+        """Discard the oldest frame which was not read yet"""
+        try:
+            self._frames.get_nowait()
+        except queue.Empty:
+            pass
+
+    def get_frame(self, timeout: float) -> Optional[CivFrame]:
+        """
+        Get the next frame which is not a broadcast
+
+        Returns: the frame, None if no frame was received before the timeout
+        """
+        try:
+            return self._frames.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _run(self) -> None:
+        """Read the frames until the listener is stopped (runs in the background thread)"""
+        utils = self._utils
+        try:
+            while self._running.is_set():
+                try:
+                    frame = utils._reader.read_frame()
+                except Exception as e:  # pylint: disable=broad-except
+                    logger.error("Transceive listener stopped, cannot read from the serial port: %s", e)
+                    return
+                if frame is None:
+                    continue
+                if frame.target == BROADCAST_ADDRESS and frame.source == utils.transceiver_address[0]:
+                    try:
+                        if utils.state.update(frame):
+                            continue
+                    except ValueError as e:
+                        # Broadcast corrupted by noise on the bus
+                        logger.debug("Ignoring broadcast which is not valid: %s", e)
+                        continue
+                # The receive buffer is reused by the next read, the queued frame needs its own copy
+                copy = CivFrame(memoryview(frame.tobytes()))
+                while True:
+                    try:
+                        self._frames.put_nowait(copy)
+                        break
+                    except queue.Full:
+                        # Nobody is waiting for the replies, drop the oldest one
+                        self._drop_oldest()
+        finally:
+            # Whatever stopped the reader, the commands must read the serial port again
+            self._running.clear()
+            utils.state.live = False
@@ -1,29 +1,101 @@
 import logging
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
 from serial import Serial
 
-from .exceptions import CivCommandException, CivTimeoutException
+from .bcd import BCD_TO_INT, FREQUENCY_WIDTH, decode_bcd, encode_bcd, encode_bcd_big_endian
+from .breaker import CircuitBreaker
+from .exceptions import CivCollisionException, CivCommandException, CivTimeoutException
+from .frame import CivFrame, FrameReader
+from .latency import LatencyTracker
+from .pipeline import CommandPipeline
+from .meters import MeterCalibration, decode_meter_reply, linear_interpolate
+from .transceive import FREQUENCY_COMMANDS, INVALIDATING_COMMANDS, MODE_COMMANDS, RadioState, TransceiveListener
 
 
 logger = logging.getLogger("iu2frl-civ")
 
 
+class HexBytes:
+    """
+    Hexadecimal representation of some bytes for the log messages
+
+    The conversion only happens when the message is actually emitted, so it costs
+    nothing if the debug logging is disabled.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __str__(self) -> str:
+        return "0x" + " 0x".join(f"{byte:02X}" for byte in self.data)
+
+
 class Utils:
     """List of utilities for the CI-V communication"""
     _ser: Serial # Serial port object
-    transceiver_address: bytes # Transceiver address
-    controller_address: bytes # Controller address
+    _transceiver_address: bytes # Transceiver address
+    _controller_address: bytes # Controller address
+    _header: bytes # Preamble and addresses starting every frame sent, built when the addresses are set
+    _frame_templates: Dict[bytes, bytes] # Complete frames of the commands sent without data, by command
     _read_attempts: int # Number of read attempts
+    _reader: FrameReader # Reader splitting the received data into frames
+    _listener: Optional[TransceiveListener] = None # Background reader of the transceive broadcasts
+    _unanswered: Optional[bytes] = None # Last command sent without reading its reply, its echo can still be received
+    state: RadioState # Last known state of the transceiver
+    latency: LatencyTracker # Round-trip time of the commands
+    breaker: CircuitBreaker # Rejects the commands when the transceiver stopped answering
+    _transaction_lock: threading.RLock # Held while a command waits for its reply, so the threads sharing the device cannot read each other's replies
+    adaptive_timeout: bool = True # Adapt the read timeout to the measured round-trip time
+    frame_template_limit: int = 256 # Maximum number of frames kept in _frame_templates
+    collision_retries: int = 3 # How many times a command is sent again after a collision
+    collision_backoff: float = 0.02 # Base of the random wait before sending again after a collision (seconds)
     fake: bool = False # Fake mode
     debug: bool = False # Debug mode
     logger: logging.Logger = logger # Logger instance
 
     def __init__(self, serial: Serial, transceiver_address, controller_address, read_attempts, fake=False):
         self._ser = serial
-        self.transceiver_address = transceiver_address
-        self.controller_address = controller_address
+        self._transceiver_address = transceiver_address
+        self._controller_address = controller_address
+        self._compile_header()
         self._read_attempts = read_attempts
+        self._reader = FrameReader(serial)
+        self.state = RadioState()
+        self.latency = LatencyTracker(getattr(serial, "timeout", None) or 1)
+        self.breaker = CircuitBreaker(self)
+        self._transaction_lock = threading.RLock()
         self.fake = fake
 
+    @property
+    def transceiver_address(self) -> bytes:
+        """Address of the transceiver"""
+        return self._transceiver_address
+
+    @transceiver_address.setter
+    def transceiver_address(self, address: bytes) -> None:
+        self._transceiver_address = address
+        self._compile_header()
+
+    @property
+    def controller_address(self) -> bytes:
+        """Address of the controller"""
+        return self._controller_address
+
+    @controller_address.setter
+    def controller_address(self, address: bytes) -> None:
+        self._controller_address = address
+        self._compile_header()
+
+    def _compile_header(self) -> None:
+        """Build the start of the frames for the current addresses, the frames built for the old ones are dropped"""
+        self._header = b"\xfe\xfe" + self._transceiver_address + self._controller_address
+        self._frame_templates = {}
+
     def encode_2_bytes_value(self, value: int) -> bytes:
         """
         Encodes a integer value into two bytes (little endian)
@@ -44,19 +116,7 @@ class Utils:
             10000 => b'\x01\x00\x00'
             123456 => b'\x12\x34\x56'
         """
-        if value < 0:
-            raise ValueError("Negative values are not supported")
-        encoded = []
-        while value > 0:
-            low = value % 10
-            high = (value // 10) % 10
-            encoded.append((high << 4) | low)  # Store as two-digit decimal BCD
-            value //= 100  # Move to the next two-digit pair
-        # Ensure at least two bytes (for numbers < 100)
-        while len(encoded) < 2:
-            encoded.append(0x00)
-        encoded.reverse()
-        return bytes(encoded)
+        return encode_bcd_big_endian(value)
 
     def send_command(self, command: bytes, data: bytes = b"", preamble: bytes = b"", no_reply: bool = False) -> bytes:
         """
@@ -64,88 +124,321 @@ class Utils:
 
         Returns: the response from the transceiver
         """
+        with self._transaction_lock:
+            frame = self._send_command_frame(command, data, preamble, no_reply)
+            if frame is None:
+                return b""
+            # Copied before another thread can reuse the receive buffer
+            return frame.tobytes()
+
+    def send_command_frame(self, command: bytes, data: bytes = b"", preamble: bytes = b"", no_reply: bool = False) -> Optional[CivFrame]:
+        """
+        Send a command to the radio transceiver
+
+        Returns: the response from the transceiver as a view over the receive buffer (valid until the next command,
+            use `transaction()` when other threads are sending commands), None if no reply was expected
+
+        Raises: CivUnavailableException (a CivTimeoutException) without sending the command if the transceiver stopped answering
+        """
+        with self._transaction_lock:
+            return self._send_command_frame(command, data, preamble, no_reply)
+
+    def _send_command_frame(self, command: bytes, data: bytes, preamble: bytes, no_reply: bool) -> Optional[CivFrame]:
+        """Send a command and read its reply (the transaction lock must be held)"""
+        if not preamble:
+            # The wake-up preamble powers on the transceiver, which is not answering until then
+            self.breaker.check()
+        command_string = self.build_command(command, data, preamble)
+        # Checked once per command, the debug messages are skipped entirely when disabled
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Sending command: %s (length: %i)", HexBytes(command_string), len(command_string))
+        if command[0] in INVALIDATING_COMMANDS:
+            self.state.invalidate()
+        if self._listener is not None:
+            # Discard the replies nobody waited for, so they cannot be taken for the reply to this command
+            self._listener.clear()
+        for collision in range(self.collision_retries + 1):
+            # Send the command to the COM port
+            sent = time.perf_counter()
+            self._ser.write(command_string)
+            # Some transceivers (like IC-821H) have no reply for some commands, so we can skip reading the reply
+            if no_reply:
+                if debug:
+                    logger.debug("No reply expected for this command")
+                # The echo is read with the reply to the next command
+                self._unanswered = command_string
+                return None
+            try:
+                frame = self._read_reply(command_string, command[0], sent, debug)
+                self.breaker.record_success()
+                return frame
+            except CivTimeoutException:
+                self.breaker.record_timeout()
+                raise
+            except CivCommandException:
+                # NG reply, but the transceiver is answering
+                self.breaker.record_success()
+                raise
+            except CivCollisionException:
+                if collision == self.collision_retries:
+                    raise
+            finally:
+                if self.adaptive_timeout:
+                    # Other readers (like the scope stream) expect the timeout the port was opened with
+                    self._set_timeout(self.latency.max_timeout)
+            # Wait for a random time before sending again, so the colliding controllers do not retry together
+            backoff = random.uniform(0, self.collision_backoff * 2**collision)
+            if debug:
+                logger.debug("Collision on the bus, sending again in %.3f seconds (%i/%i)", backoff, collision + 1, self.collision_retries)
+            time.sleep(backoff)
+            # Discard the remains of the collided frames
+            self._reader.clear()
+            if hasattr(self._ser, "reset_input_buffer"):
+                self._ser.reset_input_buffer()
+            if self._listener is not None:
+                self._listener.clear()
+
+    def _set_timeout(self, timeout: float) -> None:
+        """Change the read timeout of the serial port, if needed (reconfiguring the port is a system call)"""
+        if getattr(self._ser, "timeout", None) != timeout:
+            self._ser.timeout = timeout
+
+    def _read_reply(self, command_string: bytes, command: int, sent: float, debug: bool) -> CivFrame:
+        """
+        Read the reply to a command which was just sent
+
+        Args:
+            command (int): the command byte, to measure its round-trip time
+            sent (float): when the command was sent (time.perf_counter)
+
+        Returns: the reply frame
+
+        Raises:
+            CivTimeoutException: if no reply is received
+            CivCommandException: if the transceiver replied with NG
+            CivCollisionException: if a collision is detected on the bus
+        """
+        for i in range(self._read_attempts):
+            if self.adaptive_timeout:
+                self._set_timeout(self.latency.timeout(command, i))
+            # Read data from the serial port until the terminator byte
+            frame = self.read_frame()
+            # Check if the respose was empty (timeout)
+            if frame is None:
+                self.latency.record_timeout(command)
+                if debug:
+                    logger.debug("Serial communication timeout (%i/%i)", i + 1, self._read_attempts)
+                continue
+            if debug:
+                logger.debug("Received message: %s (length: %i)", HexBytes(frame.raw), len(frame))
+            # Check the response
+            if self.validate_frame(command_string, frame, debug):
+                self.latency.record(command, time.perf_counter() - sent)
+                if frame.command in FREQUENCY_COMMANDS or frame.command in MODE_COMMANDS:
+                    self._update_state(frame)
+                return frame
+            if frame.target == 0x00 and frame.source == self._transceiver_address[0]:
+                # Transceive broadcast received while waiting for the reply
+                self._update_state(frame)
+        # Return the result to the user
+        raise CivTimeoutException(f"Communication timeout occurred after {self._read_attempts} attempts")
+
+    def _update_state(self, frame: CivFrame) -> None:
+        """Update the state of the transceiver from a frame, ignoring the data which is not valid"""
+        try:
+            self.state.update(frame)
+        except ValueError as e:
+            logger.debug("Not updating the state from a frame which is not valid: %s", e)
+
+    def read_frame(self) -> Optional[CivFrame]:
+        """
+        Read the next frame sent by the transceiver
+
+        If the transceive listener is running, the frame is taken from its queue (broadcasts excluded).
+
+        Returns: the frame, None if nothing was received before the timeout
+        """
+        if self._listener is None or not self._listener.running:
+            return self._reader.read_frame()
+        timeout = getattr(self._ser, "timeout", None)
+        return self._listener.get_frame(timeout if timeout else 1)
+
+    def start_listener(self) -> RadioState:
+        """
+        Start reading the serial port in the background, to keep the state updated from the transceive broadcasts
+
+        Returns: the state of the transceiver
+        """
+        if self._listener is None:
+            self._listener = TransceiveListener(self)
+        self._listener.start()
+        return self.state
+
+    def stop_listener(self) -> None:
+        """Stop the background reader started by `start_listener`"""
+        if self._listener is not None:
+            listener = self._listener
+            self._listener = None
+            listener.stop()
+
+    def send_commands(self, commands: Iterable[Tuple[bytes, bytes]], max_in_flight: int = 4) -> List[bytes]:
+        """
+        Send a batch of commands to the radio transceiver without waiting for each reply
+
+        Args:
+            commands: a list of (command, data) tuples
+            max_in_flight (int, optional): how many commands can wait for a reply at the same time. Defaults to 4.
+
+        Returns: the responses from the transceiver, in the same order of the commands
+        """
+        with self._transaction_lock:
+            self.breaker.check()
+            return CommandPipeline(self, max_in_flight=max_in_flight).run(commands)
+
+    def transaction(self) -> threading.RLock:
+        """
+        Get the lock held while each command waits for its reply
+
+        The commands are already safe to send from several threads. Hold the lock to send
+        a sequence of commands without the other threads sending theirs in the middle.
+
+        Example:
+            >>> with radio.utils.transaction():
+            ...     radio.send_operating_frequency(7074000)
+            ...     level = radio.read_smeter()
+        """
+        return self._transaction_lock
+
+    def build_command(self, command: bytes, data: bytes = b"", preamble: bytes = b"") -> bytes:
+        """
+        Build the CI-V frame to send a command to the transceiver
+
+        The frames of the commands without data (the readings) are built and validated only the first
+        time, then they are taken from the templates.
+
+        Returns: the frame to be written to the serial port
+        """
+        if not data and not preamble:
+            frame = self._frame_templates.get(command)
+            if frame is not None:
+                return frame
+            frame = self._build_frame(command, b"", b"")
+            if len(self._frame_templates) < self.frame_template_limit:
+                self._frame_templates[command] = frame
+            return frame
+        return self._build_frame(command, data, preamble)
+
+    def frame_template(self, command: bytes, data: bytes = b"") -> bytes:
+        """
+        Build the frame of a command once and keep it, for the commands always sent with the same data
+
+        The frames kept are used by `build_command` as well.
+
+        Returns: the frame to be written to the serial port
+        """
+        key = command + data
+        frame = self._frame_templates.get(key)
+        if frame is None:
+            frame = self._build_frame(command, data, b"")
+            if len(self._frame_templates) < self.frame_template_limit:
+                self._frame_templates[key] = frame
+        return frame
+
+    def _build_frame(self, command: bytes, data: bytes, preamble: bytes) -> bytes:
+        """Validate the command and assemble its frame"""
         if command is None or not isinstance(command, bytes):
             raise ValueError("Command must be a non-empty byte string")
-        if len(command) not in [1, 2, 3, 4]:
+        if not 1 <= len(command) <= 4:
             raise ValueError("Command must be 1-4 bytes long (command with an optional subcommand up to 3 bytes)")
         # The command is composed of:
-        # - 0xFE 0xFE is the preamble
+        # - 0xFE 0xFE is the preamble (after the wake-up preamble, if any)
         # - the transceiver address
         # - the controller address
         # - 0xFD is the terminator
-        command_string = preamble + b"\xfe\xfe" + self.transceiver_address + self.controller_address + command + data + b"\xfd"
-        logger.debug("Sending command: %s (length: %i)", self.bytes_to_string(command_string), len(command_string))
-        # Send the command to the COM port
-        self._ser.write(command_string)
-        # Some transceivers (like IC-821H) have no reply for some commands, so we can skip reading the reply
-        if no_reply:
-            logger.debug("No reply expected for this command")
-            return b""
-        # Read the response from the transceiver
-        reply = ""
-        valid_reply = False
-        for i in range(self._read_attempts):
-            # Read data from the serial port until the terminator byte
-            reply = self._ser.read_until(expected=b"\xfd")
-            logger.debug("Received message: %s (length: %i)", self.bytes_to_string(reply), len(reply))
-            # Check if we received an echo message
-            if reply == command_string:
-                i -= 1  # Decrement cycles as it is just the echo back
+        return b"".join((preamble, self._header, command, data, b"\xfd"))
+
+    def validate_reply(self, command_string: bytes, reply: bytes) -> bool:
+        """
+        Check if a message received from the transceiver is the reply to a command
+
+        Returns: True if the message is the reply, False if it should be ignored (echo or not for us)
+
+        Raises: CivCommandException if the transceiver replied with NG
+        """
+        return self.validate_frame(command_string, CivFrame(memoryview(reply)))
+
+    def validate_frame(self, command_string: bytes, frame: CivFrame, debug: bool = True) -> bool:
+        """
+        Check if a frame received from the transceiver is the reply to a command
+
+        Args:
+            debug (bool, optional): emit the debug messages, if the logger is enabled for them. Defaults to True.
+
+        Returns: True if the frame is the reply, False if it should be ignored (echo or not for us)
+
+        Raises:
+            CivCommandException: if the transceiver replied with NG
+            CivCollisionException: if the frame shows a collision on the bus
+        """
+        # Check if we received an echo message (the wake-up preamble is not part of the echoed frame)
+        if len(frame) <= len(command_string) and frame.raw == command_string[len(command_string) - len(frame):]:
+            if debug:
                 logger.debug("Ignoring echo message")
-            # Check the response
-            elif len(reply) > 2:
-                target_controller: bytes = reply[2].to_bytes(1, "big")  # Target address of the reply from the transceiver
-                source_transceiver: bytes = reply[3].to_bytes(1, "big")  # Source address of the reply from the transceiver
-                reply_code: bytes = reply[len(reply) - 2].to_bytes(1, "big")  # Command reply status code
-                # Check if the response is for us
-                if target_controller != self.controller_address or source_transceiver != self.transceiver_address:
-                    logger.debug(
-                        "Ignoring message which is not for us " + f"(received: {self.bytes_to_string(source_transceiver)} -> {self.bytes_to_string(target_controller)} " + f"but we are using: {self.bytes_to_string(self.transceiver_address)} -> {self.bytes_to_string(self.controller_address)})"
-                    )
-                    i -= 1  # Decrement cycles to ignore messages not for us
-                # Check the return code (0xFA is only returned in case of error)
-                elif reply_code == bytes.fromhex("FA"):  # 0xFA (not good)
-                    logger.debug("Reply status: NG (%s)", self.bytes_to_string(reply_code))
-                    raise CivCommandException("Reply status: NG", reply_code)
-                else:
-                    logger.debug("Reply status: OK (0xFB)")
-                    valid_reply = True
-                    break
-            # Check if the respose was empty (timeout)
-            else:
-                logger.debug("Serial communication timeout (%i/%i)", i + 1, self._read_attempts)
-        # Return the result to the user
-        if not valid_reply:
-            raise CivTimeoutException(f"Communication timeout occurred after {i+1} attempts")
-        else:
-            return reply
+            return False
+        # A jam code or a corrupted echo of our command means the frame collided with another one
+        if frame.is_jammed:
+            if debug:
+                logger.debug("Jam code received")
+            raise CivCollisionException("Jam code received on the bus")
+        if frame.source == self._controller_address[0] and frame.target == self._transceiver_address[0]:
+            unanswered = self._unanswered
+            if unanswered is not None and frame.raw == unanswered[len(unanswered) - len(frame):]:
+                self._unanswered = None
+                if debug:
+                    logger.debug("Ignoring echo of a command sent without reading the reply")
+                return False
+            # The frame sent, without the wake-up preamble
+            sent = command_string[command_string.find(self._header):]
+            if len(frame) == len(sent) or (len(frame) < len(sent) and sent.startswith(frame.raw[:-1])):
+                if debug:
+                    logger.debug("Corrupted echo message: %s", HexBytes(frame.raw))
+                raise CivCollisionException("Corrupted echo received on the bus")
+            if debug:
+                logger.debug("Ignoring echo of a previous command: %s", HexBytes(frame.raw))
+            return False
+        # Check if the response is for us
+        if frame.target != self._controller_address[0] or frame.source != self._transceiver_address[0]:
+            if debug:
+                logger.debug(
+                    "Ignoring message which is not for us (received: 0x%02X -> 0x%02X but we are using: %s -> %s)",
+                    frame.source, frame.target, HexBytes(self.transceiver_address), HexBytes(self.controller_address)
+                )
+            return False
+        # Check the return code (0xFA is only returned in case of error)
+        if frame.is_ng:
+            if debug:
+                logger.debug("Reply status: NG (0xFA)")
+            raise CivCommandException("Reply status: NG", b"\xfa")
+        if debug:
+            logger.debug("Reply status: OK (0xFB)")
+        return True
 
     def decode_frequency(self, bcd_bytes) -> int:
-        """Decode BCD-encoded frequency bytes to a frequency in Hz"""
-        # Reverse the bytes for little-endian interpretation
-        reversed_bcd = bcd_bytes[::-1]
-        # Convert each byte to its two-digit BCD representation
-        frequency_bcd = "".join(f"{byte:02X}" for byte in reversed_bcd)
-        return int(frequency_bcd)  # Convert to integer (frequency in Hz)
-
-    def encode_frequency(self, frequency) -> bytes:
-        """Convert the frequency to the CI-V representation"""
-        frequency_str = str(frequency).rjust(10, "0")
-        inverted_freq = frequency_str[::-1]
-        hex_list = [f"0x{inverted_freq[1]}{inverted_freq[0]}"]
-        hex_list.append(f"0x{inverted_freq[3]}{inverted_freq[2]}")
-        hex_list.append(f"0x{inverted_freq[5]}{inverted_freq[4]}")
-        hex_list.append(f"0x{inverted_freq[7]}{inverted_freq[6]}")
-        hex_list.append(f"0x{inverted_freq[9]}{inverted_freq[8]}")
-        return bytes([int(hx, 16) for hx in hex_list])
+        """Decode BCD-encoded frequency bytes (least significant byte first) to a frequency in Hz"""
+        return decode_bcd(bcd_bytes)
+
+    def encode_frequency(self, frequency, width: int = FREQUENCY_WIDTH) -> bytes:
+        """Convert the frequency to the CI-V representation (use WIDE_FREQUENCY_WIDTH above 10 GHz)"""
+        return encode_bcd(int(frequency), width)
 
     def bytes_to_string(self, bytes_array: bytearray) -> str:
         """Convert a byte array to a string"""
-        return "0x" + " 0x".join(f"{byte:02X}" for byte in bytes_array)
+        return str(HexBytes(bytes_array))
 
     def bytes_to_int(self, first_byte: bytes, second_byte: bytes) -> int:
         """Convert a byte array to an integer"""
-        return (int(first_byte) * 100) + int(f"{second_byte:02X}")
+        return (int(first_byte) * 100) + BCD_TO_INT[second_byte]
 
     def linear_interpolate(self, raw_value: int, points: list) -> float:
         """
@@ -158,25 +451,15 @@ class Utils:
         Returns:
             float: The interpolated or exact value.
         """
-        # Check if raw_value matches any known point
-        for point in points:
-            if raw_value == point[0]:
-                return float(point[1])
-
-        # Perform linear interpolation between points
-        for i in range(len(points) - 1):
-            x0, y0 = points[i]
-            x1, y1 = points[i + 1]
-            if x0 < raw_value < x1:
-                return y0 + (y1 - y0) * (raw_value - x0) / (x1 - x0)
-
-        # Handle out-of-range values
-        if raw_value < points[0][0]:
-            return float(points[0][1])
-        if raw_value > points[-1][0]:
-            return float(points[-1][1])
-
-        return -1.0  # Return -1 if interpolation is not possible
+        return linear_interpolate(raw_value, points)
+
+    def decode_meter_reply(self, reply: bytes, calibration: MeterCalibration) -> float:
+        """
+        Decode the reply to a meter reading command (0x15) using the meter calibration
+
+        Returns: the calibrated value, -1 if the reply is not valid
+        """
+        return decode_meter_reply(reply, calibration)
 
     def convert_to_range(self, input_value, old_min, old_max, new_min, new_max):
         """Convert an input value from a range to a new one"""
@@ -0,0 +1,185 @@
+"""
+Virtual transceiver answering on a pseudo-terminal, to test the real serial transport without a radio
+
+Only available on the systems providing pseudo-terminals (Linux, macOS). Run it as a separate process:
+
+    python -m iu2frl_civ.virtual_radio --device IC_7300
+
+then connect to the printed port with `DeviceFactory.get_repository(radio_address="0x94", port="/dev/pts/N")`.
+"""
+
+import argparse
+import logging
+import os
+import select
+import threading
+import time
+import tty
+from typing import Optional
+
+from .emulator import RadioEmulator
+from .enums import DeviceType
+
+logger = logging.getLogger("iu2frl-civ")
+
+# Bits sent on the line for each byte (start bit, 8 data bits, stop bit)
+BITS_PER_BYTE = 10
+
+
+class VirtualRadio:
+    """
+    RadioEmulator connected to a pseudo-terminal
+
+    The controller opens `port` like the serial port of a real transceiver, so the commands go through
+    `serial.Serial` and the buffering of the operating system. The replies are delayed by the time the
+    frames take on a serial line at `baudrate` (unless `pacing` is disabled), plus the processing `latency`.
+
+    Example:
+        >>> with VirtualRadio(RadioEmulator.for_device(DeviceType.IC_7300)) as virtual:
+        ...     radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, port=virtual.port)
+        ...     radio.read_operating_frequency()
+        14074000
+
+    Args:
+        emulator (RadioEmulator): the emulated transceiver
+        baudrate (int, optional): speed of the emulated serial line. Defaults to 19200.
+        latency (float, optional): processing time of each command in seconds. Defaults to 0.
+        echo (bool, optional): echo the frames sent, like the CI-V bus. Defaults to False (like the USB port).
+        pacing (bool, optional): delay the replies by the time taken on the serial line. Defaults to True.
+    """
+
+    emulator: RadioEmulator  # Emulated transceiver
+    baudrate: int  # Speed of the emulated serial line
+    latency: float  # Processing time of each command in seconds
+    echo: bool  # Echo the frames sent by the controller
+    pacing: bool  # Delay the frames by the time taken on the serial line
+    port: str  # Path of the pseudo-terminal to be opened by the controller
+    frames: int  # Frames received from the controller
+    _master: int  # File descriptor of the transceiver side
+    _slave: int  # File descriptor of the controller side, kept open so the transceiver side survives the controller closing it
+    _buffer: bytearray  # Bytes received which are not a complete frame yet
+    _write_lock: threading.Lock  # Serializes the writes of the replies and the broadcasts
+    _stop: threading.Event  # Set to stop the server thread
+    _thread: Optional[threading.Thread]  # Server thread
+
+    def __init__(self, emulator: RadioEmulator, baudrate: int = 19200, latency: float = 0, echo: bool = False, pacing: bool = True):
+        self.emulator = emulator
+        self.baudrate = baudrate
+        self.latency = latency
+        self.echo = echo
+        self.pacing = pacing
+        self.frames = 0
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._buffer = bytearray()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        """True if the server thread is running"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "VirtualRadio":
+        """Start answering on the pseudo-terminal"""
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._serve, name="iu2frl-civ-virtual-radio", daemon=True)
+            self._thread.start()
+            logger.debug("Virtual %s (0x%02X) listening on %s", self.emulator.profile.name, self.emulator.address, self.port)
+        return self
+
+    def stop(self) -> None:
+        """Stop answering, the pseudo-terminal stays open"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        """Stop answering and close the pseudo-terminal"""
+        self.stop()
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "VirtualRadio":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def tune(self, frequency_hz: int) -> None:
+        """Change the frequency from the front panel, sending the transceive broadcast"""
+        for frame in self.emulator.tune(frequency_hz):
+            self._send(frame)
+
+    def _line_time(self, length: int) -> float:
+        """Time taken by some bytes on the serial line"""
+        return length * BITS_PER_BYTE / self.baudrate if self.pacing else 0
+
+    def _send(self, frame: bytes) -> None:
+        """Send a frame to the controller, after the time it takes on the serial line"""
+        with self._write_lock:
+            delay = self._line_time(len(frame))
+            if delay:
+                time.sleep(delay)
+            os.write(self._master, frame)
+
+    def _serve(self) -> None:
+        """Answer the frames sent by the controller (runs in the server thread)"""
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._master], [], [], 0.1)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._master, 4096)
+            except OSError as e:
+                logger.error("Virtual radio stopped, cannot read from %s: %s", self.port, e)
+                break
+            if self.echo:
+                self._send(data)
+            self._buffer += data
+            while True:
+                end = self._buffer.find(b"\xfd")
+                if end < 0:
+                    break
+                frame = bytes(self._buffer[: end + 1])
+                del self._buffer[: end + 1]
+                self.frames += 1
+                # The command is received only after it went through the serial line
+                delay = self._line_time(len(frame)) + self.latency
+                if delay:
+                    time.sleep(delay)
+                for reply in self.emulator.handle(frame):
+                    self._send(reply)
+
+
+def main(args: Optional[list] = None) -> None:
+    """Run a virtual transceiver until interrupted"""
+    parser = argparse.ArgumentParser(description="Virtual ICOM transceiver answering on a pseudo-terminal")
+    parser.add_argument("--device", choices=[device.name for device in DeviceType], default=DeviceType.IC_7300.name, help="transceiver model")
+    parser.add_argument("--address", type=lambda value: int(value, 16), help="CI-V address in hex (default of the model if omitted)")
+    parser.add_argument("--baudrate", type=int, default=19200, help="speed of the emulated serial line")
+    parser.add_argument("--latency", type=float, default=0, help="processing time of each command in seconds")
+    parser.add_argument("--echo", action="store_true", help="echo the frames sent, like the CI-V bus")
+    parser.add_argument("--no-pacing", action="store_true", help="reply immediately, regardless of the baudrate")
+    options = parser.parse_args(args)
+
+    emulator = RadioEmulator.for_device(DeviceType[options.device], options.address)
+    with VirtualRadio(emulator, options.baudrate, options.latency, options.echo, not options.no_pacing) as virtual:
+        print(f"Virtual {emulator.profile.name} (0x{emulator.address:02X}) on {virtual.port}", flush=True)
+        try:
+            while virtual.running:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        print(f"Received {virtual.frames} frames")
+
+
+if __name__ == "__main__":
+    main()
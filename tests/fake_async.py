@@ -0,0 +1,86 @@
+"""Sample code to show how the asyncio version of the library works"""
+
+import asyncio
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.async_device_base import AsyncDeviceBase
+    from iu2frl_civ.breaker import BreakerState
+    from iu2frl_civ.enums import OperatingMode, SelectedFilter
+    from iu2frl_civ.exceptions import CivTimeoutException, CivUnavailableException
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    import sys
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.async_device_base import AsyncDeviceBase
+    from src.iu2frl_civ.breaker import BreakerState
+    from src.iu2frl_civ.enums import OperatingMode, SelectedFilter
+    from src.iu2frl_civ.exceptions import CivTimeoutException, CivUnavailableException
+
+    print("Using local library")
+
+
+# Main program
+async def main():
+    """Connect to the transceiver and get some data"""
+    print("Connecting to the transceiver")
+    async with AsyncDeviceBase(radio_address="0x94", port="COM10", fake=True) as radio:
+        print(f"- Connected to the transceiver at {radio._ser.port} with baudrate {radio._ser.baudrate}bps")
+        print(f"- Transceiver address: {await radio.read_transceiver_id()}")
+        new_frequency = 28202000
+        print(f"- Setting new frequency to {new_frequency}")
+        await radio.send_operating_frequency(new_frequency)
+        print(f"- Current frequency: {await radio.read_operating_frequency()} Hz")
+        print("- Setting new mode to USB with filter FIL2")
+        await radio.set_operating_mode(OperatingMode.USB, SelectedFilter.FIL2)
+        print(f"- S-Meter level: {await radio.read_smeter()}")
+        print("Reading the frequency from multiple tasks")
+        results = await asyncio.gather(*(radio.read_operating_frequency() for _ in range(10)))
+        print(f"- Received {len(results)} replies")
+
+    print("Circuit breaker of a transceiver powered off")
+    async with AsyncDeviceBase(radio_address="0x94", timeout=0.02, fake=True) as radio:
+        emulator = radio._ser.emulator
+        breaker = radio.utils.breaker
+        breaker.probe_interval = 0.05
+        emulator.powered = False
+        for _ in range(breaker.failure_threshold):
+            try:
+                await radio.read_operating_frequency()
+                raise AssertionError("The timeout was not detected")
+            except CivUnavailableException as e:
+                raise AssertionError("The breaker opened too early") from e
+            except CivTimeoutException:
+                pass
+        try:
+            await radio.read_operating_frequency()
+            raise AssertionError("The command was not rejected")
+        except CivUnavailableException as e:
+            print(f"- {e}")
+        print("- Closing the breaker when the transceiver answers the probe")
+        emulator.powered = True
+        for _ in range(200):
+            if breaker.state is BreakerState.CLOSED:
+                break
+            await asyncio.sleep(0.01)
+        assert breaker.state is BreakerState.CLOSED
+        assert await radio.read_operating_frequency() == emulator.vfos[0].frequency
+        print("- Powering on the transceiver with the breaker open")
+        emulator.powered = False
+        for _ in range(breaker.failure_threshold):
+            try:
+                await radio.read_operating_frequency()
+            except CivTimeoutException:
+                pass
+        assert breaker.state is not BreakerState.CLOSED
+        await radio.power_on()
+        assert emulator.powered and breaker.state is BreakerState.CLOSED
+        assert await radio.read_operating_frequency() == emulator.vfos[0].frequency
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""
+Test the BCD codec used for the frequencies and the other values
+"""
+
+import importlib.util
+import random
+import sys
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ import bcd
+    from iu2frl_civ.device_factory import DeviceFactory
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ import bcd
+    from src.iu2frl_civ.device_factory import DeviceFactory
+
+    print("Using local library")
+
+print("numpy not loaded by the library")
+assert "numpy" not in sys.modules
+assert DeviceFactory and "numpy" not in sys.modules
+
+print("Known values")
+assert bcd.encode_bcd(14_074_000) == b"\x00\x40\x07\x14\x00"
+assert bcd.decode_bcd(b"\x00\x40\x07\x14\x00") == 14_074_000
+assert bcd.encode_bcd(10_450_000_000, bcd.WIDE_FREQUENCY_WIDTH) == b"\x00\x00\x00\x50\x04\x01"
+assert bcd.decode_bcd(b"\x00\x00\x00\x50\x04\x01") == 10_450_000_000
+assert bcd.encode_bcd(7_074_000, 4) == b"\x00\x40\x07\x07"
+assert bcd.encode_bcd_big_endian(1) == b"\x00\x01"
+assert bcd.encode_bcd_big_endian(255) == b"\x02\x55"
+assert bcd.encode_bcd_big_endian(123456) == b"\x12\x34\x56"
+assert bcd.encode_bcd_big_endian(5, min_width=3) == b"\x00\x00\x05"
+assert bcd.decode_bcd_big_endian(b"\x12\x34\x56") == 123456
+
+print("Bytes which are not BCD")
+for data in (b"\x0a", b"\x00\x1f\x07", b"\xa0\x00"):
+    for decode in (bcd.decode_bcd, bcd.decode_bcd_big_endian):
+        try:
+            decode(data)
+            raise AssertionError(f"{data!r} was decoded")
+        except ValueError:
+            pass
+
+print("Values out of range")
+for value, width in ((-1, 5), (10**10, 5), (10**12, 6)):
+    try:
+        bcd.encode_bcd(value, width)
+        raise AssertionError(f"{value} was encoded in {width} bytes")
+    except ValueError:
+        pass
+
+print("Random round trips")
+generator = random.Random(1)
+for width in (2, 4, 5, 6, 8):
+    for _ in range(2000):
+        value = generator.randrange(100**width)
+        assert bcd.decode_bcd(bcd.encode_bcd(value, width)) == value
+        assert bcd.decode_bcd_big_endian(bcd.encode_bcd_big_endian(value, width)) == value
+
+print("Batches")
+values = [generator.randrange(10**12) for _ in range(500)]
+data = b"".join(bcd.encode_bcd(value, 6) for value in values)
+numpy_installed = importlib.util.find_spec("numpy") is not None
+modes = [False, True] if numpy_installed else [False]
+for use_numpy in modes:
+    assert bcd.encode_bcd_batch(values, 6, use_numpy=use_numpy) == data
+    assert list(bcd.decode_bcd_batch(data, 6, use_numpy=use_numpy)) == values
+    try:
+        bcd.decode_bcd_batch(data[:-1], 6, use_numpy=use_numpy)
+        raise AssertionError("Truncated data was decoded")
+    except ValueError:
+        pass
+    try:
+        bcd.decode_bcd_batch(b"\x0a" * 6, 6, use_numpy=use_numpy)
+        raise AssertionError("Bytes which are not BCD were decoded")
+    except ValueError:
+        pass
+print(f"- Tested with numpy: {numpy_installed}")
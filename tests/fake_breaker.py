@@ -0,0 +1,139 @@
+"""
+Test the circuit breaker using a simulated transceiver
+
+The transceiver is powered off: after a few timeouts the commands are rejected
+immediately, until the background probe finds the transceiver answering again
+"""
+
+import sys
+import time
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.breaker import BreakerState
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.emulator import EmulatedSerial
+    from iu2frl_civ.enums import DeviceType
+    from iu2frl_civ.exceptions import CivTimeoutException, CivUnavailableException
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.breaker import BreakerState
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.emulator import EmulatedSerial
+    from src.iu2frl_civ.enums import DeviceType
+    from src.iu2frl_civ.exceptions import CivTimeoutException, CivUnavailableException
+
+    print("Using local library")
+
+
+class SwitchableSerial:
+    """Serial port of a transceiver which can be powered off"""
+
+    name = "SwitchableSerial"
+    baudrate = 19200
+    timeout = 0.02
+
+    def __init__(self):
+        self.frames = []
+        self.powered = False
+        self.writes = []
+
+    def write(self, data: bytes):
+        self.writes.append(bytes(data))
+        if self.powered:
+            self.frames.append(b"\xfe\xfe\xe0\x94\x19\x00\x94\xfd" if data[4] == 0x19 else b"\xfe\xfe\xe0\x94\xfb\xfd")
+
+    def read_until(self, *args, **kwargs):
+        if self.frames:
+            return self.frames.pop(0)
+        time.sleep(self.timeout)
+        return b""
+
+    def close(self):
+        pass
+
+
+port = SwitchableSerial()
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+radio.utils._ser = radio.utils._reader._ser = port
+breaker = radio.utils.breaker
+breaker.probe_interval = 0.05
+
+print("Opening the breaker after consecutive timeouts")
+for _ in range(breaker.failure_threshold):
+    try:
+        radio.utils.send_command(b"\x1a\x05", data=b"\x00\x71")
+        raise AssertionError("The timeout was not detected")
+    except CivUnavailableException:
+        raise AssertionError("The breaker opened too early")
+    except CivTimeoutException:
+        pass
+assert breaker.state is not BreakerState.CLOSED
+
+print("Rejecting the commands without sending them")
+writes = len([data for data in port.writes if data[4] != 0x19])
+start = time.monotonic()
+try:
+    radio.utils.send_command(b"\x1a\x05", data=b"\x00\x71")
+    raise AssertionError("The command was not rejected")
+except CivUnavailableException as e:
+    print(f"- {e} after {time.monotonic() - start:.4f} seconds")
+assert len([data for data in port.writes if data[4] != 0x19]) == writes
+
+print("Closing the breaker when the transceiver answers the probe")
+port.powered = True
+for _ in range(200):
+    if breaker.state is BreakerState.CLOSED:
+        break
+    time.sleep(0.01)
+assert breaker.state is BreakerState.CLOSED
+assert port.writes[-1][4:6] == b"\x19\x00"
+assert radio.utils.send_command(b"\x1a\x05", data=b"\x00\x71") == b"\xfe\xfe\xe0\x94\xfb\xfd"
+
+print("Opening the breaker after consecutive batches timing out")
+port.powered = False
+for _ in range(breaker.failure_threshold):
+    # A batch counts as one timeout, whatever the number of commands in flight
+    assert breaker.state is BreakerState.CLOSED
+    try:
+        radio.utils.send_commands([(b"\x15\x11", b""), (b"\x15\x12", b""), (b"\x15\x13", b""), (b"\x15\x14", b""), (b"\x15\x15", b"")])
+        raise AssertionError("The timeout was not detected")
+    except CivTimeoutException:
+        pass
+assert breaker.state is not BreakerState.CLOSED
+try:
+    radio.utils.send_commands([(b"\x15\x11", b"")])
+    raise AssertionError("The batch was not rejected")
+except CivUnavailableException:
+    pass
+port.powered = True
+for _ in range(200):
+    if breaker.state is BreakerState.CLOSED:
+        break
+    time.sleep(0.01)
+assert breaker.state is BreakerState.CLOSED
+assert radio.utils.send_commands([(b"\x1a\x05", b"\x00\x71")]) == [b"\xfe\xfe\xe0\x94\xfb\xfd"]
+
+print("Powering on the transceiver with the breaker open")
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+emulator = radio._ser.emulator
+radio.utils._ser = radio.utils._reader._ser = EmulatedSerial(emulator, timeout=0.02)
+breaker = radio.utils.breaker
+breaker.probe_interval = 0.05
+emulator.powered = False
+for _ in range(breaker.failure_threshold):
+    try:
+        radio.read_transceiver_id()
+        raise AssertionError("The timeout was not detected")
+    except CivTimeoutException:
+        pass
+assert breaker.state is not BreakerState.CLOSED
+radio.power_on()
+assert emulator.powered
+assert breaker.state is BreakerState.CLOSED
+assert radio.read_operating_frequency() == emulator.vfos[0].frequency
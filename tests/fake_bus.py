@@ -0,0 +1,167 @@
+"""
+Test two transceivers sharing the same CI-V bus
+
+The simulated bus echoes every frame sent by the controller (like a CT-17 interface)
+and both the transceivers listen to all the frames, replying only to the ones for them
+"""
+
+import sys
+import threading
+import time
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.bus import CivBus
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.enums import DeviceType
+    from iu2frl_civ.exceptions import CivCollisionException
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.bus import CivBus
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.enums import DeviceType
+    from src.iu2frl_civ.exceptions import CivCollisionException
+
+    print("Using local library")
+
+
+# Frequency of each transceiver (BCD, least significant byte first)
+FREQUENCIES = {0x94: b"\x00\x40\x07\x14\x00", 0xA2: b"\x00\x00\x10\x45\x01"}
+
+
+class SharedSerial:
+    """Serial port connected to a bus with two transceivers"""
+
+    name = "SharedSerial"
+    baudrate = 19200
+
+    def __init__(self):
+        self.frames = []
+        self.lock = threading.Lock()
+        self.collisions = []  # Echoes returned instead of the next frames, to simulate the collisions
+        self.writes = 0
+        self.replies = True  # The transceivers reply to the commands (like IC-821H, some commands have no reply)
+        self.latency = 0.0  # Delay of the replies (seconds)
+        self.events = []  # Commands written and replies read, by transceiver address
+
+    def write(self, data: bytes):
+        with self.lock:
+            self.writes += 1
+            if self.collisions:
+                # The frame collided: the echo is corrupted and the transceiver does not reply
+                self.frames.append(self.collisions.pop(0))
+                return len(data)
+            # Echo of the frame on the bus
+            self.frames.append(bytes(data))
+            transceiver, controller, command = data[2], data[3], data[4]
+            self.events.append(("write", transceiver))
+            if transceiver in FREQUENCIES and self.replies:
+                if command == 0x03:
+                    reply = b"\xfe\xfe" + bytes([controller, transceiver, 0x03]) + FREQUENCIES[transceiver] + b"\xfd"
+                else:
+                    reply = b"\xfe\xfe" + bytes([controller, transceiver]) + b"\xfb\xfd"
+                if self.latency:
+                    threading.Timer(self.latency, self.reply, args=(reply,)).start()
+                else:
+                    self.frames.append(reply)
+        return len(data)
+
+    def reply(self, frame: bytes):
+        with self.lock:
+            self.frames.append(frame)
+
+    def read_until(self, *args, **kwargs):
+        with self.lock:
+            if self.frames:
+                frame = self.frames.pop(0)
+                if frame[3] in FREQUENCIES and frame[2] != 0x00:
+                    self.events.append(("reply", frame[3]))
+                return frame
+        time.sleep(0.01)
+        return b""
+
+    def close(self):
+        pass
+
+
+with CivBus(ser=SharedSerial()) as bus:
+    hf = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, bus=bus)
+    vhf = DeviceFactory.get_repository(radio_address="0xA2", device_type=DeviceType.IC_9700, bus=bus)
+
+    print("Reading the frequency of both the transceivers")
+    assert hf.read_operating_frequency() == 14074000
+    assert vhf.read_operating_frequency() == 145100000
+
+    print("Reading from two threads at the same time")
+    errors = []
+
+    def poll(radio, expected):
+        for _ in range(20):
+            frequency = radio.read_operating_frequency()
+            if frequency != expected:
+                errors.append((radio.transceiver_address, frequency))
+
+    threads = [threading.Thread(target=poll, args=(hf, 14074000)), threading.Thread(target=poll, args=(vhf, 145100000))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+
+    print("Receiving the broadcasts of a single transceiver")
+    state = vhf.start_transceive_listener()
+    bus._ser.frames.append(b"\xfe\xfe\x00\xa2\x00\x00\x00\x20\x45\x01\xfd")
+    for _ in range(200):
+        if state.frequency == 145200000:
+            break
+        time.sleep(0.01)
+    assert state.frequency == 145200000
+    assert hf.utils.state.frequency != 145200000
+    vhf.stop_transceive_listener()
+
+    print("Waiting for the reply of a transceiver before writing to another one")
+    port = bus._ser
+    port.latency = 0.02
+    port.events = []
+    threads = [threading.Thread(target=poll, args=(hf, 14074000)), threading.Thread(target=poll, args=(vhf, 145100000))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+    for write, reply in zip(port.events[::2], port.events[1::2]):
+        assert write[0] == "write" and reply == ("reply", write[1]), port.events
+    port.latency = 0.0
+
+    print("Sending again after a collision")
+    hf.utils.collision_backoff = 0.001
+    port = bus._ser
+    writes = port.writes
+    port.collisions = [b"\xfe\xfe\x94\xe0\x2a\xfd", b"\xfe\xfe\x94\xe0\xfc\xfc\xfc\xfd"]
+    assert hf.read_operating_frequency() == 14074000
+    assert port.writes == writes + 3
+
+    print("Ignoring the echoes of the previous commands")
+    port.replies = False
+    assert hf.utils.send_command(b"\x05", data=b"\x00\x50\x07\x14\x00", no_reply=True) == b""
+    port.replies = True
+    writes = port.writes
+    assert hf.utils.send_command(b"\x05", data=b"\x00\x40\x07\x14\x00") == b"\xfe\xfe\xe0\x94\xfb\xfd"
+    port.frames.append(b"\xfe\xfe\x94\xe0\x1a\x05\x00\x71\x01\xfd")
+    assert hf.read_operating_frequency() == 14074000
+    assert port.writes == writes + 2
+
+    print("Giving up after too many collisions")
+    port.collisions = [b"\xfe\xfe\x94\xe0\xfc\xfc\xfc\xfd"] * (hf.utils.collision_retries + 1)
+    try:
+        hf.utils.send_command(b"\x03")
+        raise AssertionError("The collision was not detected")
+    except CivCollisionException as e:
+        print(f"- {e}")
+
+assert not bus.running
@@ -0,0 +1,130 @@
+"""
+Test the methods generated from the command tables of the drivers
+"""
+
+import inspect
+import sys
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.commands import BYTE, LEVEL, PERCENT, SWITCH, CommandSpec, command_table
+    from iu2frl_civ.device_base import DeviceBase
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.devices.generic import GenericDevice
+    from iu2frl_civ.devices.ic9700 import IC9700
+    from iu2frl_civ.enums import DeviceType
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.commands import BYTE, LEVEL, PERCENT, SWITCH, CommandSpec, command_table
+    from src.iu2frl_civ.device_base import DeviceBase
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.devices.generic import GenericDevice
+    from src.iu2frl_civ.devices.ic9700 import IC9700
+    from src.iu2frl_civ.enums import DeviceType
+
+    print("Using local library")
+
+
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+emulator = radio._ser.emulator
+
+print("Readers")
+emulator.settings[b"\x14\x01"] = b"\x02\x55"
+emulator.settings[b"\x14\x02"] = b"\x00\x00"
+assert radio.read_af_volume() == 100
+assert radio.read_rf_gain() == 0
+assert radio.read_smeter() == 120
+assert radio.read_mox_status() is False
+
+print("Setters")
+assert radio.set_mox(True) is True
+assert radio.read_mox_status() is True
+radio.set_mox(transmit=False)
+assert radio.read_mox_status() is False
+radio.set_lcd_brightness(128)
+assert emulator.settings[b"\x1a\x05\x00\x81"] == b"\x01\x28"
+radio.set_vox_delay(delay=15)
+assert emulator.settings[b"\x1a\x05\x01\x91"] == b"\x0f"
+radio.set_display_font()
+assert emulator.settings[b"\x1a\x05\x00\x83"] == b"\x01"
+radio.set_display_font(round_font=False)
+assert emulator.settings[b"\x1a\x05\x00\x83"] == b"\x00"
+# 0x00 means on for the inverted switches
+radio.set_rtty_log_time_stamp_local(local=True)
+assert emulator.settings[b"\x1a\x05\x01\x76"] == b"\x00"
+radio.set_qso_recorder_mode(False)
+assert emulator.settings[b"\x1a\x05\x01\x82"] == b"\x01"
+# Percentages truncated to 0-255, like the hand-written setters
+for width, data in ((1, b"\x00\x02"), (50, b"\x01\x27"), (100, b"\x02\x55")):
+    radio.set_nb_width(width)
+    assert emulator.settings[b"\x1a\x05\x01\x90"] == data, (width, emulator.settings[b"\x1a\x05\x01\x90"])
+
+print("Value ranges")
+for method, value in ((radio.set_vox_delay, 21), (radio.set_lcd_brightness, -1), (radio.set_repeat_interval_voice_memory, 0)):
+    try:
+        method(value)
+        raise AssertionError(f"{method.__name__} accepted {value}")
+    except ValueError:
+        pass
+
+print("Signatures")
+# Same arguments as the methods written by hand, so they can still be passed by name
+assert list(inspect.signature(radio.set_display_font).parameters) == ["round_font"]
+assert inspect.signature(radio.set_vox_voice_delay).parameters["voice_delay"].default is inspect.Parameter.empty
+assert inspect.signature(radio.set_rtty_log).parameters["on"].default is False
+assert radio.read_af_volume.__code__.co_argcount == 1
+assert radio.set_mox.__qualname__ == "IC7300.set_mox"
+assert "VOX delay" in radio.set_vox_delay.__doc__
+
+print("Models sharing the table")
+generic = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.Generic, fake=True)
+ic9700 = DeviceFactory.get_repository(radio_address="0xA2", device_type=DeviceType.IC_9700, fake=True)
+assert isinstance(ic9700, IC9700) and isinstance(ic9700, GenericDevice)
+assert list(inspect.signature(generic.set_display_font).parameters) == ["round"]
+assert ic9700.read_smeter() == generic.read_smeter() == 120
+assert ic9700.send_operating_frequency(432_100_000)
+try:
+    generic.send_operating_frequency(432_100_000)
+    raise AssertionError("The generic device accepted 432.1 MHz")
+except ValueError:
+    pass
+
+
+@command_table(
+    CommandSpec(b"\x14\x01", PERCENT, reader="read_af_volume", doc="the AF volume"),
+    CommandSpec(b"\x14\x0a", LEVEL, reader="read_rf_power", setter="set_rf_power", parameter="power", value_range=(0, 255), doc="the RF power"),
+    CommandSpec(b"\x16\x02", SWITCH, reader="read_preamp", setter="set_preamp", parameter="on", default=False, doc="the preamplifier"),
+    CommandSpec(b"\x1a\x05\x01\x91", BYTE, reader="read_vox_delay", doc="the VOX delay"),
+)
+class TableRadio(DeviceBase):
+    """Driver made only of the table"""
+
+    def __init__(self, utils):  # pylint: disable=super-init-not-called
+        self.utils = utils
+
+    def read_af_volume(self) -> int:
+        """Written by hand, not replaced by the table"""
+        return 42
+
+
+print("Driver made only of the table")
+table_radio = TableRadio(radio.utils)
+assert table_radio.read_af_volume() == 42
+assert table_radio.set_rf_power(200) is True
+assert table_radio.read_rf_power() == 200
+table_radio.set_preamp(True)
+assert table_radio.read_preamp() is True
+assert table_radio.read_vox_delay() == 15
+assert len(TableRadio.command_specs) == 4
+try:
+    command_table(CommandSpec(b"\x14\x01", PERCENT))(type("EmptyRadio", (DeviceBase,), {}))
+    raise AssertionError("A spec without methods was accepted")
+except ValueError:
+    pass
+
+print("All the command table tests were passed")
@@ -0,0 +1,99 @@
+"""
+Test the emulated transceiver used by the fake mode
+
+The emulator keeps the state of the transceiver, so the values written are read back
+"""
+
+import sys
+import time
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.emulator import EmulatedSerial, RadioEmulator
+    from iu2frl_civ.enums import DeviceType, OperatingMode, SelectedFilter, VFOOperation
+    from iu2frl_civ.exceptions import CivCommandException, CivTimeoutException
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.emulator import EmulatedSerial, RadioEmulator
+    from src.iu2frl_civ.enums import DeviceType, OperatingMode, SelectedFilter, VFOOperation
+    from src.iu2frl_civ.exceptions import CivCommandException, CivTimeoutException
+
+    print("Using local library")
+
+
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+emulator = radio._ser.emulator
+
+print("Frequency and mode")
+assert radio.read_operating_frequency() == 14074000
+radio.send_operating_frequency(7074000)
+radio.set_operating_mode(OperatingMode.CW, SelectedFilter.FIL3)
+assert radio.read_operating_frequency() == 7074000
+assert radio.read_operating_mode() == ["CW", "FIL3"]
+try:
+    radio.utils.send_command(b"\x05", data=radio.utils.encode_frequency(144300000))
+    raise AssertionError("Frequency out of range was accepted")
+except CivCommandException:
+    pass
+
+print("VFO A and B")
+radio.set_vfo_mode(VFOOperation.SELECT_VFO_B)
+radio.send_operating_frequency(21074000)
+radio.set_vfo_mode(VFOOperation.SELECT_VFO_A)
+assert radio.read_operating_frequency() == 7074000
+radio.set_vfo_mode(VFOOperation.EXCHANGE_VFO_A_B)
+assert radio.read_operating_frequency() == 21074000
+assert emulator.vfos[1].frequency == 7074000
+
+print("Levels and meters")
+radio.utils.send_command(b"\x14\x0a", data=b"\x01\x28")
+assert radio.utils.send_command(b"\x14\x0a")[-3:-1] == b"\x01\x28"
+assert radio.read_smeter() == 120
+radio.set_mox(True)
+assert radio.read_po_meter() == 100
+radio.set_mox(False)
+assert radio.read_po_meter() == 0
+assert abs(radio.read_vd_meter() - 13.8) < 0.1
+
+print("Memories")
+radio.set_memory(5, 14074000, OperatingMode.USB, SelectedFilter.FIL1, "FT8", repeater_tone=88.5, tone_squelch=88.5)
+assert emulator.memories[5][1:6] == radio.utils.encode_frequency(14074000)
+reply = radio.utils.send_command(b"\x1a\x00", data=b"\x00\x05")
+assert reply[9:14] == radio.utils.encode_frequency(14074000)
+radio.clear_memory(5)
+assert 5 not in emulator.memories
+# Channel numbers which are not BCD are rejected
+try:
+    radio.utils.send_command(b"\x1a\x00", data=b"\x00\x0c")
+    raise AssertionError("A binary channel number was accepted")
+except CivCommandException:
+    pass
+
+print("Power off")
+radio.power_off()
+try:
+    radio.utils.send_command(b"\x03")
+    raise AssertionError("The transceiver answered while off")
+except CivTimeoutException:
+    pass
+radio.power_on()
+assert radio.read_transceiver_id() == b"\x94"
+
+print("Latency, echo and errors")
+port = EmulatedSerial(RadioEmulator.for_device(DeviceType.IC_9700), timeout=0.2, latency=0.02, echo=True, drop_rate=0.2, seed=1)
+radio = DeviceFactory.get_repository(radio_address="0xA2", device_type=DeviceType.IC_9700, fake=True)
+radio._ser = radio.utils._ser = radio.utils._reader._ser = port
+start = time.monotonic()
+results = [radio.read_operating_frequency() for _ in range(20)]
+elapsed = time.monotonic() - start
+print(f"- {results.count(144300000)}/20 replies in {elapsed:.2f} seconds")
+assert set(results) == {144300000, -1}
+assert 0 < results.count(-1) < 20
+assert elapsed >= 0.02 * results.count(144300000)
@@ -0,0 +1,71 @@
+"""
+Test the frames built from the templates of the device
+"""
+
+import sys
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.enums import DeviceType
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.enums import DeviceType
+
+    print("Using local library")
+
+
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+utils = radio.utils
+
+print("Frames of the commands without data")
+frame = utils.build_command(b"\x15\x02")
+assert frame == b"\xfe\xfe\x94\xe0\x15\x02\xfd"
+# Built only once
+assert utils.build_command(b"\x15\x02") is frame
+
+print("Frames with data or preamble")
+assert utils.build_command(b"\x05", b"\x00\x40\x07\x14\x00") == b"\xfe\xfe\x94\xe0\x05\x00\x40\x07\x14\x00\xfd"
+assert utils.build_command(b"\x18\x01", preamble=b"\xfe" * 3) == b"\xfe" * 5 + b"\x94\xe0\x18\x01\xfd"
+assert utils.build_command(b"\x18\x01") == b"\xfe\xfe\x94\xe0\x18\x01\xfd"
+
+print("Templates with data")
+template = utils.frame_template(b"\x1c\x00", b"\x01")
+assert template == b"\xfe\xfe\x94\xe0\x1c\x00\x01\xfd"
+assert utils.frame_template(b"\x1c\x00", b"\x01") is template
+
+print("Invalid commands")
+for command in (b"", b"\x1a\x05\x00\x81\x00", "\x03", None):
+    try:
+        utils.build_command(command)
+        raise AssertionError(f"Command {command!r} was accepted")
+    except ValueError:
+        pass
+
+print("Address change")
+utils.transceiver_address = b"\xa2"
+assert utils.build_command(b"\x15\x02") == b"\xfe\xfe\xa2\xe0\x15\x02\xfd"
+utils.controller_address = b"\xe1"
+assert utils.build_command(b"\x15\x02") == b"\xfe\xfe\xa2\xe1\x15\x02\xfd"
+utils.transceiver_address = b"\x94"
+utils.controller_address = b"\xe0"
+
+print("Templates limit")
+utils.frame_template_limit = 4
+utils.controller_address = b"\xe0"  # Drops the templates
+for command in range(0x20):
+    assert utils.build_command(bytes([command])) == bytes([0xFE, 0xFE, 0x94, 0xE0, command, 0xFD])
+assert len(utils._frame_templates) == 4
+
+print("Commands")
+assert radio.read_operating_frequency() == 14074000
+assert radio.send_operating_frequency(7074000)
+assert radio.read_operating_frequency() == 7074000
+
+print("All the frame tests were passed")
@@ -0,0 +1,84 @@
+"""
+Test the adaptive read timeout using a simulated transceiver
+
+The transceiver replies after a few milliseconds, then it is powered off:
+the commands must fail after a fraction of `attempts × timeout`
+"""
+
+import sys
+import time
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.enums import DeviceType
+    from iu2frl_civ.exceptions import CivTimeoutException
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.enums import DeviceType
+    from src.iu2frl_civ.exceptions import CivTimeoutException
+
+    print("Using local library")
+
+
+class SlowSerial:
+    """Serial port of a transceiver replying after 5 ms"""
+
+    name = "SlowSerial"
+    baudrate = 19200
+    timeout = 1
+    latency = 0.005
+
+    def __init__(self):
+        self.frames = []
+        self.powered = True
+
+    def write(self, data: bytes):
+        if self.powered:
+            self.frames.append(b"\xfe\xfe\xe0\x94\x03\x00\x40\x07\x14\x00\xfd")
+
+    def read_until(self, *args, **kwargs):
+        if self.frames:
+            time.sleep(self.latency)
+            return self.frames.pop(0)
+        time.sleep(self.timeout)
+        return b""
+
+    def close(self):
+        pass
+
+
+port = SlowSerial()
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+radio.utils._ser = radio.utils._reader._ser = port
+radio.utils.latency.max_timeout = port.timeout
+
+print("Measuring the round-trip time")
+for _ in range(20):
+    assert radio.read_operating_frequency() == 14074000
+stats = radio.utils.latency.stats()[0x03]
+print(f"- {stats}")
+assert stats.count == 20 and stats.timeouts == 0
+assert 0.005 <= stats.mean < 0.05
+assert stats.p50 <= stats.p90 <= stats.p99
+assert stats.timeout < port.timeout
+assert port.timeout == 1, "The timeout of the port was not restored"
+
+print("Failing fast when the transceiver is off")
+port.powered = False
+start = time.monotonic()
+try:
+    radio.utils.send_command(b"\x03")
+    raise AssertionError("The timeout was not detected")
+except CivTimeoutException:
+    pass
+elapsed = time.monotonic() - start
+print(f"- Failed after {elapsed:.3f} seconds")
+assert elapsed < port.timeout
+assert radio.utils.latency.stats()[0x03].timeouts == 3
@@ -0,0 +1,123 @@
+"""
+Test the bulk reading and writing of the memory channels using the emulated transceiver
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.emulator import EmulatedSerial
+    from iu2frl_civ.enums import DeviceType, OperatingMode, SelectedFilter, ToneType
+    from iu2frl_civ.memories import MemoryChannel, MemorySnapshot
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.emulator import EmulatedSerial
+    from src.iu2frl_civ.enums import DeviceType, OperatingMode, SelectedFilter, ToneType
+    from src.iu2frl_civ.memories import MemoryChannel, MemorySnapshot
+
+    print("Using local library")
+
+
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+emulator = radio._ser.emulator
+
+print("Channel encoding")
+repeater = MemoryChannel(145_600_000, OperatingMode.FM, SelectedFilter.FIL1, "RPT R0", tone_type=ToneType.TONE, repeater_tone=88.5)
+assert len(repeater.to_bytes()) == 25
+assert MemoryChannel.from_bytes(repeater.to_bytes()) == repeater
+assert repeater.to_bytes()[9:12] == b"\x00\x08\x85"
+try:
+    MemoryChannel(7_074_000, OperatingMode.USB, SelectedFilter.FIL1, "NAME TOO LONG").to_bytes()
+    raise AssertionError("A long name was accepted")
+except ValueError:
+    pass
+
+print("Empty transceiver")
+snapshot = radio.dump_memories()
+assert len(snapshot) == 99
+assert all(channel is None for channel in snapshot.channels.values())
+
+print("Restore")
+fleet = MemorySnapshot(
+    {
+        1: MemoryChannel(7_074_000, OperatingMode.USB, SelectedFilter.FIL1, "FT8 40M", data_mode=True),
+        2: MemoryChannel(14_074_000, OperatingMode.USB, SelectedFilter.FIL1, "FT8 20M", data_mode=True),
+        12: repeater,
+        99: MemoryChannel(50_313_000, OperatingMode.USB, SelectedFilter.FIL2, "FT8 6M", select=2),
+    }
+)
+report = radio.restore_memories(fleet)
+assert report.written == [1, 2, 12, 99], report
+# The channel number is sent as BCD
+assert emulator.memories[12] == repeater.to_bytes()
+assert radio.dump_memories([1, 2, 12, 99]) == fleet
+
+print("Only the changed channels are written")
+report = radio.restore_memories(fleet)
+assert report.written == [] and report.unchanged == [1, 2, 12, 99], report
+fleet.channels[2] = fleet.channels[2]._replace(name="FT8 20")
+fleet.channels[3] = None
+report = radio.restore_memories(fleet)
+assert report.written == [2], report
+fleet.channels[1] = None
+report = radio.restore_memories(fleet)
+assert report.written == [1], report
+assert 1 not in emulator.memories
+
+print("CSV and JSON files")
+snapshot = radio.dump_memories()
+with tempfile.TemporaryDirectory() as folder:
+    for name in ("memories.csv", "memories.json"):
+        path = Path(folder) / name
+        snapshot.save(path)
+        assert MemorySnapshot.load(path) == snapshot, name
+    path = Path(folder) / "invalid.csv"
+    path.write_text("channel,frequency,mode,filter\n5,7074000,XYZ,FIL1\n", encoding="utf-8")
+    try:
+        MemorySnapshot.load(path)
+        raise AssertionError("An invalid mode was accepted")
+    except ValueError:
+        pass
+
+print("Another transceiver of the fleet")
+other = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+other.restore_memories(MemorySnapshot({2: fleet.channels[2]}))
+report = other.restore_memories(snapshot)
+assert report.written == [12, 99], report
+
+print("Invalid channels")
+for channels in ([0], [100]):
+    try:
+        radio.dump_memories(channels)
+        raise AssertionError(f"Channels {channels} were accepted")
+    except ValueError:
+        pass
+
+print("Channels written one at a time")
+radio.set_memory(12, 14_074_000, OperatingMode.USB, SelectedFilter.FIL1, "FT8 20M", repeater_tone=88.5, tone_squelch=88.5)
+assert radio.dump_memories([12]).channels[12] == MemoryChannel(14_074_000, OperatingMode.USB, SelectedFilter.FIL1, "FT8 20M")
+radio.clear_memory(12)
+assert radio.dump_memories([12]).channels[12] is None
+
+print("Comparing against one channel at a time")
+port = EmulatedSerial(emulator, latency=0.005)
+radio.utils._ser = radio.utils._reader._ser = port
+start = time.monotonic()
+for channel in range(1, 100):
+    radio.utils.send_command(b"\x1a\x00", data=bytes([0, channel // 10 << 4 | channel % 10]))
+sequential = time.monotonic() - start
+start = time.monotonic()
+radio.dump_memories()
+pipelined = time.monotonic() - start
+print(f"- 99 channels: {sequential:.3f} s one at a time, {pipelined:.3f} s pipelined")
+assert pipelined < sequential * 0.75
+
+print("All the memory tests were passed")
@@ -0,0 +1,85 @@
+"""
+Test the matching of the replies to the pipelined commands using the emulated transceiver
+"""
+
+import sys
+import time
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.emulator import EmulatedSerial
+    from iu2frl_civ.enums import DeviceType, OperatingMode, SelectedFilter
+    from iu2frl_civ.exceptions import CivCommandException
+    from iu2frl_civ.memories import MemoryChannel, MemorySnapshot
+    from iu2frl_civ.pipeline import CommandPipeline
+    from iu2frl_civ.profile import RadioProfile
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.emulator import EmulatedSerial
+    from src.iu2frl_civ.enums import DeviceType, OperatingMode, SelectedFilter
+    from src.iu2frl_civ.exceptions import CivCommandException
+    from src.iu2frl_civ.memories import MemoryChannel, MemorySnapshot
+    from src.iu2frl_civ.pipeline import CommandPipeline
+    from src.iu2frl_civ.profile import RadioProfile
+
+    print("Using local library")
+
+
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+port = radio._ser
+emulator = port.emulator
+
+print("NG reply to a read followed by a setter")
+pipeline = CommandPipeline(radio.utils)
+rejected = pipeline.submit(b"\x1a")  # Missing subcommand, rejected by the transceiver
+accepted = pipeline.submit(b"\x14\x01", b"\x01\x28")
+pipeline.flush()
+assert isinstance(rejected.exception(), CivCommandException), rejected.exception()
+assert accepted.result()[4] == 0xFB
+assert emulator.settings[b"\x14\x01"] == b"\x01\x28"
+
+print("Frames not matching the commands in flight")
+# Scope waveform received before the reply to the frequency reading
+port.push([(time.monotonic(), b"\xfe\xfe\xe0\x94\x27\x00\x00\x11\x01\x00\xfd")])
+frequency = pipeline.submit(b"\x03")
+pipeline.flush()
+assert frequency.result() == b"\xfe\xfe\xe0\x94\x03\x00\x40\x07\x14\x00\xfd", frequency.result()
+
+print("Pipelined commands with the transceive listener running")
+radio.start_transceive_listener()
+try:
+    for _ in range(10):
+        meters = radio.read_tx_meters()
+        assert meters.po >= 0 and meters.swr >= 0, meters
+    emulator.signals[14_074_000] = 200
+    result = radio.sweep(14_070_000, 14_081_000, 1000)
+    assert all(level >= 0 for level in result.smeter), result.smeter
+    assert dict(result.points())[14_074_000] == 200
+    channel = MemoryChannel(7_074_000, OperatingMode.USB, SelectedFilter.FIL1, "FT8")
+    assert radio.restore_memories(MemorySnapshot({5: channel})).written == [5]
+    assert radio.dump_memories([5]).channels[5] == channel
+    assert RadioProfile(vox_delay=7, nb_depth=3).apply(radio).changed == ["vox_delay", "nb_depth"]
+    # Broadcasts received in the middle of a batch still update the state
+    port.tune(7_100_000)
+    assert radio.dump_memories([5]).channels[5] == channel
+    time.sleep(0.05)
+    assert radio.utils.state.frequency == 7_100_000
+finally:
+    radio.stop_transceive_listener()
+
+print("TX meters rejected or not answered")
+radio.utils._ser = radio.utils._reader._ser = EmulatedSerial(emulator, timeout=0.02, ng_rate=1)
+assert radio.read_tx_meters() == (-1,) * 6
+radio.utils._ser = radio.utils._reader._ser = EmulatedSerial(emulator, timeout=0.02, drop_rate=0.5, seed=3)
+meters = radio.read_tx_meters()
+assert -1 in meters and any(meter != -1 for meter in meters), meters
+radio.utils.breaker.reset()
+
+print("All the pipeline tests were passed")
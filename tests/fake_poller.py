@@ -0,0 +1,98 @@
+"""
+Test the poller serving several consumers of the same parameters
+
+The S-meter is requested by two consumers at different rates: it must be read only
+at the fastest rate, and each consumer must receive the values at its own rate
+"""
+
+import sys
+import time
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.enums import DeviceType
+    from iu2frl_civ.poller import Poller
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.enums import DeviceType
+    from src.iu2frl_civ.poller import Poller
+
+    print("Using local library")
+
+
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+radio.utils._ser.latency = 0.002
+
+fast, slow = [], []
+with Poller(radio) as poller:
+    print("Polling for one second")
+    poller.subscribe("read_smeter", 0.05, callback=fast.append)
+    poller.subscribe("read_smeter", 0.2, callback=slow.append)
+    frequencies = poller.subscribe("read_operating_frequency", 0.1).queue
+    swr = poller.subscribe("read_swr_meter", 0.25)
+    time.sleep(1)
+    reads = dict(poller.reads)
+    print(f"- Readings: {reads}")
+    print(f"- Delivered: {len(fast)} fast, {len(slow)} slow, {frequencies.qsize()} frequencies")
+    assert 15 <= reads["read_smeter"] <= 22, "The S-meter was not read at the fastest rate only"
+    assert 15 <= len(fast) <= 22
+    assert 4 <= len(slow) <= 6
+    assert 8 <= frequencies.qsize() <= 11
+    assert frequencies.get().value == 14074000
+    assert all(result.value == 120 and result.parameter == "read_smeter" for result in fast)
+    assert poller.interval("read_smeter") == 0.05
+    assert poller.latest("read_swr_meter").value == 1
+
+    print("Cancelling the subscriptions")
+    swr.cancel()
+    assert poller.interval("read_swr_meter") is None
+    swr_reads = poller.reads["read_swr_meter"]
+    time.sleep(0.5)
+    assert poller.reads["read_swr_meter"] == swr_reads
+
+    print("Rejecting unknown parameters")
+    try:
+        poller.subscribe("read_something", 1)
+        raise AssertionError("The unknown parameter was accepted")
+    except ValueError:
+        pass
+
+assert not poller.running
+
+
+class SlowRadio:
+    """Device taking some time to answer"""
+
+    def read_slow_value(self):
+        time.sleep(0.1)
+        return 1
+
+    def read_value(self):
+        time.sleep(0.03)
+        return 1
+
+
+print("First reading and readings slower than the interval")
+with Poller(radio) as poller:
+    poller.subscribe("read_smeter", 0.5)
+    time.sleep(0.2)
+    assert poller.reads["read_smeter"] == 1, poller.reads
+with Poller(SlowRadio()) as poller:
+    poller.subscribe("read_slow_value", 0.05)
+    time.sleep(0.55)
+    # The late readings are skipped, instead of reading again right away
+    assert poller.reads["read_slow_value"] <= 4, poller.reads
+
+print("Readings at the requested rate whatever the time they take")
+with Poller(SlowRadio()) as poller:
+    poller.subscribe("read_value", 0.1)
+    time.sleep(1.05)
+    # Due every 0.1 seconds, not 0.1 seconds after the end of the previous reading
+    assert 10 <= poller.reads["read_value"] <= 11, poller.reads
@@ -0,0 +1,121 @@
+"""
+Test the configuration profiles using the emulated transceiver
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.emulator import EmulatedSerial
+    from iu2frl_civ.enums import DeviceType
+    from iu2frl_civ.profile import RadioProfile, available_settings
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.emulator import EmulatedSerial
+    from src.iu2frl_civ.enums import DeviceType
+    from src.iu2frl_civ.profile import RadioProfile, available_settings
+
+    print("Using local library")
+
+
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+emulator = radio._ser.emulator
+
+station = RadioProfile(
+    lcd_brightness=128,
+    display_font=True,
+    vox_delay=5,
+    nb_depth=4,
+    nb_width=50,
+    speech_speed=True,
+    rtty_mark_frequency=0,
+    rtty_shift_width=2,
+    scope_mode_fixed=True,
+    scope_sweep_speed=1,
+    scope_vbw=False,
+)
+
+print("Available settings")
+settings = available_settings(radio)
+assert "nb_depth" in settings and "rtty_shift_width" in settings and "scope_vbw" in settings
+assert "af_volume" not in settings  # Only read
+assert "rtty_mark_frequency" not in available_settings(DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.Generic, fake=True))
+
+print("First apply")
+report = station.apply(radio)
+assert report.changed == ["lcd_brightness", "display_font", "vox_delay", "nb_depth", "nb_width", "speech_speed", "rtty_shift_width", "scope_mode_fixed", "scope_sweep_speed"], report
+# Already matching the defaults of the emulator
+assert report.unchanged == ["rtty_mark_frequency", "scope_vbw"], report
+assert all(result.elapsed > 0 for result in report.results)
+result = report.results[3]
+assert result.name == "nb_depth" and result.previous == 1 and result.value == 4 and result.changed, result
+assert emulator.settings[b"\x1a\x05\x00\x81"] == b"\x01\x28"
+assert emulator.settings[b"\x1a\x05\x01\x89"] == b"\x03"
+assert emulator.settings[b"\x27\x14\x00"] == b"\x01"
+assert emulator.settings[b"\x27\x1a\x00"] == b"\x01"
+# Same data sent by the setters
+radio.set_nb_width(50)
+assert emulator.settings[b"\x1a\x05\x01\x90"] == b"\x01\x27"
+
+print("Second apply")
+report = station.apply(radio)
+assert report.changed == [], report
+assert station.diff(radio) == {}
+assert station.read(radio)["nb_depth"] == 4
+
+print("Changes from the front panel")
+radio.set_vox_delay(10)
+radio.set_scope_vbw(wide=True)
+assert station.diff(radio) == {"vox_delay": (10, 5), "scope_vbw": (True, False)}
+report = station.apply(radio)
+assert report.changed == ["vox_delay", "scope_vbw"], report
+assert [result.previous for result in report.results if result.changed] == [10, True]
+
+print("Invalid profiles are not sent")
+for invalid in (RadioProfile(vox_delay=3, nb_depth=11), RadioProfile(vox_delay=3, af_volume=50), RadioProfile(vox_delay=3, rtty_shift_width="wide")):
+    try:
+        invalid.apply(radio)
+        raise AssertionError(f"{invalid} was accepted")
+    except ValueError:
+        pass
+    assert emulator.settings[b"\x1a\x05\x01\x91"] == b"\x05"
+
+print("Profile from a transceiver and files")
+copy = RadioProfile.from_device(radio, station.settings)
+assert copy.settings["nb_width"] != 50  # Read back as a percentage of 0-255
+assert copy.apply(radio).changed == []
+with tempfile.TemporaryDirectory() as folder:
+    path = Path(folder) / "station.json"
+    station.save(path)
+    assert RadioProfile.load(path) == station
+    path.write_text("[1, 2]", encoding="utf-8")
+    try:
+        RadioProfile.load(path)
+        raise AssertionError("A list was accepted")
+    except ValueError:
+        pass
+
+print("Comparing against the setters")
+other = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+port = EmulatedSerial(other._ser.emulator, latency=0.005)
+other.utils._ser = other.utils._reader._ser = port
+start = time.monotonic()
+for name, value in station.settings.items():
+    getattr(other, f"set_{name}")(value)
+sequential = time.monotonic() - start
+start = time.monotonic()
+report = station.apply(other)
+pipelined = time.monotonic() - start
+assert report.changed == []
+print(f"- {len(station)} settings: {sequential:.3f} s with the setters, {pipelined:.3f} s to check the profile")
+assert pipelined < sequential * 0.75
+
+print("All the profile tests were passed")
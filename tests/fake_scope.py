@@ -0,0 +1,102 @@
+"""
+Test the reassembly of the scope waveform using a simulated data stream
+
+The frames are the same sent by an IC-7300 with the scope data output enabled
+"""
+
+import sys
+import threading
+import time
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.enums import DeviceType
+    from iu2frl_civ.exceptions import CivTimeoutException
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.enums import DeviceType
+    from src.iu2frl_civ.exceptions import CivTimeoutException
+
+    print("Using local library")
+
+
+def sweep_frames(center: bytes, span: bytes, first_point: int) -> bytes:
+    """Build the 11 divisions of a sweep (475 points)"""
+    frames = b"\xfe\xfe\xe0\x94\x27\x00\x00\x01\x11\x00" + center + span + b"\x00\xfd"
+    for division in range(2, 12):
+        points = 25 if division == 11 else 50
+        data = bytes((first_point + i) % 161 for i in range(points))
+        first_point += points
+        frames += b"\xfe\xfe\xe0\x94\x27\x00\x00" + bytes([int(str(division), 16)]) + b"\x11" + data + b"\xfd"
+    return frames
+
+
+class ScopeSerial:
+    """Serial port returning a recorded data stream"""
+
+    name = "ScopeSerial"
+    baudrate = 115200
+    in_waiting = 0
+
+    def __init__(self, stream: bytes):
+        self.frames = [frame + b"\xfd" for frame in stream.split(b"\xfd") if frame]
+
+    def write(self, data: bytes):
+        if data[4] == 0x03:
+            # The reply to the frequency reading is received before the next scope frames
+            self.frames.insert(0, b"\xfe\xfe\xe0\x94\x03\x00\x40\x07\x14\x00\xfd")
+
+    def read_until(self, *args, **kwargs):
+        time.sleep(0)  # Let the other threads run between the frames, like a real serial port
+        return self.frames.pop(0) if self.frames else b""
+
+    def close(self):
+        pass
+
+
+# 14.074 MHz ±25 kHz, then a sweep with a missing division, then 7.074 MHz ±10 kHz
+first = sweep_frames(b"\x00\x40\x07\x14\x00", b"\x00\x50\x02\x00\x00", 0)
+broken = sweep_frames(b"\x00\x40\x07\x14\x00", b"\x00\x50\x02\x00\x00", 0).replace(b"\x27\x00\x00\x05\x11", b"\x27\x00\x00\x06\x11", 1)
+second = sweep_frames(b"\x00\x40\x07\x07\x00", b"\x00\x00\x01\x00\x00", 10)
+# Late replies to other commands, received while nobody is waiting for them, are ignored
+other = b"\xfe\xfe\xe0\x94\xfb\xfd"
+
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+radio.utils._ser = radio.utils._reader._ser = ScopeSerial(first + other + broken + second)
+
+print("Reading the scope sweeps")
+sweeps = radio.read_scope_sweeps(use_numpy=False)
+sweep = next(sweeps)
+print(f"- Sweep: {sweep.lower_hz} - {sweep.upper_hz} Hz, {len(sweep.data)} points")
+assert (sweep.fixed_mode, sweep.center_hz, sweep.span_hz) == (False, 14074000, 25000)
+assert list(sweep.data) == [i % 161 for i in range(475)]
+sweep = next(sweeps)
+print(f"- Sweep: {sweep.lower_hz} - {sweep.upper_hz} Hz, {len(sweep.data)} points")
+assert (sweep.center_hz, sweep.span_hz) == (7074000, 10000)
+assert list(sweep.data) == [(10 + i) % 161 for i in range(475)]
+
+print("Waiting for the end of the stream")
+try:
+    next(sweeps)
+    raise AssertionError("The incomplete sweep was returned")
+except CivTimeoutException as e:
+    print(f"- {e}")
+
+print("Sending commands from another thread while reading the sweeps")
+radio.utils._ser = radio.utils._reader._ser = ScopeSerial(first * 50)
+sweeps = radio.read_scope_sweeps(use_numpy=False)
+frequencies = []
+reader = threading.Thread(target=lambda: frequencies.extend(radio.read_operating_frequency() for _ in range(20)))
+reader.start()
+for _ in range(40):
+    assert list(next(sweeps).data) == [i % 161 for i in range(475)]
+reader.join()
+assert frequencies == [14074000] * 20, frequencies
+assert sweeps.dropped == 0
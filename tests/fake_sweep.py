@@ -0,0 +1,86 @@
+"""
+Test the frequency sweep against the emulated transceiver
+
+A few signals are placed on the band, the sweep must find them and be faster than
+setting the frequency and reading the S-meter one command at a time
+"""
+
+import sys
+import time
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.emulator import EmulatedSerial, RadioEmulator
+    from iu2frl_civ.enums import DeviceType
+    from iu2frl_civ.exceptions import CivTimeoutException
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.emulator import EmulatedSerial, RadioEmulator
+    from src.iu2frl_civ.enums import DeviceType
+    from src.iu2frl_civ.exceptions import CivTimeoutException
+
+    print("Using local library")
+
+
+emulator = RadioEmulator.for_device(DeviceType.IC_7300)
+emulator.settings[b"\x15\x02"] = b"\x00\x10"  # Noise floor
+emulator.signals = {14_074_000: 200, 14_080_000: 150}
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True, emulator=emulator)
+
+print("Sweeping the FT8 segment")
+result = radio.sweep(14_070_000, 14_082_000, 1000)
+assert len(result) == 13
+assert result.frequencies[0] == 14_070_000 and result.frequencies[-1] == 14_082_000
+peaks = {frequency: level for frequency, level in result.points() if level != 10}
+assert peaks == {14_074_000: 200, 14_080_000: 150}, peaks
+assert emulator.vfo.frequency == 14_082_000
+
+print("Sweeping below the band edge of the transceiver")
+result = radio.sweep(10_000, 40_000, 10_000)
+assert list(result.smeter) == [-1, -1, 10, 10], result.smeter
+
+print("Waiting the dwell time")
+start = time.monotonic()
+radio.sweep(14_000_000, 14_009_000, 1000, dwell_ms=10)
+assert time.monotonic() - start >= 10 * 0.01
+
+print("Comparing against one command at a time")
+port = EmulatedSerial(emulator, latency=0.005)
+radio.utils._ser = radio.utils._reader._ser = port
+start = time.monotonic()
+for frequency in range(14_000_000, 14_050_000, 1000):
+    radio.send_operating_frequency(frequency)
+    radio.read_smeter()
+sequential = time.monotonic() - start
+start = time.monotonic()
+radio.sweep(14_000_000, 14_049_000, 1000)
+pipelined = time.monotonic() - start
+print(f"- 50 points: {sequential:.3f} s one at a time, {pipelined:.3f} s pipelined")
+assert pipelined < sequential * 0.75
+
+print("Invalid ranges")
+for start_hz, stop_hz, step_hz in ((14_000_000, 13_000_000, 1000), (14_000_000, 14_100_000, 0), (73_000_000, 74_500_000, 10_000), (5_000, 20_000, 1000)):
+    try:
+        radio.sweep(start_hz, stop_hz, step_hz)
+        raise AssertionError("The invalid range was accepted")
+    except ValueError:
+        pass
+
+print("Transceiver not answering")
+port = EmulatedSerial(emulator, timeout=0.05, drop_rate=1)
+radio.utils._ser = radio.utils._reader._ser = port
+start = time.monotonic()
+try:
+    radio.sweep(14_000_000, 14_999_000, 1000)
+    raise AssertionError("The sweep did not time out")
+except CivTimeoutException:
+    pass
+print(f"- Stopped after {time.monotonic() - start:.3f} s")
+assert time.monotonic() - start < 1
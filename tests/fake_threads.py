@@ -0,0 +1,78 @@
+"""
+Test several threads sharing the same device
+
+Each thread checks that it receives the replies to its own commands, while the
+emulated transceiver replies with a random delay
+"""
+
+import sys
+import threading
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.enums import DeviceType, OperatingMode, SelectedFilter
+    from iu2frl_civ.poller import Poller
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.enums import DeviceType, OperatingMode, SelectedFilter
+    from src.iu2frl_civ.poller import Poller
+
+    print("Using local library")
+
+
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+radio.utils._ser.latency = 0.001
+radio.utils._ser.jitter = 0.002
+radio.set_operating_mode(OperatingMode.USB, SelectedFilter.FIL2)
+errors = []
+
+
+def check(name, value, expected):
+    if value != expected:
+        errors.append(f"{name}: {value} instead of {expected}")
+
+
+def read_meters():
+    for _ in range(100):
+        check("S-meter", radio.read_smeter(), 120)
+        check("Vd", round(radio.read_vd_meter(), 1), 13.8)
+
+
+def read_mode():
+    for _ in range(100):
+        check("mode", radio.read_operating_mode(), ["USB", "FIL2"])
+
+
+def tune():
+    for index in range(100):
+        frequency = 14_000_000 + index * 1000
+        # Nobody else can change the frequency between the two commands
+        with radio.utils.transaction():
+            radio.send_operating_frequency(frequency)
+            check("frequency", radio.read_operating_frequency(), frequency)
+
+
+def sweep():
+    for _ in range(5):
+        result = radio.sweep(7_000_000, 7_020_000, 1000)
+        check("sweep", list(result.smeter), [120] * 21)
+
+
+print("Sending commands from 4 threads and a poller")
+smeter = []
+with Poller(radio) as poller:
+    poller.subscribe("read_smeter", 0.01, callback=lambda result: check("poller", result.value, 120))
+    threads = [threading.Thread(target=target) for target in (read_meters, read_mode, tune, sweep)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"- {poller.reads['read_smeter']} S-meter readings by the poller")
+assert not errors, errors[:10]
@@ -0,0 +1,141 @@
+"""
+Test the transceive listener using a simulated transceiver
+
+The transceiver broadcasts the frequency and mode changes (like an IC-7300 with CI-V Transceive on)
+and replies to the frequency reading command
+"""
+
+import sys
+import threading
+import time
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.enums import DeviceType
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.enums import DeviceType
+
+    print("Using local library")
+
+
+class TransceiveSerial:
+    """Serial port of a transceiver broadcasting its changes"""
+
+    name = "TransceiveSerial"
+    baudrate = 115200
+    in_waiting = 0
+    timeout = 0.05
+
+    def __init__(self):
+        self.frames = []
+        self.commands = []
+        self.lock = threading.Lock()
+
+    def broadcast(self, frame: bytes):
+        with self.lock:
+            self.frames.append(frame)
+
+    def write(self, data: bytes):
+        with self.lock:
+            self.commands.append(data)
+            if data[4] == 0x03:
+                # Reply to the frequency reading: 14.074 MHz
+                self.frames.append(b"\xfe\xfe\xe0\x94\x03\x00\x40\x07\x14\x00\xfd")
+            else:
+                self.frames.append(b"\xfe\xfe\xe0\x94\xfb\xfd")
+
+    def read_until(self, *args, **kwargs):
+        with self.lock:
+            if self.frames:
+                return self.frames.pop(0)
+        time.sleep(self.timeout)
+        return b""
+
+    def close(self):
+        pass
+
+
+def wait_for(condition):
+    """Wait until the condition is true (at most 2 seconds)"""
+    for _ in range(200):
+        if condition():
+            return
+        time.sleep(0.01)
+    raise AssertionError("Timeout waiting for the transceive listener")
+
+
+port = TransceiveSerial()
+radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, fake=True)
+radio.utils._ser = radio.utils._reader._ser = port
+
+print("Reading the frequency without the listener")
+assert radio.read_operating_frequency() == 14074000
+assert len(port.commands) == 1
+
+print("Starting the transceive listener")
+state = radio.start_transceive_listener()
+assert state.live
+
+print("Receiving a frequency broadcast")
+port.broadcast(b"\xfe\xfe\x00\x94\x00\x00\x50\x07\x07\x00\xfd")
+wait_for(lambda: state.frequency == 7075000)
+print(f"- {state}")
+assert radio.read_operating_frequency() == 7075000
+assert len(port.commands) == 1, "The frequency was read from the transceiver"
+
+print("Receiving a mode broadcast")
+port.broadcast(b"\xfe\xfe\x00\x94\x01\x03\x02\xfd")
+wait_for(lambda: state.mode == 3)
+assert state.filter == 2
+
+print("Receiving a broadcast which is not valid")
+port.broadcast(b"\xfe\xfe\x00\x94\x00\x0a\x40\x07\x14\x00\xfd")
+port.broadcast(b"\xfe\xfe\x00\x94\x01\x03\x0f\xfd")
+port.broadcast(b"\xfe\xfe\x00\x94\x00\x00\x50\x07\x07\x00\xfd")
+wait_for(lambda: not port.frames)
+time.sleep(0.01)
+assert radio.utils._listener.running and state.live
+assert state.frequency == 7075000 and state.mode == 3 and state.filter == 2, state
+assert radio.utils.send_command(b"\x1a\x05", data=b"\x00\x71") == b"\xfe\xfe\xe0\x94\xfb\xfd"
+
+print("Sending a command while receiving broadcasts")
+port.broadcast(b"\xfe\xfe\x00\x94\x00\x00\x60\x07\x07\x00\xfd")
+assert radio.utils.send_command(b"\x1a\x05", data=b"\x00\x71") == b"\xfe\xfe\xe0\x94\xfb\xfd"
+wait_for(lambda: state.frequency == 7076000)
+
+print("Setting the frequency invalidates the state")
+radio.send_operating_frequency(14074000)
+assert state.frequency is None
+assert radio.read_operating_frequency() == 14074000
+assert state.frequency == 14074000
+commands = len(port.commands)
+assert radio.read_operating_frequency() == 14074000
+assert len(port.commands) == commands
+
+print("Stopping the transceive listener")
+radio.stop_transceive_listener()
+assert not state.live
+radio.read_operating_frequency()
+assert len(port.commands) == commands + 1
+
+print("Reading the serial port again when the listener fails")
+
+
+def disconnected(*args, **kwargs):
+    raise OSError("Device disconnected")
+
+
+state = radio.start_transceive_listener()
+port.read_until = disconnected
+wait_for(lambda: not state.live)
+del port.read_until
+assert radio.read_operating_frequency() == 14074000
+radio.stop_transceive_listener()
@@ -0,0 +1,67 @@
+"""
+Test the real serial transport against a virtual transceiver on a pseudo-terminal
+
+The commands go through `serial.Serial` and the operating system, measuring the throughput
+and the latency of the whole transport (only on the systems providing pseudo-terminals)
+"""
+
+import statistics
+import sys
+import time
+
+try:
+    # Import the library installed using pip
+    from iu2frl_civ.device_factory import DeviceFactory
+    from iu2frl_civ.emulator import RadioEmulator
+    from iu2frl_civ.enums import DeviceType
+    from iu2frl_civ.virtual_radio import VirtualRadio
+
+    print("Using installed library")
+except ImportError:
+    # Use this block if working with source code
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent.parent))
+    from src.iu2frl_civ.device_factory import DeviceFactory
+    from src.iu2frl_civ.emulator import RadioEmulator
+    from src.iu2frl_civ.enums import DeviceType
+    from src.iu2frl_civ.virtual_radio import VirtualRadio
+
+    print("Using local library")
+
+
+COMMANDS = 100
+
+for device_type, address, frequency in ((DeviceType.IC_7300, "0x94", 7074000), (DeviceType.IC_9700, "0xA2", 145500000)):
+    with VirtualRadio(RadioEmulator.for_device(device_type), baudrate=19200) as virtual:
+        print(f"{device_type.name} on {virtual.port}")
+        radio = DeviceFactory.get_repository(radio_address=address, device_type=device_type, port=virtual.port, baudrate=19200)
+        radio.send_operating_frequency(frequency)
+        assert radio.read_operating_frequency() == frequency
+
+        times = []
+        start = time.monotonic()
+        for _ in range(COMMANDS):
+            sent = time.perf_counter()
+            assert radio.read_operating_frequency() == frequency
+            times.append(time.perf_counter() - sent)
+        elapsed = time.monotonic() - start
+        times.sort()
+        print(f"- {COMMANDS / elapsed:.1f} commands/s, p50 {statistics.median(times) * 1000:.2f} ms, p99 {times[int(COMMANDS * 0.99) - 1] * 1000:.2f} ms")
+        # The command (6 bytes) and the reply (11 bytes) take about 9 ms on the line at 19200 bps
+        assert times[0] >= 17 * 10 / 19200
+        assert virtual.frames >= COMMANDS + 2
+        radio._ser.close()
+
+print("Receiving the transceive broadcasts")
+with VirtualRadio(RadioEmulator.for_device(DeviceType.IC_7300), pacing=False) as virtual:
+    radio = DeviceFactory.get_repository(radio_address="0x94", device_type=DeviceType.IC_7300, port=virtual.port)
+    state = radio.start_transceive_listener()
+    virtual.tune(3573000)
+    for _ in range(200):
+        if state.frequency == 3573000:
+            break
+        time.sleep(0.01)
+    assert state.frequency == 3573000
+    radio.stop_transceive_listener()
+    radio._ser.close()